@@ -116,12 +116,34 @@ class _TimeoutMonitor(process.plugins.Monitor):
 engine.timeout_monitor = _TimeoutMonitor(engine)
 engine.timeout_monitor.subscribe()
 
+
+class _Watchdog(process.plugins.Watchdog):
+    """Watchdog which samples the stacks of slow requests.
+
+    This is not subscribed by default; set "engine.watchdog.on" to True in
+    config to turn it on, and "engine.watchdog.threshold" to change the
+    number of seconds after which a request is considered slow.
+    """
+
+    def before_request(self):
+        self.begin(serving.request)
+
+    def after_request(self):
+        self.end()
+
+    def describe(self, request):
+        return request.request_line or repr(request)
+engine.watchdog = _Watchdog(engine)
+
 engine.autoreload = process.plugins.Autoreloader(engine)
 engine.autoreload.subscribe()
 
 engine.thread_manager = process.plugins.ThreadManager(engine)
 engine.thread_manager.subscribe()
 
+engine.preforker = process.plugins.Preforker(engine)
+engine.preforker.subscribe()
+
 engine.signal_handler = process.plugins.SignalHandler(engine)
 
 
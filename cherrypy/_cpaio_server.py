@@ -0,0 +1,17 @@
+"""CherryPy's servers, waiting on their clients with asyncio (Python 3.5+).
+
+See wsgiserver.aioserver. This module is only imported (and with it,
+asyncio) when server.asyncio is set.
+"""
+
+from cherrypy._cpnative_server import CPHTTPServer
+from cherrypy._cpwsgi_server import CPWSGIServer
+from cherrypy.wsgiserver.aioserver import AsyncioHTTPServer
+
+
+class CPAsyncioWSGIServer(AsyncioHTTPServer, CPWSGIServer):
+    """A CPWSGIServer which waits on its clients with asyncio."""
+
+
+class CPAsyncioHTTPServer(AsyncioHTTPServer, CPHTTPServer):
+    """A CPHTTPServer which waits on its clients with asyncio."""
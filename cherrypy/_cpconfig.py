@@ -145,9 +145,176 @@ def merge(base, other):
         base.setdefault(section, {}).update(value_map)
 
 
+class ConfigView(object):
+    """A mapping which layers a list of config dicts, one on another.
+
+    Looking up a key searches the layers from last to first, so the result
+    is the same as if the layers had been merged in order with dict.update;
+    but nothing is copied, and changes to the layers show through.
+
+    Views may be shared (see Application.config_views), so don't write to
+    one you didn't make; call child() for one you can write to.
+    request.config is such a child: writes to it go into a dict of its
+    own, laid on top of the others. Removing a key (with del, pop, popitem
+    or clear) first replaces its layers with a merged copy of them, so
+    that the shared dicts are left alone.
+
+    A view supports the whole dict API, but it is not a dict; call copy()
+    for a dict of everything in it.
+    """
+
+    parent = None
+    """The view which this one is a child() of, if any."""
+
+    compiled_namespaces = None
+    """A (generation, compiled) pair, where compiled is what
+    Request.namespaces.compile returned for this view when the global
+    config's generation and the app's config_generation were the given
+    (global, app) pair. See Request.apply_namespaces."""
+
+    def __init__(self, layers=()):
+        self.layers = tuple(layers)
+        self.local = None
+
+    def child(self):
+        """Return a new view of the same layers, which may be written to."""
+        view = self.__class__(self.layers)
+        view.parent = self
+        return view
+
+    def __getitem__(self, key):
+        for layer in reversed(self.layers):
+            if key in layer:
+                return layer[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        for layer in reversed(self.layers):
+            if key in layer:
+                return layer[key]
+        return default
+
+    def __contains__(self, key):
+        for layer in self.layers:
+            if key in layer:
+                return True
+        return False
+    has_key = __contains__
+
+    def items(self):
+        seen = {}
+        for layer in reversed(self.layers):
+            for k, v in layer.items():
+                if k not in seen:
+                    seen[k] = v
+        return list(seen.items())
+
+    def keys(self):
+        return [k for k, v in self.items()]
+
+    def values(self):
+        return [v for k, v in self.items()]
+
+    def iteritems(self):
+        return iter(self.items())
+
+    def iterkeys(self):
+        return iter(self.keys())
+
+    def itervalues(self):
+        return iter(self.values())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, ConfigView):
+            other = other.copy()
+        return self.copy() == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    # Views are mutable, like dicts.
+    __hash__ = None
+
+    def copy(self):
+        """Return a dict of everything in self, merged."""
+        return dict(self.items())
+
+    def __setitem__(self, key, value):
+        if self.local is None:
+            self.local = {}
+            self.layers += (self.local,)
+        self.local[key] = value
+
+    def setdefault(self, key, default=None):
+        for layer in reversed(self.layers):
+            if key in layer:
+                return layer[key]
+        self[key] = default
+        return default
+
+    def update(self, E=None, **F):
+        if E is not None:
+            if hasattr(E, 'keys'):
+                for k in E.keys():
+                    self[k] = E[k]
+            else:
+                for k, v in E:
+                    self[k] = v
+        for k, v in F.items():
+            self[k] = v
+
+    def _flatten(self):
+        """Replace our layers with a single (local) merged copy of them."""
+        if len(self.layers) != 1 or self.layers[0] is not self.local:
+            self.local = self.copy()
+            self.layers = (self.local,)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._flatten()
+        del self.local[key]
+
+    def pop(self, key, *default):
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        self._flatten()
+        return self.local.pop(key)
+
+    def popitem(self):
+        self._flatten()
+        return self.local.popitem()
+
+    def clear(self):
+        self.local = {}
+        self.layers = (self.local,)
+
+    def __repr__(self):
+        return "%s.%s(%r)" % (self.__module__, self.__class__.__name__,
+                              self.copy())
+
+
 class Config(reprconf.Config):
     """The 'global' configuration data for the entire CherryPy process."""
 
+    generation = 0
+    """A number which goes up whenever this config changes (so that caches
+    of values derived from it, see Application.dispatch_cache_size, can
+    tell when they're stale)."""
+
+    def reset(self):
+        """Reset self to default values."""
+        reprconf.Config.reset(self)
+        self.generation += 1
+
     def update(self, config):
         """Update self from a dict, file or filename."""
         if isinstance(config, basestring):
@@ -164,6 +331,34 @@ class Config(reprconf.Config):
         if 'tools.staticdir.dir' in config:
             config['tools.staticdir.section'] = "global"
         reprconf.Config._apply(self, config)
+        self.generation += 1
+
+    def __setitem__(self, k, v):
+        reprconf.Config.__setitem__(self, k, v)
+        self.generation += 1
+
+    def __delitem__(self, k):
+        reprconf.Config.__delitem__(self, k)
+        self.generation += 1
+
+    def pop(self, k, *default):
+        v = reprconf.Config.pop(self, k, *default)
+        self.generation += 1
+        return v
+
+    def popitem(self):
+        item = reprconf.Config.popitem(self)
+        self.generation += 1
+        return item
+
+    def setdefault(self, k, v=None):
+        v = reprconf.Config.setdefault(self, k, v)
+        self.generation += 1
+        return v
+
+    def clear(self):
+        reprconf.Config.clear(self)
+        self.generation += 1
 
     def __call__(self, *args, **kwargs):
         """Decorator for page handlers to set _cp_config."""
@@ -9,15 +9,18 @@ The default dispatcher discovers the page handler by matching path_info
 to a hierarchical arrangement of objects, starting at request.app.root.
 """
 
+import re
 import string
 import sys
 import types
+import weakref
 try:
     classtype = (type, types.ClassType)
 except AttributeError:
     classtype = type
 
 import cherrypy
+from cherrypy import _cpconfig
 from cherrypy._cpcompat import set
 
 
@@ -272,21 +275,36 @@ class Dispatcher(object):
         and were not used when looking up the handler.
         These virtual path components are passed to the handler as
         positional arguments.
+
+        If the application's dispatch_cache_size is set, what this finds for
+        each path is remembered (in app.dispatch_cache), and looked up
+        there first.
         """
         request = cherrypy.serving.request
         app = request.app
         root = app.root
         dispatch_name = self.dispatch_method_name
 
+        cacheable = app.dispatch_cache_size > 0
+        if cacheable:
+            entry = app.dispatch_cache.get(path)
+            if (entry is not None and entry[0] is self
+                and entry[1] == cherrypy.config.generation):
+                dispatcher, generation, handler, vpath, is_index, view = entry
+                request.config = view.child()
+                if is_index is not None:
+                    request.is_index = is_index
+                return handler, vpath[:]
+
         # Get config for the root object/path.
         fullpath = [x for x in path.strip('/').split('/') if x] + ['index']
         fullpath_len = len(fullpath)
         segleft = fullpath_len
-        nodeconf = {}
+        nodeconf = []
         if hasattr(root, "_cp_config"):
-            nodeconf.update(root._cp_config)
+            nodeconf.append(root._cp_config)
         if "/" in app.config:
-            nodeconf.update(app.config["/"])
+            nodeconf.append(app.config["/"])
         object_trail = [['root', root, nodeconf, segleft]]
 
         node = root
@@ -296,7 +314,13 @@ class Dispatcher(object):
             # map to legal Python identifiers (e.g. replace '.' with '_')
             objname = name.translate(self.translate)
 
-            nodeconf = {}
+            if cacheable and (hasattr(node, dispatch_name)
+                              or hasattr(node, '__getattr__')):
+                # What this node returns may change from one request to
+                # the next; don't remember it.
+                cacheable = False
+
+            nodeconf = []
             subnode = getattr(node, objname, None)
             pre_len = len(iternames)
             if subnode is None:
@@ -336,7 +360,7 @@ class Dispatcher(object):
             if node is not None:
                 # Get _cp_config attached to this node.
                 if hasattr(node, "_cp_config"):
-                    nodeconf.update(node._cp_config)
+                    nodeconf.append(node._cp_config)
 
             # Mix in values from app.config for this path.
             existing_len = fullpath_len - pre_len
@@ -348,20 +372,42 @@ class Dispatcher(object):
             for seg in new_segs:
                 curpath += '/' + seg
                 if curpath in app.config:
-                    nodeconf.update(app.config[curpath])
+                    nodeconf.append(app.config[curpath])
 
             object_trail.append([name, node, nodeconf, segleft])
 
         def set_conf():
-            """Collapse all object_trail config into cherrypy.request.config."""
-            base = cherrypy.config.copy()
+            """Layer all object_trail config into a view for request.config.
+
+            The global config, and each _cp_config and app.config section
+            along the way, is referred to rather than copied.
+            """
+            layers = [cherrypy.config]
             # Note that we merge the config from each node
             # even if that node was None.
             for name, obj, conf, segleft in object_trail:
-                base.update(conf)
-                if 'tools.staticdir.dir' in conf:
-                    base['tools.staticdir.section'] = '/' + '/'.join(fullpath[0:fullpath_len - segleft])
-            return base
+                layers.extend(conf)
+                for c in conf:
+                    if 'tools.staticdir.dir' in c:
+                        layers.append(app.staticdir_layer(
+                            '/' + '/'.join(fullpath[0:fullpath_len - segleft])))
+                        break
+            return app.config_view(layers)
+
+        def found(handler, vpath, is_index):
+            """Set request.config and is_index, remember them (if we may),
+            and return (handler, vpath)."""
+            view = set_conf()
+            request.config = view.child()
+            if is_index is not None:
+                request.is_index = is_index
+            if cacheable and handler is not None:
+                cache = app.dispatch_cache
+                if len(cache) >= app.dispatch_cache_size:
+                    cache.clear()
+                cache[path] = (self, cherrypy.config.generation, handler,
+                               vpath[:], is_index, view)
+            return handler, vpath
 
         # Try successive objects (reverse order)
         num_candidates = len(object_trail) - 1
@@ -377,33 +423,31 @@ class Dispatcher(object):
                 if getattr(defhandler, 'exposed', False):
                     # Insert any extra _cp_config from the default handler.
                     conf = getattr(defhandler, "_cp_config", {})
-                    object_trail.insert(i+1, ["default", defhandler, conf, segleft])
-                    request.config = set_conf()
+                    object_trail.insert(i+1, ["default", defhandler, [conf], segleft])
                     # See http://www.cherrypy.org/ticket/613
-                    request.is_index = path.endswith("/")
-                    return defhandler, fullpath[fullpath_len - segleft:-1]
+                    return found(defhandler, fullpath[fullpath_len - segleft:-1],
+                                 path.endswith("/"))
 
             # Uncomment the next line to restrict positional params to "default".
             # if i < num_candidates - 2: continue
 
             # Try the current leaf.
             if getattr(candidate, 'exposed', False):
-                request.config = set_conf()
                 if i == num_candidates:
                     # We found the extra ".index". Mark request so tools
                     # can redirect if path_info has no trailing slash.
-                    request.is_index = True
+                    is_index = True
                 else:
                     # We're not at an 'index' handler. Mark request so tools
                     # can redirect if path_info has NO trailing slash.
                     # Note that this also includes handlers which take
                     # positional parameters (virtual paths).
-                    request.is_index = False
-                return candidate, fullpath[fullpath_len - segleft:-1]
+                    is_index = False
+                return found(candidate, fullpath[fullpath_len - segleft:-1],
+                             is_index)
 
         # We didn't find anything
-        request.config = set_conf()
-        return None, []
+        return found(None, [], None)
 
 
 class MethodDispatcher(Dispatcher):
@@ -417,6 +461,49 @@ class MethodDispatcher(Dispatcher):
     Note that the containing class must be exposed, not the methods.
     """
 
+    verb_tables = weakref.WeakKeyDictionary()
+    """A map of {resource class: verb table}, shared by all MethodDispatchers
+    (see verb_table). Clear it if you add or remove methods on a resource
+    class after it has been dispatched to."""
+
+    def verb_table(self, resource):
+        """Return (allow, verbs) for the given resource.
+
+        allow is the value for its Allow header, and verbs is a dict of
+        {HTTP method: (attribute name, _cp_config)}. The table is made once
+        for each resource class, unless the resource has methods of its own
+        (in its instance __dict__).
+        """
+        cls = getattr(resource, '__class__', None)
+        own = getattr(resource, '__dict__', None)
+        if own and [k for k in own if k.isupper()]:
+            cls = None
+        if cls is not None:
+            try:
+                table = self.verb_tables.get(cls)
+            except TypeError:
+                cls = table = None
+            if table is not None:
+                return table
+
+        verbs = {}
+        for name in dir(resource):
+            if name.isupper():
+                func = getattr(resource, name, None)
+                verbs[name] = (name, getattr(func, "_cp_config", None))
+        if "GET" in verbs and "HEAD" not in verbs:
+            verbs["HEAD"] = verbs["GET"]
+        avail = list(verbs.keys())
+        avail.sort()
+        table = (", ".join(avail), verbs)
+
+        if cls is not None:
+            try:
+                self.verb_tables[cls] = table
+            except TypeError:
+                pass
+        return table
+
     def __call__(self, path_info):
         """Set handler and config for the current request."""
         request = cherrypy.serving.request
@@ -424,21 +511,25 @@ class MethodDispatcher(Dispatcher):
 
         if resource:
             # Set Allow header
-            avail = [m for m in dir(resource) if m.isupper()]
-            if "GET" in avail and "HEAD" not in avail:
-                avail.append("HEAD")
-            avail.sort()
-            cherrypy.serving.response.headers['Allow'] = ", ".join(avail)
+            allow, verbs = self.verb_table(resource)
+            cherrypy.serving.response.headers['Allow'] = allow
 
             # Find the subhandler
             meth = request.method.upper()
-            func = getattr(resource, meth, None)
-            if func is None and meth == "HEAD":
-                func = getattr(resource, "GET", None)
+            verb = verbs.get(meth)
+            if verb is not None:
+                name, conf = verb
+                func = getattr(resource, name, None)
+            else:
+                # Not in dir(resource); it may still come from __getattr__.
+                func = getattr(resource, meth, None)
+                if func is None and meth == "HEAD":
+                    func = getattr(resource, "GET", None)
+                conf = getattr(func, "_cp_config", None)
             if func:
                 # Grab any _cp_config on the subhandler.
-                if hasattr(func, "_cp_config"):
-                    request.config.update(func._cp_config)
+                if conf:
+                    request.config.update(conf)
 
                 # Decode any leftover %2F in the virtual_path atoms.
                 vpath = [x.replace("%2F", "/") for x in vpath]
@@ -506,63 +597,258 @@ class RoutesDispatcher(object):
             params.pop('action', None)
         request.params.update(params)
 
-        # Get config for the root object/path.
-        request.config = base = cherrypy.config.copy()
-        curpath = ""
-
-        def merge(nodeconf):
-            if 'tools.staticdir.dir' in nodeconf:
-                nodeconf['tools.staticdir.section'] = curpath or "/"
-            base.update(nodeconf)
-
-        app = request.app
-        root = app.root
-        if hasattr(root, "_cp_config"):
-            merge(root._cp_config)
-        if "/" in app.config:
-            merge(app.config["/"])
-
-        # Mix in values from app.config.
-        atoms = [x for x in path_info.split("/") if x]
-        if atoms:
-            last = atoms.pop()
-        else:
-            last = None
-        for atom in atoms:
-            curpath = "/".join((curpath, atom))
-            if curpath in app.config:
-                merge(app.config[curpath])
-
-        handler = None
+        controller = handler = None
         if result:
             controller = result.get('controller')
             controller = self.controllers.get(controller, controller)
             if controller:
                 if isinstance(controller, classtype):
                     controller = controller()
-                # Get config from the controller.
-                if hasattr(controller, "_cp_config"):
-                    merge(controller._cp_config)
 
             action = result.get('action')
             if action is not None:
                 handler = getattr(controller, action, None)
-                # Get config from the handler
-                if hasattr(handler, "_cp_config"):
-                    merge(handler._cp_config)
             else:
                 handler = controller
 
-        # Do the last path atom here so it can
-        # override the controller's _cp_config.
-        if last:
-            curpath = "/".join((curpath, last))
-            if curpath in app.config:
-                merge(app.config[curpath])
-
+        request.config = route_config(path_info, controller, handler)
         return handler
 
 
+def route_config(path_info, controller=None, handler=None):
+    """Return a ConfigView of the config for a routed request.
+
+    This layers the root's _cp_config, the app.config sections along
+    path_info, and the _cp_config of the given controller and handler
+    (which go before the section for the last path atom, so that it can
+    override them).
+    """
+    app = cherrypy.serving.request.app
+
+    # Get config for the root object/path.
+    layers = [cherrypy.config]
+    curpath = ""
+
+    def merge(nodeconf):
+        layers.append(nodeconf)
+        if 'tools.staticdir.dir' in nodeconf:
+            layers.append(app.staticdir_layer(curpath or "/"))
+
+    root = app.root
+    if hasattr(root, "_cp_config"):
+        merge(root._cp_config)
+    if "/" in app.config:
+        merge(app.config["/"])
+
+    # Mix in values from app.config.
+    atoms = [x for x in path_info.split("/") if x]
+    if atoms:
+        last = atoms.pop()
+    else:
+        last = None
+    for atom in atoms:
+        curpath = "/".join((curpath, atom))
+        if curpath in app.config:
+            merge(app.config[curpath])
+
+    # Get config from the controller and the handler.
+    if controller and hasattr(controller, "_cp_config"):
+        merge(controller._cp_config)
+    if (handler is not None and handler is not controller
+        and hasattr(handler, "_cp_config")):
+        merge(handler._cp_config)
+
+    # Do the last path atom here so it can
+    # override the controller's _cp_config.
+    if last:
+        curpath = "/".join((curpath, last))
+        if curpath in app.config:
+            merge(app.config[curpath])
+
+    return app.config_view(layers).child()
+
+
+class _RouteNode(object):
+    """One path segment's worth of a TrieDispatcher's routes."""
+
+    def __init__(self):
+        # {segment: _RouteNode} for literal segments.
+        self.static = {}
+        # [(name, regex, convert, _RouteNode)] for {param} segments,
+        # in the order they were connected.
+        self.params = []
+        # (name, _RouteNode) for a trailing {name:path} param.
+        self.rest = None
+        # [(name, controller, action, methods, defaults)] for the
+        # routes which end here.
+        self.routes = []
+
+
+class TrieDispatcher(object):
+    """A dispatcher which matches path_info against connected routes.
+
+    Routes are paths made of literal segments and {param} segments, for
+    example '/blog/{year:int}/{slug}'. Each route is compiled into a trie
+    of path segments when it's connected, so finding the route for a path
+    takes time in proportion to its number of segments, not to the number
+    of routes. Literal segments are preferred to params, and params are
+    tried in the order their routes were connected.
+
+    A param segment must be the whole segment. It is written {name} (any
+    segment), or {name:converter}, where converter is a key in
+    self.converters: 'int', 'float', 'str', or 'path' (the rest of the
+    path, slashes included; this must be the last segment). Add your own
+    to self.converters as (regex, function) pairs.
+
+    Page handlers are passed the converted params as keyword arguments,
+    along with request.params and any defaults given to connect.
+
+    Unlike RoutesDispatcher, this doesn't need the Routes package.
+    """
+
+    def __init__(self):
+        self.root = _RouteNode()
+        self.converters = {
+            'str': (r'[^/]+', str),
+            'int': (r'-?\d+', int),
+            'float': (r'-?\d+(?:\.\d+)?', float),
+            'path': (None, str),
+        }
+
+    def connect(self, name, route, controller, action=None, conditions=None,
+                **defaults):
+        """Connect the given route to a controller (or an action on it).
+
+        If action is given, the page handler is getattr(controller, action);
+        otherwise the controller itself. A controller which is a class is
+        instantiated for each request. conditions may include 'method', a
+        list of HTTP methods to which the route is restricted; other
+        requests for it get a 405.
+        """
+        node = self.root
+        segments = [x for x in route.split("/") if x]
+        for i, seg in enumerate(segments):
+            if not (seg.startswith("{") and seg.endswith("}")):
+                node = node.static.setdefault(seg, _RouteNode())
+                continue
+
+            pname, _, cname = seg[1:-1].partition(":")
+            try:
+                regex, convert = self.converters[cname or 'str']
+            except KeyError:
+                raise ValueError("Unknown converter %r in route %r."
+                                 % (cname, route))
+            if regex is None:
+                if i != len(segments) - 1:
+                    raise ValueError("A {%s:path} param must be the last "
+                                     "segment of route %r." % (pname, route))
+                if node.rest is None:
+                    node.rest = (pname, _RouteNode())
+                elif node.rest[0] != pname:
+                    raise ValueError("Route %r conflicts with another "
+                                     "{%s:path} param." % (route, node.rest[0]))
+                node = node.rest[1]
+                continue
+
+            for p in node.params:
+                if p[0] == pname and p[1].pattern == regex + '$':
+                    node = p[3]
+                    break
+            else:
+                child = _RouteNode()
+                node.params.append(
+                    (pname, re.compile(regex + '$'), convert, child))
+                node = child
+
+        methods = None
+        if conditions and conditions.get('method'):
+            methods = set([m.upper() for m in conditions['method']])
+        node.routes.append((name, controller, action, methods, defaults))
+
+    def match(self, path_info):
+        """Return (routes, params) for the given path, or (None, {})."""
+        segments = [x for x in path_info.split("/") if x]
+        params = {}
+        node = self._match(self.root, segments, 0, params)
+        if node is None:
+            return None, {}
+        return node.routes, params
+
+    def _match(self, node, segments, i, params):
+        if i == len(segments):
+            if node.routes:
+                return node
+            return None
+
+        seg = segments[i]
+        child = node.static.get(seg)
+        if child is not None:
+            found = self._match(child, segments, i + 1, params)
+            if found is not None:
+                return found
+
+        for name, regex, convert, child in node.params:
+            if regex.match(seg):
+                try:
+                    params[name] = convert(seg)
+                except ValueError:
+                    continue
+                found = self._match(child, segments, i + 1, params)
+                if found is not None:
+                    return found
+                del params[name]
+
+        if node.rest is not None:
+            name, child = node.rest
+            if child.routes:
+                params[name] = "/".join(segments[i:])
+                return child
+
+        return None
+
+    def __call__(self, path_info):
+        """Set handler and config for the current request."""
+        request = cherrypy.serving.request
+        routes, params = self.match(path_info)
+        if not routes:
+            request.config = route_config(path_info)
+            request.handler = cherrypy.NotFound()
+            return
+
+        method = request.method.upper()
+        allowed = set()
+        for route in routes:
+            name, controller, action, methods, defaults = route
+            if (methods is None or method in methods
+                or (method == "HEAD" and "GET" in methods)):
+                break
+            allowed.update(methods)
+        else:
+            request.config = route_config(path_info)
+            allowed = list(allowed)
+            if "GET" in allowed and "HEAD" not in allowed:
+                allowed.append("HEAD")
+            allowed.sort()
+            cherrypy.serving.response.headers['Allow'] = ", ".join(allowed)
+            request.handler = cherrypy.HTTPError(405)
+            return
+
+        if isinstance(controller, classtype):
+            controller = controller()
+        if action is not None:
+            handler = getattr(controller, action, None)
+        else:
+            handler = controller
+        request.config = route_config(path_info, controller, handler)
+
+        if handler is None:
+            request.handler = cherrypy.NotFound()
+        else:
+            kwargs = defaults.copy()
+            kwargs.update(params)
+            request.handler = LateParamPageHandler(handler, **kwargs)
+
+
 def XMLRPCDispatcher(next_dispatcher=Dispatcher()):
     from cherrypy.lib import xmlrpcutil
     def xmlrpc_dispatch(path_info):
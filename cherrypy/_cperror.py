@@ -132,6 +132,8 @@ class InternalRedirect(CherryPyException):
     def __init__(self, path, query_string=""):
         import cherrypy
         self.request = cherrypy.serving.request
+        # The next request will refer to this one (as request.prev).
+        self.request.recyclable = False
 
         self.query_string = query_string
         if "?" in path:
@@ -110,6 +110,21 @@ import sys
 import cherrypy
 from cherrypy import _cperror
 from cherrypy._cpcompat import ntob, py3k
+from cherrypy.lib.httputil import ClockCache
+
+
+_monthnames = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+               'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+def _format_log_time(timeval):
+    now = datetime.datetime.fromtimestamp(timeval)
+    return ('[%02d/%s/%04d:%02d:%02d:%02d]' %
+            (now.day, _monthnames[now.month - 1], now.year,
+             now.hour, now.minute, now.second))
+
+log_time = ClockCache(_format_log_time)
+"""Return the current local time in Apache Common Log Format (no timezone).
+The result is cached, and only reformatted once per second."""
 
 
 class NullHandler(logging.Handler):
@@ -283,12 +298,7 @@ class LogManager(object):
 
     def time(self):
         """Return now() in Apache Common Log Format (no timezone)."""
-        now = datetime.datetime.now()
-        monthnames = ['jan', 'feb', 'mar', 'apr', 'may', 'jun',
-                      'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
-        month = monthnames[now.month - 1].capitalize()
-        return ('[%02d/%s/%04d:%02d:%02d:%02d]' %
-                (now.day, month, now.year, now.hour, now.minute, now.second))
+        return log_time()
 
     def _get_builtin_handler(self, log, key):
         for h in log.handlers:
@@ -6,7 +6,7 @@ import sys
 import cherrypy
 from cherrypy._cpcompat import BytesIO
 from cherrypy._cperror import format_exc, bare_error
-from cherrypy.lib import httputil
+from cherrypy.lib import httputil, file_generator, file_generator_limited
 from cherrypy import wsgiserver
 
 
@@ -97,6 +97,15 @@ class NativeGateway(wsgiserver.Gateway):
             req.send_headers()
 
         # Set response body
+        fileobj = getattr(body, 'input', None)
+        if (type(body) in (file_generator, file_generator_limited)
+            and hasattr(fileobj, 'fileno')):
+            # Let the server copy the file straight to the socket.
+            req.sendfile(fileobj, getattr(body, 'remaining', None))
+            if type(body) is file_generator:
+                fileobj.close()
+            return
+
         for seg in body:
             req.write(seg)
 
@@ -130,6 +139,18 @@ class CPHTTPServer(wsgiserver.HTTPServer):
         self.shutdown_timeout = self.server_adapter.shutdown_timeout
         self.protocol = self.server_adapter.protocol_version
         self.nodelay = self.server_adapter.nodelay
+        self.autoscale_interval = self.server_adapter.thread_pool_autoscale_interval
+        self.autoscale_idle_period = self.server_adapter.thread_pool_idle_period
+        self.max_queue_size = self.server_adapter.thread_pool_max_queue
+        self.max_queue_wait = self.server_adapter.thread_pool_max_wait
+        self.retry_after = self.server_adapter.retry_after
+        self.reuse_port = self.server_adapter.workers > 0
+        self.accept_batch = self.server_adapter.socket_accept_batch
+        self.defer_accept = self.server_adapter.socket_defer_accept
+        self.ssl_handshake_timeout = self.server_adapter.ssl_handshake_timeout
+        self.keepalive_timeout = self.server_adapter.keepalive_timeout
+        self.keepalive_max_requests = self.server_adapter.keepalive_max_requests
+        self.keepalive_max_connections = self.server_adapter.keepalive_max_connections
 
         ssl_module = self.server_adapter.ssl_module or 'pyopenssl'
         if self.server_adapter.ssl_context:
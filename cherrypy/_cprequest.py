@@ -70,6 +70,10 @@ class Hook(object):
                               for k, v in self.kwargs.items()])))
 
 
+def _hook_priority(hook):
+    return hook.priority
+
+
 class HookMap(dict):
     """A map of call points to lists of callbacks (Hook objects)."""
 
@@ -90,7 +94,8 @@ class HookMap(dict):
         """Execute all registered Hooks (callbacks) for the given point."""
         exc = None
         hooks = self[point]
-        hooks.sort()
+        if len(hooks) > 1:
+            hooks.sort(key=_hook_priority)
         for hook in hooks:
             # Some hooks are guaranteed to run even if others at
             # the same hookpoint fail. We will still log the failure,
@@ -273,8 +278,33 @@ class Request(object):
     values (decoded according to :rfc:`2047` if necessary). See also:
     httputil.HeaderMap, httputil.HeaderElement."""
 
-    cookie = SimpleCookie()
-    """See help(Cookie)."""
+    _cookie = SimpleCookie()
+    _cookie_pending = False
+
+    def _get_cookie(self):
+        if self._cookie_pending:
+            # Handle cookies differently because on Konqueror, multiple
+            # cookies come on different lines with the same key
+            for name, value in self.header_list:
+                if name.title() == 'Cookie':
+                    try:
+                        self._cookie.load(value.strip())
+                    except CookieError:
+                        msg = "Illegal cookie name %s" % value.split('=')[0]
+                        raise cherrypy.HTTPError(400, msg)
+            # Only clear this once parsing succeeds, so that an illegal
+            # cookie raises every time it is read.
+            self._cookie_pending = False
+        return self._cookie
+
+    def _set_cookie(self, value):
+        self._cookie = value
+        self._cookie_pending = False
+
+    cookie = property(_get_cookie, _set_cookie, doc="""
+    The request cookies, as a SimpleCookie (see help(Cookie)). These are
+    only parsed from the header_list when this is first used; an illegal
+    cookie raises HTTPError(400) then.""")
 
     rfile = None
     """
@@ -368,13 +398,20 @@ class Request(object):
 
     config = None
     """
-    A flat dict of all configuration entries which apply to the
+    A mapping of all configuration entries which apply to the
     current request. These entries are collected from global config,
     application config (based on request.path_info), and from handler
     config (exactly how is governed by the request.dispatch object in
     effect for this request; by default, handler config can be attached
     anywhere in the tree between request.app.root and the final handler,
-    and inherits downward)."""
+    and inherits downward).
+
+    The builtin dispatchers set this to a :class:`ConfigView
+    <cherrypy._cpconfig.ConfigView>`, which looks the entries up in the
+    config dicts they come from rather than copying them all. It has the
+    full dict API (and changes to it only affect the current request),
+    but it is not a dict subclass; call request.config.copy() if you
+    need a flat dict."""
 
     is_index = None
     """
@@ -453,6 +490,16 @@ class Request(object):
     A string containing the stage reached in the request-handling process.
     This is useful when debugging a live server with hung requests."""
 
+    recycled = False
+    """True if this Request is being reused (see recycle); its containers
+    (error_page, namespaces, params, headers, cookie, hooks and toolmaps)
+    were emptied then, and are filled again rather than made anew."""
+
+    recyclable = True
+    """If False, this Request will not be reused, even if its Application
+    has a pool_size (for example, because the next request refers to it
+    as request.prev; see InternalRedirect)."""
+
     namespaces = _cpconfig.NamespaceSet(
         **{"hooks": hooks_namespace,
            "request": request_namespace,
@@ -476,14 +523,44 @@ class Request(object):
 
         self.closed = False
 
-        # Put a *copy* of the class error_page into self.
-        self.error_page = self.error_page.copy()
+        if self.recycled:
+            self.error_page.update(self.__class__.error_page)
+            self.namespaces.update(self.__class__.namespaces)
+        else:
+            # Put a *copy* of the class error_page into self.
+            self.error_page = self.error_page.copy()
 
-        # Put a *copy* of the class namespaces into self.
-        self.namespaces = self.namespaces.copy()
+            # Put a *copy* of the class namespaces into self.
+            self.namespaces = self.namespaces.copy()
 
         self.stage = None
 
+    def recycle(self):
+        """Drop everything this Request refers to, so that it may be reused.
+
+        Every attribute set on this instance is removed, so that the class
+        defaults show through again; except that its containers are
+        emptied and kept, to be filled again by __init__, run and respond.
+        Application.release_serving calls this if it has a pool_size.
+        """
+        d = self.__dict__
+        names = ('error_page', 'namespaces', 'params', 'headers', '_cookie',
+                 'hooks', 'toolmaps')
+        kept = {}
+        for name in names:
+            if name in d:
+                kept[name] = d[name]
+        d.clear()
+        if len(kept) == len(names):
+            for name, container in kept.items():
+                if name == 'hooks':
+                    for callbacks in container.values():
+                        del callbacks[:]
+                else:
+                    container.clear()
+            d.update(kept)
+            self.recycled = True
+
     def close(self):
         """Run cleanup code. (Core)"""
         if not self.closed:
@@ -532,7 +609,8 @@ class Request(object):
             self.method = method
             path = path or "/"
             self.query_string = query_string or ''
-            self.params = {}
+            if not self.recycled:
+                self.params = {}
 
             # Compare request and server HTTP protocol versions, in case our
             # server does not support the requested protocol. Limit our output
@@ -557,13 +635,16 @@ class Request(object):
                 url += '?' + query_string
             self.request_line = '%s %s %s' % (method, url, req_protocol)
 
-            self.header_list = list(headers)
-            self.headers = httputil.HeaderMap()
+            if not isinstance(headers, list):
+                headers = list(headers)
+            self.header_list = headers
+            if not self.recycled:
+                self.headers = httputil.HeaderMap()
+                self._cookie = SimpleCookie()
+            self._cookie_pending = True
 
             self.rfile = rfile
             self.body = None
-
-            self.cookie = SimpleCookie()
             self.handler = None
 
             # path_info should be the path from the
@@ -621,8 +702,12 @@ class Request(object):
                     self.process_headers()
 
                     # Make a copy of the class hooks
-                    self.hooks = self.__class__.hooks.copy()
-                    self.toolmaps = {}
+                    if self.recycled:
+                        for point, callbacks in self.__class__.hooks.items():
+                            self.hooks.setdefault(point, []).extend(callbacks)
+                    else:
+                        self.hooks = self.__class__.hooks.copy()
+                        self.toolmaps = {}
 
                     self.stage = 'get_resource'
                     self.get_resource(path_info)
@@ -630,7 +715,7 @@ class Request(object):
                     self.body = _cpreqbody.RequestBody(
                         self.rfile, self.headers, request_params=self.params)
 
-                    self.namespaces(self.config)
+                    self.apply_namespaces()
 
                     self.stage = 'on_start_resource'
                     self.hooks.run('on_start_resource')
@@ -675,6 +760,31 @@ class Request(object):
                 raise
             self.handle_error()
 
+    def apply_namespaces(self):
+        """Pass self.config to each namespace handler. (Core)
+
+        If the app's compile_namespaces is True, and self.config is an
+        untouched child of a shared view (see Application.config_view), the
+        namespaces are compiled for that view once, and the compiled result
+        applied on later requests. It is compiled again when
+        cherrypy.config.generation or the app's config_generation goes up;
+        changes made in place to _cp_config dicts or app.config sections
+        are not noticed until then.
+        """
+        config = self.config
+        view = getattr(config, 'parent', None)
+        if (view is None or config.local is not None
+            or not self.app.compile_namespaces):
+            self.namespaces(config)
+            return
+
+        generation = (cherrypy.config.generation, self.app.config_generation)
+        compiled = view.compiled_namespaces
+        if compiled is None or compiled[0] != generation:
+            compiled = (generation, self.namespaces.compile(config))
+            view.compiled_namespaces = compiled
+        self.namespaces.apply(compiled[1])
+
     def process_query_string(self):
         """Parse the query string into Python structures. (Core)"""
         try:
@@ -697,6 +807,7 @@ class Request(object):
     def process_headers(self):
         """Parse HTTP header data into Python structures. (Core)"""
         # Process the headers into self.headers
+        # (self.cookie is only parsed from self.header_list when it is used).
         headers = self.headers
         for name, value in self.header_list:
             # Call title() now (and use dict.__method__(headers))
@@ -712,15 +823,6 @@ class Request(object):
             else:
                 dict.__setitem__(headers, name, value)
 
-            # Handle cookies differently because on Konqueror, multiple
-            # cookies come on different lines with the same key
-            if name == 'Cookie':
-                try:
-                    self.cookie.load(value)
-                except CookieError:
-                    msg = "Illegal cookie name %s" % value.split('=')[0]
-                    raise cherrypy.HTTPError(400, msg)
-
         if not dict.__contains__(headers, 'Host'):
             # All Internet-based HTTP/1.1 servers MUST respond with a 400
             # (Bad Request) status code to any HTTP/1.1 request message
@@ -865,13 +967,19 @@ class Response(object):
     stream = False
     """If False, buffer the response body."""
 
+    recycled = False
+    """True if this Response is being reused (see recycle); its headers and
+    cookie were emptied then, and are filled again rather than made anew."""
+
     def __init__(self):
         self.status = None
         self.header_list = None
         self._body = []
         self.time = time.time()
 
-        self.headers = httputil.HeaderMap()
+        if not self.recycled:
+            self.headers = httputil.HeaderMap()
+            self.cookie = SimpleCookie()
         # Since we know all our keys are titled strings, we can
         # bypass HeaderMap.update and get a big speed boost.
         dict.update(self.headers, {
@@ -879,7 +987,21 @@ class Response(object):
             "Server": "CherryPy/" + cherrypy.__version__,
             "Date": httputil.HTTPDate(self.time),
         })
-        self.cookie = SimpleCookie()
+
+    def recycle(self):
+        """Drop everything this Response refers to, so that it may be reused.
+
+        As for Request.recycle, except that only the headers and cookie are
+        kept (emptied).
+        """
+        d = self.__dict__
+        headers, cookie = d.get('headers'), d.get('cookie')
+        d.clear()
+        if headers is not None and cookie is not None:
+            headers.clear()
+            cookie.clear()
+            self.headers, self.cookie = headers, cookie
+            self.recycled = True
 
     def collapse_body(self):
         """Collapse self.body to a single string; replace it and return it."""
@@ -1,5 +1,6 @@
 """Manage HTTP servers with CherryPy."""
 
+import sys
 import warnings
 
 import cherrypy
@@ -57,6 +58,29 @@ class Server(ServerAdapter):
     socket_timeout = 10
     """The timeout in seconds for accepted connections (default 10)."""
 
+    socket_accept_batch = 1
+    """The maximum number of connections to accept each time the listening
+    socket wakes up (default 1). Higher values help with bursts of new
+    connections."""
+
+    socket_defer_accept = 0
+    """If positive, the number of seconds for the TCP_DEFER_ACCEPT socket
+    option (Linux only), which holds connections back from accept() until
+    the client has sent some data. The default of 0 leaves it unset."""
+
+    keepalive_timeout = None
+    """The time in seconds for which a keep-alive connection may sit idle
+    between requests. The default of None means socket_timeout applies."""
+
+    keepalive_max_requests = 0
+    """The maximum number of requests to answer on one connection (default 0,
+    meaning no limit)."""
+
+    keepalive_max_connections = 0
+    """The maximum number of idle keep-alive connections to hold open. Beyond
+    it, those which have been idle longest are closed. The default of 0
+    means no limit."""
+
     shutdown_timeout = 5
     """The time to wait for HTTP worker threads to clean up."""
 
@@ -71,6 +95,40 @@ class Server(ServerAdapter):
     thread_pool_max = -1
     """The maximum size of the worker-thread pool. Use -1 to indicate no limit."""
 
+    thread_pool_autoscale_interval = 0
+    """How often, in seconds, to grow or shrink the worker-thread pool
+    (between thread_pool and thread_pool_max) based on the number of queued
+    connections and idle threads. The default of 0 disables autoscaling.
+    Autoscaling requires a positive thread_pool_max."""
+
+    thread_pool_idle_period = 30
+    """How long, in seconds, surplus worker threads must stay idle before
+    an autoscaling pool shuts them down."""
+
+    def _get_workers(self):
+        preforker = getattr(self.bus, 'preforker', None)
+        return getattr(preforker, 'workers', 0)
+    def _set_workers(self, value):
+        self.bus.preforker.workers = value
+    workers = property(_get_workers, _set_workers,
+        doc="""The number of processes to serve from (default 0, meaning
+        this process only). If positive, the engine's Preforker forks that
+        many workers, which share this server's port via SO_REUSEPORT.""")
+
+    thread_pool_max_queue = 0
+    """The maximum number of accepted connections which may wait for a
+    worker thread. Beyond it, new connections get an immediate
+    "503 Service Unavailable". The default of 0 means no limit."""
+
+    thread_pool_max_wait = 0
+    """The maximum time, in seconds, which accepted connections may wait for
+    a worker thread. While the oldest one has waited longer, new connections
+    get an immediate "503 Service Unavailable". The default of 0 means no
+    limit."""
+
+    retry_after = 1
+    """The Retry-After value, in seconds, sent with those 503 responses."""
+
     max_request_header_size = 500 * 1024
     """The maximum number of bytes allowable in the request headers. If exceeded,
     the HTTP server should return "413 Request Entity Too Large"."""
@@ -79,6 +137,12 @@ class Server(ServerAdapter):
     """The maximum number of bytes allowable in the request body. If exceeded,
     the HTTP server should return "413 Request Entity Too Large"."""
 
+    asyncio = False
+    """If True (Python 3.5+ only), wait on clients with an asyncio event loop
+    (see wsgiserver.aioserver), so that idle and slow connections don't
+    each occupy a thread; worker threads (thread_pool) only answer requests
+    which have fully arrived. asyncio is only imported if this is set."""
+
     instance = None
     """If not None, this should be an HTTP server instance (such as
     CPWSGIServer) which cherrypy.server will control. Use this when you need
@@ -98,6 +162,11 @@ class Server(ServerAdapter):
     ssl_private_key = None
     """The filename of the private key to use with SSL."""
 
+    ssl_handshake_timeout = 10
+    """The timeout in seconds for the TLS handshake on each new connection
+    (default 10). The handshake is done in a worker thread, not the thread
+    which accepts connections."""
+
     if py3k:
         ssl_module = 'builtin'
         """The name of a registered SSL adaptation module to use with the builtin
@@ -137,8 +206,14 @@ class Server(ServerAdapter):
         if httpserver is None:
             httpserver = self.instance
         if httpserver is None:
-            from cherrypy import _cpwsgi_server
-            httpserver = _cpwsgi_server.CPWSGIServer(self)
+            if self.asyncio:
+                if sys.version_info < (3, 5):
+                    raise ValueError("server.asyncio requires Python 3.5+.")
+                from cherrypy._cpaio_server import CPAsyncioWSGIServer
+                httpserver = CPAsyncioWSGIServer(self)
+            else:
+                from cherrypy import _cpwsgi_server
+                httpserver = _cpwsgi_server.CPWSGIServer(self)
         if isinstance(httpserver, basestring):
             # Is anyone using this? Can I add an arg?
             httpserver = attributes(httpserver)(self)
@@ -17,6 +17,10 @@ may only offer one if they choose):
     CherryPy config
         If a tool exposes a "_setup" callable, it will be called
         once per Request (if the feature is "turned on" via config).
+        If the tool's class is in Toolbox.compilable_types, its _setup
+        promises to do nothing but attach hooks which depend only on the
+        tool's config; it is then called once per distinct config, and
+        the hooks it attached are reused.
 
 Tools may be implemented as any object with a namespace. The builtins
 are generally either modules or instances of the tools.Tool class.
@@ -417,8 +421,21 @@ class Toolbox(object):
     Custom toolboxes should be added to each Application's toolboxes dict.
     """
 
+    compilable_types = set([Tool, HandlerTool, HandlerWrapperTool,
+                            SessionTool, SessionAuthTool, CachingTool])
+    """The Tool classes whose _setup does nothing but attach hooks which
+    depend only on the tool's config, so that the hooks it attached for a
+    given config may be reused. Subclasses are not included (since they
+    may override _setup, or what it calls); add them here if they qualify."""
+
+    compiled_size = 1000
+    """The maximum number of (tool, config) combinations for which the hooks
+    attached by a compilable tool's _setup are remembered. The cache is
+    emptied when it fills up."""
+
     def __init__(self, namespace):
         self.namespace = namespace
+        self._compiled = {}
 
     def __setattr__(self, name, value):
         # If the Tool._name is None, supply it from the attribute name.
@@ -444,7 +461,91 @@ class Toolbox(object):
             for name, settings in map.items():
                 if settings.get("on", False):
                     tool = getattr(self, name)
+                    if type(tool) in self.compilable_types:
+                        self._attach_compiled(tool, settings)
+                    else:
+                        tool._setup()
+
+    def _attach_compiled(self, tool, settings):
+        """Attach the hooks which tool._setup() attaches for these settings,
+        calling it only if we haven't seen them before."""
+        compiled = self._compiled_hooks(tool, settings)
+        if compiled is None:
+            tool._setup()
+            return
+
+        hooks = cherrypy.serving.request.hooks
+        for point, hs in compiled:
+            hooks[point].extend(hs)
+
+    def _compiled_hooks(self, tool, settings):
+        """Return [(point, hooks)] for the hooks which tool._setup() attaches
+        for these settings (or None if they can't be remembered)."""
+        try:
+            key = (tool, frozenset(settings.items()))
+            compiled = self._compiled.get(key)
+        except TypeError:
+            # Unhashable config values; don't remember them.
+            return None
+
+        if compiled is None:
+            compiled = self._record(tool)
+            if len(self._compiled) >= self.compiled_size:
+                self._compiled.clear()
+            self._compiled[key] = compiled
+        return compiled
+
+    def _record(self, tool):
+        """Return [(point, hooks)] for the hooks which tool._setup() attaches
+        (to a fresh HookMap, not to request.hooks)."""
+        request = cherrypy.serving.request
+        hooks = request.hooks
+        request.hooks = hooks.__class__(hooks.keys())
+        try:
+            tool._setup()
+            return [(point, hs) for point, hs in request.hooks.items() if hs]
+        finally:
+            request.hooks = hooks
+
+    def compile_config(self, entries):
+        """Return our toolmap, and the tools it turns on, for the given
+        (key, value) config entries (see NamespaceSet.compile)."""
+        map = {}
+        for k, v in entries:
+            toolname, arg = k.split(".", 1)
+            bucket = map.setdefault(toolname, {})
+            bucket[arg] = v
+
+        on = []
+        for name, settings in map.items():
+            if settings.get("on", False):
+                # The hooks are filled in by apply_compiled.
+                on.append([getattr(self, name), settings, None])
+        return map, on
+
+    def apply_compiled(self, compiled):
+        """Do what __enter__ and __exit__ would, from compile_config.
+
+        The toolmap is shared by every request this is applied to, so don't
+        modify request.toolmaps[namespace] in place. The hooks that each
+        compilable Tool attaches are looked up the first time, and attached
+        again (without calling _setup) thereafter.
+        """
+        map, on = compiled
+        request = cherrypy.serving.request
+        request.toolmaps[self.namespace] = map
+        for entry in on:
+            tool, settings, recorded = entry
+            if recorded is None:
+                if type(tool) in self.compilable_types:
+                    recorded = self._compiled_hooks(tool, settings)
+                if recorded is None:
                     tool._setup()
+                    continue
+                entry[2] = recorded
+            hooks = request.hooks
+            for point, hs in recorded:
+                hooks[point].extend(hs)
 
 
 class DeprecatedTool(Tool):
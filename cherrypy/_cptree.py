@@ -2,6 +2,7 @@
 
 import os
 import sys
+import threading
 
 import cherrypy
 from cherrypy._cpcompat import ntou, py3k
@@ -44,9 +45,69 @@ class Application(object):
 
     relative_urls = False
 
+    dispatch_cache_size = 0
+    """The maximum number of path_info values for which the default
+    Dispatcher remembers what it found (page handler, virtual path, is_index
+    and config), so that later requests for them can skip walking the tree
+    and merging config. The cache is emptied when it fills up, when
+    config is merged into the app or changes globally, and when any app is
+    mounted. The default of 0 disables it.
+
+    Only turn this on if the objects in the tree don't change while the app
+    is running. Paths which pass through nodes with a _cp_dispatch method
+    or a __getattr__ hook are never cached."""
+
+    dispatch_cache = None
+    """A dict of {path_info: entry} pairs; see dispatch_cache_size."""
+
+    pool_size = 0
+    """The number of Request and Response pairs which each thread keeps,
+    once it's done with them, to reuse for its next request to this app
+    rather than making new ones (see Request.recycle). The default of 0
+    turns this off.
+
+    Only turn this on if nothing holds on to cherrypy.request or
+    cherrypy.response (or their headers, cookie, or params) once the
+    request is over; recycling empties them."""
+
+    pool = None
+    """A threading.local whose 'spares' attribute (if any) is the list of
+    Request and Response pairs kept by the current thread for reuse."""
+
+    config_views = None
+    """A dict of {section: ConfigView} pairs, one for each section in
+    self.config, layering the sections along its path from '/' down (see
+    find_config). They are rebuilt on merge, or when sections are added
+    to self.config directly; but a section should not be replaced
+    with a different dict once the app is running."""
+
+    compile_namespaces = False
+    """If True, the config namespaces (tools, hooks, response headers and so
+    on) are worked out once for each shared view of the config (see
+    Request.apply_namespaces), rather than again for every request. The
+    compiled views are only checked against cherrypy.config.generation and
+    config_generation, so only turn this on if _cp_config dicts and the
+    sections of self.config aren't changed in place while the app is
+    running (or if config_generation is bumped whenever they are). The
+    default is False."""
+
+    config_generation = 0
+    """A number which goes up whenever config is merged into this app. The
+    namespaces compiled for each request's config (see compile_namespaces)
+    are compiled again when it does. If you change a _cp_config dict, or a
+    section of self.config, in place while the app is running, add one to
+    it so the change is seen (or merge the change in instead)."""
+
+    shared_views_size = 1000
+    """The maximum number of ConfigViews which config_view keeps, to hand
+    out again for the same layers. They are thrown away when it fills up,
+    and on merge."""
+
     def __init__(self, root, script_name="", config=None):
         self.log = _cplogging.LogManager(id(self), cherrypy.log.logger_root)
         self.root = root
+        self.dispatch_cache = {}
+        self.pool = threading.local()
         self.script_name = script_name
         self.wsgiapp = _cpwsgi.CPWSGIApp(self)
 
@@ -55,8 +116,13 @@ class Application(object):
         self.namespaces["wsgi"] = self.wsgiapp.namespace_handler
 
         self.config = self.__class__.config.copy()
+        self.config_views = {}
+        self._shared_views = {}
+        self._staticdir_layers = {}
         if config:
             self.merge(config)
+        else:
+            self._build_config_views()
 
     def __repr__(self):
         return "%s.%s(%r, %r)" % (self.__module__, self.__class__.__name__,
@@ -92,18 +158,76 @@ class Application(object):
     def merge(self, config):
         """Merge the given config into self.config."""
         _cpconfig.merge(self.config, config)
+        self._build_config_views()
+        self._shared_views.clear()
+        self.config_generation += 1
+        if self.dispatch_cache:
+            self.dispatch_cache.clear()
 
         # Handle namespaces specified in config.
         self.namespaces(self.config.get("/", {}))
 
+    def _build_config_views(self):
+        views = {}
+        for section in self.config:
+            layers = []
+            trail = section
+            while trail:
+                if trail in self.config:
+                    layers.append(self.config[trail])
+                lastslash = trail.rfind("/")
+                if lastslash == -1:
+                    break
+                elif lastslash == 0 and trail != "/":
+                    trail = "/"
+                else:
+                    trail = trail[:lastslash]
+            layers.reverse()
+            views[section] = _cpconfig.ConfigView(layers)
+        self.config_views = views
+
+    def config_view(self, layers):
+        """Return a ConfigView of the given config dicts, in order.
+
+        Dispatchers call this for request.config (or rather, call child()
+        on what it returns), and get the same view back for the same
+        dicts, rather than a new one for each request. So anything worked
+        out from a view (see Request.apply_namespaces) may be reused.
+        """
+        # The view holds on to its layers, so their ids can't be reused
+        # while it's here.
+        key = tuple([id(layer) for layer in layers])
+        view = self._shared_views.get(key)
+        if view is None:
+            if len(self._shared_views) >= self.shared_views_size:
+                self._shared_views.clear()
+            view = self._shared_views[key] = _cpconfig.ConfigView(layers)
+        return view
+
+    def staticdir_layer(self, section):
+        """Return a config dict of {'tools.staticdir.section': section},
+        the same one each time for the same section."""
+        layer = self._staticdir_layers.get(section)
+        if layer is None:
+            layer = {'tools.staticdir.section': section}
+            if len(self._staticdir_layers) < self.shared_views_size:
+                self._staticdir_layers[section] = layer
+        return layer
+
     def find_config(self, path, key, default=None):
         """Return the most-specific value for key along path, or default."""
+        if len(self.config_views) != len(self.config):
+            # Sections were added to self.config directly, not merged.
+            self._build_config_views()
+
         trail = path or "/"
         while trail:
-            nodeconf = self.config.get(trail, {})
-
-            if key in nodeconf:
-                return nodeconf[key]
+            if trail in self.config:
+                view = self.config_views.get(trail)
+                if view is None:
+                    self._build_config_views()
+                    view = self.config_views[trail]
+                return view.get(key, default)
 
             lastslash = trail.rfind("/")
             if lastslash == -1:
@@ -116,14 +240,20 @@ class Application(object):
         return default
 
     def get_serving(self, local, remote, scheme, sproto):
-        """Create and return a Request and Response object."""
-        req = self.request_class(local, remote, scheme, sproto)
+        """Create (or reuse) and return a Request and Response object."""
+        spares = getattr(self.pool, 'spares', None)
+        if spares:
+            req, resp = spares.pop()
+            req.__init__(local, remote, scheme, sproto)
+            resp.__init__()
+        else:
+            req = self.request_class(local, remote, scheme, sproto)
+            resp = self.response_class()
         req.app = self
 
         for name, toolbox in self.toolboxes.items():
             req.namespaces[name] = toolbox
 
-        resp = self.response_class()
         cherrypy.serving.load(req, resp)
         cherrypy.engine.publish('acquire_thread')
         cherrypy.engine.publish('before_request')
@@ -133,6 +263,7 @@ class Application(object):
     def release_serving(self):
         """Release the current serving (request and response)."""
         req = cherrypy.serving.request
+        resp = cherrypy.serving.response
 
         cherrypy.engine.publish('after_request')
 
@@ -143,6 +274,17 @@ class Application(object):
 
         cherrypy.serving.clear()
 
+        if (self.pool_size and req.recyclable
+            and req.__class__ is self.request_class
+            and resp.__class__ is self.response_class):
+            spares = getattr(self.pool, 'spares', None)
+            if spares is None:
+                spares = self.pool.spares = []
+            if len(spares) < self.pool_size:
+                req.recycle()
+                resp.recycle()
+                spares.append((req, resp))
+
     def __call__(self, environ, start_response):
         return self.wsgiapp(environ, start_response)
 
@@ -219,6 +361,12 @@ class Tree(object):
 
         self.apps[script_name] = app
 
+        # Paths may now resolve differently; drop any cached dispatch.
+        for other in self.apps.values():
+            cache = getattr(other, 'dispatch_cache', None)
+            if cache:
+                cache.clear()
+
         return app
 
     def graft(self, wsgi_callable, script_name=""):
@@ -12,7 +12,7 @@ import sys as _sys
 import cherrypy as _cherrypy
 from cherrypy._cpcompat import BytesIO, bytestr, ntob, ntou, py3k, unicodestr
 from cherrypy import _cperror
-from cherrypy.lib import httputil
+from cherrypy.lib import httputil, file_generator, file_generator_limited
 
 
 def downgrade_wsgi_ux_to_1x(environ):
@@ -133,7 +133,13 @@ class ExceptionTrapper(object):
         self.throws = throws
 
     def __call__(self, environ, start_response):
-        return _TrappedResponse(self.nextapp, environ, start_response, self.throws)
+        r = _TrappedResponse(self.nextapp, environ, start_response, self.throws)
+        # Pass any wsgi.file_wrapper through untouched, so the server can
+        # recognize it and send the file by its own (faster) means.
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if isinstance(file_wrapper, type) and isinstance(r.response, file_wrapper):
+            return r.response
+        return r
 
 
 class _TrappedResponse(object):
@@ -209,9 +215,47 @@ class _TrappedResponse(object):
 #                           WSGI-to-CP Adapter                           #
 
 
+class _FileBody(object):
+    """A file response body to be handed to the server's wsgi.file_wrapper.
+
+    If end is given, reads stop at that offset in the file (for a Range
+    request; the server also stops at the Content-Length, however it sends
+    the file). Closing it closes both the file and the AppResponse which
+    produced it.
+    """
+
+    def __init__(self, fileobj, response, end=None):
+        self.fileobj = fileobj
+        self.response = response
+        self.end = end
+        if end is None:
+            self.read = fileobj.read
+        self.fileno = fileobj.fileno
+        if hasattr(fileobj, 'seek'):
+            self.seek = fileobj.seek
+            self.tell = fileobj.tell
+
+    def read(self, size=-1):
+        remaining = max(self.end - self.fileobj.tell(), 0)
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        return self.fileobj.read(size)
+
+    def close(self):
+        try:
+            self.fileobj.close()
+        finally:
+            self.response.close()
+
+
 class AppResponse(object):
     """WSGI response iterable for CherryPy applications."""
 
+    file_wrapper = None
+    """If the response body is a whole file, and the server provides
+    wsgi.file_wrapper, the wrapped file (which should be returned to the
+    server instead of this object). None otherwise."""
+
     def __init__(self, environ, start_response, cpapp):
         self.cpapp = cpapp
         try:
@@ -246,6 +290,18 @@ class AppResponse(object):
 
             self.iter_response = iter(r.body)
             self.write = start_response(outstatus, outheaders)
+
+            body = r.body
+            if type(body) in (file_generator, file_generator_limited):
+                file_wrapper = environ.get('wsgi.file_wrapper')
+                fileobj = body.input
+                if file_wrapper and hasattr(fileobj, 'fileno'):
+                    end = None
+                    if type(body) is file_generator_limited:
+                        # A single Range, from where the file is now.
+                        end = fileobj.tell() + body.remaining
+                    self.file_wrapper = file_wrapper(
+                        _FileBody(fileobj, self, end), body.chunkSize)
         except:
             self.close()
             raise
@@ -376,7 +432,8 @@ class CPWSGIApp(object):
         You probably shouldn't call this; call self.__call__ instead,
         so that any WSGI middleware in self.pipeline can run first.
         """
-        return self.response_class(environ, start_response, self.cpapp)
+        response = self.response_class(environ, start_response, self.cpapp)
+        return getattr(response, 'file_wrapper', None) or response
 
     def __call__(self, environ, start_response):
         head = self.head
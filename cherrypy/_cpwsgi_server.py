@@ -37,6 +37,18 @@ class CPWSGIServer(wsgiserver.CherryPyWSGIServer):
                    )
         self.protocol = self.server_adapter.protocol_version
         self.nodelay = self.server_adapter.nodelay
+        self.autoscale_interval = self.server_adapter.thread_pool_autoscale_interval
+        self.autoscale_idle_period = self.server_adapter.thread_pool_idle_period
+        self.max_queue_size = self.server_adapter.thread_pool_max_queue
+        self.max_queue_wait = self.server_adapter.thread_pool_max_wait
+        self.retry_after = self.server_adapter.retry_after
+        self.reuse_port = self.server_adapter.workers > 0
+        self.accept_batch = self.server_adapter.socket_accept_batch
+        self.defer_accept = self.server_adapter.socket_defer_accept
+        self.ssl_handshake_timeout = self.server_adapter.ssl_handshake_timeout
+        self.keepalive_timeout = self.server_adapter.keepalive_timeout
+        self.keepalive_max_requests = self.server_adapter.keepalive_max_requests
+        self.keepalive_max_connections = self.server_adapter.keepalive_max_connections
 
         if sys.version_info >= (3, 0):
             ssl_module = self.server_adapter.ssl_module or 'builtin'
@@ -23,18 +23,32 @@ class file_generator(object):
             raise StopIteration()
     next = __next__
 
-def file_generator_limited(fileobj, count, chunk_size=65536):
+class file_generator_limited(object):
     """Yield the given file object in chunks, stopping after `count`
     bytes has been emitted.  Default chunk size is 64kB. (Core)
+
+    Unlike file_generator, the file is not closed when the limit is reached,
+    since callers may go on to read further ranges from it.
     """
-    remaining = count
-    while remaining > 0:
-        chunk = fileobj.read(min(chunk_size, remaining))
-        chunklen = len(chunk)
-        if chunklen == 0:
-            return
-        remaining -= chunklen
-        yield chunk
+
+    def __init__(self, fileobj, count, chunk_size=65536):
+        self.input = fileobj
+        self.chunkSize = chunk_size
+        self.remaining = count
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.remaining <= 0:
+            raise StopIteration()
+        chunk = self.input.read(min(self.chunkSize, self.remaining))
+        if not chunk:
+            self.remaining = 0
+            raise StopIteration()
+        self.remaining -= len(chunk)
+        return chunk
+    next = __next__
 
 def set_vary_header(response, header_name):
     "Add a Vary header to a response"
@@ -399,7 +399,9 @@ def tee_output():
 
         # save the cache data
         body = ntob('').join(output)
-        cherrypy._cache.put((response.status, response.headers or {},
+        # Store a copy of the headers: the response may be reused
+        # (see Application.pool_size) once this request is over.
+        cherrypy._cache.put((response.status, dict(response.headers),
                              body, response.time), len(body))
 
     response = cherrypy.serving.response
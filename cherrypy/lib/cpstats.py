@@ -371,6 +371,7 @@ cherrypy.tools.cpstats = StatsTool()
 
 # ---------------------- CherryPy Statistics Reporting ---------------------- #
 
+from cgi import escape
 import os
 thisdir = os.path.abspath(os.path.dirname(__file__))
 
@@ -447,6 +448,14 @@ class StatsPage(object):
             'Connections/second': '%.3f',
             'Start time': iso_format,
         },
+        'CherryPy Watchdog': {
+            'Enabled': pause_resume('CherryPy Watchdog'),
+            'Samples': {
+                'Elapsed': '%.3f',
+                'Start Time': iso_format,
+                'Stack': lambda v: '<pre>%s</pre>' % escape(v),
+                },
+        },
     }
 
 
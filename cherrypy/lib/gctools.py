@@ -146,10 +146,12 @@ class GCRoot(object):
     def stats(self):
         output = ["Statistics:"]
 
-        for trial in range(10):
-            if request_counter.count > 0:
+        # This request is counted too; wait for any others to finish, as
+        # their worker threads may not have let go of them yet.
+        for trial in range(50):
+            if request_counter.count <= 1:
                 break
-            time.sleep(0.5)
+            time.sleep(0.1)
         else:
             output.append("\nNot all requests closed properly.")
 
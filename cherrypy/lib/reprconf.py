@@ -65,6 +65,10 @@ class NamespaceSet(dict):
     Python 2.5-style 'context managers', in which case their __enter__
     method should return a callable to be used as the handler.
     See cherrypy.tools (the Toolbox class) for an example.
+    
+    If the same config is applied over and over, call compile() once and
+    apply() each time instead; handlers with compile_config and
+    apply_compiled methods may then do part of their work only once.
     """
     
     def __call__(self, config):
@@ -78,44 +82,65 @@ class NamespaceSet(dict):
         namespace handler. For example, a config entry of {'tools.gzip.on': v}
         will call the 'tools' namespace handler with the args: ('gzip.on', v)
         """
-        # Separate the given config into namespaces
+        ns_confs = self._split(config)
+        for ns, handler in self.items():
+            _handle(handler, ns_confs.get(ns, {}).items())
+    
+    def _split(self, config):
+        """Separate the given config into a dict of {namespace: entries}.
+        
+        A config with layers (such as a ConfigView) is read a layer at a
+        time, keeping only the namespaces in self, rather than merged.
+        """
         ns_confs = {}
-        for k in config:
-            if "." in k:
-                ns, name = k.split(".", 1)
-                bucket = ns_confs.setdefault(ns, {})
-                bucket[name] = config[k]
+        layers = getattr(config, "layers", None)
+        if layers is None:
+            for k, v in config.items():
+                if "." in k:
+                    ns, name = k.split(".", 1)
+                    bucket = ns_confs.setdefault(ns, {})
+                    bucket[name] = v
+            return ns_confs
+        
+        for layer in layers:
+            for k, v in layer.items():
+                if "." in k:
+                    ns, name = k.split(".", 1)
+                    if ns in self:
+                        bucket = ns_confs.setdefault(ns, {})
+                        bucket[name] = v
+        return ns_confs
+    
+    def compile(self, config):
+        """Return a list of (handler, entries) pairs to pass to apply().
         
-        # I chose __enter__ and __exit__ so someday this could be
-        # rewritten using Python 2.5's 'with' statement:
-        # for ns, handler in self.iteritems():
-        #     with handler as callable:
-        #         for k, v in ns_confs.get(ns, {}).iteritems():
-        #             callable(k, v)
+        The entries for each namespace handler are a list of (key, value)
+        pairs from config (with the namespace removed); or, if the handler
+        has a compile_config method, whatever that returns for them.
+        """
+        ns_confs = self._split(config)
+        compiled = []
         for ns, handler in self.items():
-            exit = getattr(handler, "__exit__", None)
-            if exit:
-                callable = handler.__enter__()
-                no_exc = True
-                try:
-                    try:
-                        for k, v in ns_confs.get(ns, {}).items():
-                            callable(k, v)
-                    except:
-                        # The exceptional case is handled here
-                        no_exc = False
-                        if exit is None:
-                            raise
-                        if not exit(*sys.exc_info()):
-                            raise
-                        # The exception is swallowed if exit() returns true
-                finally:
-                    # The normal and non-local-goto cases are handled here
-                    if no_exc and exit:
-                        exit(None, None, None)
+            entries = list(ns_confs.get(ns, {}).items())
+            compile = getattr(handler, "compile_config", None)
+            if compile is not None:
+                entries = compile(entries)
+            compiled.append((handler, entries))
+        return compiled
+    
+    def apply(self, compiled):
+        """Pass the entries from compile() to each namespace handler.
+        
+        This has the same effect as calling self with the compiled config.
+        Handlers with an apply_compiled method are passed all their
+        compiled entries at once.
+        """
+        for handler, entries in compiled:
+            apply = getattr(handler, "apply_compiled", None)
+            if apply is not None:
+                apply(entries)
             else:
-                for k, v in ns_confs.get(ns, {}).items():
-                    handler(k, v)
+                _handle(handler, entries)
     
     def __repr__(self):
         return "%s.%s(%s)" % (self.__module__, self.__class__.__name__,
@@ -128,6 +153,38 @@ class NamespaceSet(dict):
     copy = __copy__
 
 
+def _handle(handler, entries):
+    """Pass each (key, value) in entries to the given namespace handler."""
+    # I chose __enter__ and __exit__ so someday this could be
+    # rewritten using Python 2.5's 'with' statement:
+    # with handler as callable:
+    #     for k, v in entries:
+    #         callable(k, v)
+    exit = getattr(handler, "__exit__", None)
+    if exit:
+        callable = handler.__enter__()
+        no_exc = True
+        try:
+            try:
+                for k, v in entries:
+                    callable(k, v)
+            except:
+                # The exceptional case is handled here
+                no_exc = False
+                if exit is None:
+                    raise
+                if not exit(*sys.exc_info()):
+                    raise
+                # The exception is swallowed if exit() returns true
+        finally:
+            # The normal and non-local-goto cases are handled here
+            if no_exc and exit:
+                exit(None, None, None)
+    else:
+        for k, v in entries:
+            handler(k, v)
+
+
 class Config(dict):
     """A dict-like set of configuration data, with defaults and namespaces.
     
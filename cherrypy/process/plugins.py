@@ -1,14 +1,18 @@
 """Site services for use with a Web Site Process Bus."""
 
+import logging
 import os
 import re
 import signal as _signal
 import sys
 import time
 import threading
+import traceback
 
 from cherrypy._cpcompat import basestring, get_daemon, get_thread_ident, ntob, set, Timer, SetDaemonProperty
 
+if not hasattr(logging, 'statistics'): logging.statistics = {}
+
 # _module__file__base is used by Autoreload to make
 # absolute any filenames retrieved from sys.modules which are not
 # already absolute paths.  This is to work around Python's quirk
@@ -326,6 +330,7 @@ class Daemonizer(SimplePlugin):
     def start(self):
         if self.finalized:
             self.bus.log('Already deamonized.')
+            return
 
         # forking has issues with threads:
         # http://www.opengroup.org/onlinepubs/000095399/functions/fork.html
@@ -400,6 +405,7 @@ class PIDFile(SimplePlugin):
         SimplePlugin.__init__(self, bus)
         self.pidfile = pidfile
         self.finalized = False
+        self.pid = None
 
     def start(self):
         pid = os.getpid()
@@ -409,9 +415,13 @@ class PIDFile(SimplePlugin):
             open(self.pidfile, "wb").write(ntob("%s" % pid, 'utf8'))
             self.bus.log('PID %r written to %r.' % (pid, self.pidfile))
             self.finalized = True
+            self.pid = pid
     start.priority = 70
 
     def exit(self):
+        if self.pid is not None and self.pid != os.getpid():
+            # We're in a forked child (see Preforker); the file isn't ours.
+            return
         try:
             os.remove(self.pidfile)
             self.bus.log('PID file removed: %r.' % self.pidfile)
@@ -421,6 +431,166 @@ class PIDFile(SimplePlugin):
             pass
 
 
+class Preforker(SimplePlugin):
+    """Serve from several forked worker processes (POSIX only).
+
+    Use this with a Web Site Process Bus via::
+
+        Preforker(bus, workers=4).subscribe()
+
+    (or set ``server.workers`` in config for cherrypy.engine).
+
+    With workers > 0, this process becomes a master which does not serve
+    any requests itself: its ServerAdapters are withheld when the bus
+    starts. The workers are forked from the 'main' channel, which only
+    bus.block() publishes, so the main thread must call it after
+    bus.start() (as cherryd and quickstart do); without it, no workers
+    are started. Each worker stops and restarts its own bus from inside
+    that 'main' publish (threads don't survive fork), then carries on in
+    the same bus.block() loop. So it runs the HTTP servers and every other
+    plugin as usual; the servers must be able to share their port, e.g.
+    via SO_REUSEPORT. The master replaces any worker which dies, and
+    forwards 'graceful' and 'stop' to all workers (as SIGUSR1 and SIGTERM).
+
+    Note that workers bind their ports after DropPrivileges has run in
+    the master, so privileged ports are not available in this mode.
+    """
+
+    workers = 0
+    """The number of worker processes to run (0 disables preforking)."""
+
+    respawn_interval = 1
+    """The minimum time in seconds between replacing dead workers."""
+
+    shutdown_timeout = 10
+    """How long to wait for workers to stop before killing them."""
+
+    is_worker = False
+    """True in a forked worker process, False in the master."""
+
+    def __init__(self, bus, workers=0):
+        SimplePlugin.__init__(self, bus)
+        self.workers = workers
+        self.is_worker = False
+        self.pids = set()
+        self._servers = []
+        self._last_respawn = None
+
+    def _active(self):
+        return self.workers > 0 and not self.is_worker and hasattr(os, 'fork')
+
+    def start(self):
+        """Withhold the master's HTTP servers, so only workers serve."""
+        if not self._active():
+            return
+        from cherrypy.process.servers import ServerAdapter
+        for callback in list(self.bus.listeners['start']):
+            server = getattr(callback, '__self__', None)
+            if isinstance(server, ServerAdapter) and server not in self._servers:
+                server.unsubscribe()
+                self._servers.append(server)
+        self._last_respawn = None
+        self.bus.log('Serving from %d worker processes.' % self.workers)
+    start.priority = 10
+
+    def main(self):
+        """Reap dead workers and fork new ones as needed (master only)."""
+        if not self._active() or self.bus.state != self.bus.states.STARTED:
+            return
+
+        while self.pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except OSError:
+                break
+            if not pid:
+                break
+            if pid in self.pids:
+                self.pids.discard(pid)
+                self.bus.log('Worker process %d exited with status %d.'
+                             % (pid, status), level=30)
+
+        if len(self.pids) >= self.workers:
+            return
+        # Don't spin if workers die as soon as they start.
+        now = time.time()
+        if (self._last_respawn is not None and
+            now - self._last_respawn < self.respawn_interval):
+            return
+        self._last_respawn = now
+        while len(self.pids) < self.workers:
+            if not self._fork():
+                # We're a new worker now, with our own running bus.
+                return
+
+    def _fork(self):
+        """Fork a worker. Return True in the master, False in the worker."""
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid:
+            self.pids.add(pid)
+            self.bus.log('Forked worker process %d.' % pid)
+            return True
+
+        self.is_worker = True
+        self.pids = set()
+        for server in self._servers:
+            server.subscribe()
+        self._servers = []
+        # Threads don't survive fork(), so restart every plugin
+        # (and the servers withheld by the master) in this process.
+        self.bus.stop()
+        self.bus.start()
+        return False
+
+    def _signal_workers(self, signame):
+        signum = getattr(_signal, signame)
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signum)
+            except OSError:
+                self.pids.discard(pid)
+
+    def graceful(self):
+        """Ask every worker to reload."""
+        if self._active():
+            self._signal_workers('SIGUSR1')
+
+    def stop(self):
+        """Stop all workers (master), or refuse to re-exec (worker)."""
+        if self.is_worker:
+            # A worker which re-executed itself would become a second
+            # master. Just exit instead; the master will replace us.
+            self.bus.execv = False
+            return
+
+        if self.pids:
+            self.bus.log('Stopping %d worker processes.' % len(self.pids))
+            self._signal_workers('SIGTERM')
+            endtime = time.time() + self.shutdown_timeout
+            while self.pids:
+                for pid in list(self.pids):
+                    try:
+                        if os.waitpid(pid, os.WNOHANG)[0]:
+                            self.pids.discard(pid)
+                    except OSError:
+                        self.pids.discard(pid)
+                if not self.pids:
+                    break
+                if time.time() > endtime:
+                    self.bus.log('Killing %d worker processes.' %
+                                 len(self.pids), level=30)
+                    self._signal_workers('SIGKILL')
+                    endtime = time.time() + self.shutdown_timeout
+                time.sleep(0.1)
+
+        # Give the withheld servers back, in case we're started again.
+        for server in self._servers:
+            server.subscribe()
+        self._servers = []
+
+
 class PerpetualTimer(Timer):
     """A responsive subclass of threading.Timer whose run() method repeats.
 
@@ -633,6 +803,103 @@ class Autoreloader(Monitor):
                         return
 
 
+class Watchdog(Monitor):
+    """Monitor which records where slow work (such as a request) is stuck.
+
+    Threads call begin() as they start each piece of work, and end() when
+    they finish it. Every `frequency` seconds, the watchdog looks for work
+    which began more than `threshold` seconds ago, and samples the current
+    stack of each thread doing it (from sys._current_frames). A thread which
+    stays stuck is sampled again every `threshold` seconds.
+
+    Each sample is written to the log, and kept in `samples`, which is also
+    published in logging.statistics (see :mod:`cherrypy.lib.cpstats`) under
+    'CherryPy Watchdog' while the watchdog runs.
+    """
+
+    threshold = 10
+    """The time, in seconds, after which work is considered slow."""
+
+    max_samples = 50
+    """The number of samples to keep; the oldest are discarded first."""
+
+    samples = None
+    """The most recent samples, oldest first. Each is a dict with 'Thread',
+    'Work', 'Start Time', 'Elapsed' and 'Stack' entries."""
+
+    working = None
+    """A map of {thread ident: [start time, work, thread name, last sampled]}
+    for the work in progress."""
+
+    def __init__(self, bus, frequency=1, name=None):
+        self.working = {}
+        self.samples = []
+        self.stats = {
+            'Enabled': True,
+            'Threshold': lambda s: self.threshold,
+            'Slow Now': lambda s: len([r for r in list(self.working.values())
+                                       if time.time() - r[0] > self.threshold]),
+            'Samples Taken': 0,
+            'Samples': self.samples,
+            }
+        Monitor.__init__(self, bus, self.run, frequency, name)
+
+    def start(self):
+        logging.statistics['CherryPy Watchdog'] = self.stats
+        Monitor.start(self)
+    start.priority = 70
+
+    def begin(self, work=None):
+        """Note that the current thread has started on the given work."""
+        self.working[get_thread_ident()] = [
+            time.time(), work, threading.currentThread().getName(), None]
+
+    def end(self):
+        """Note that the current thread has finished its work."""
+        self.working.pop(get_thread_ident(), None)
+
+    def describe(self, work):
+        """Return a string describing the given work (for samples)."""
+        return str(work)
+
+    def run(self):
+        """Sample the stack of each thread whose work has taken too long."""
+        if not self.stats['Enabled']:
+            return
+        now = time.time()
+        frames = None
+        for ident, record in list(self.working.items()):
+            started, work, thread_name, sampled = record
+            if now - (sampled or started) < self.threshold:
+                continue
+            if frames is None:
+                frames = getattr(sys, '_current_frames', dict)()
+            frame = frames.get(ident)
+            if frame is None or self.working.get(ident) is not record:
+                # The work finished in the meantime.
+                continue
+            record[3] = now
+
+            sample = {
+                'Thread': thread_name,
+                'Work': self.describe(work),
+                'Start Time': started,
+                'Elapsed': now - started,
+                'Stack': ''.join(traceback.format_stack(frame)),
+                }
+            self.samples.append(sample)
+            excess = len(self.samples) - self.max_samples
+            if excess > 0:
+                del self.samples[:excess]
+            self.stats['Samples Taken'] += 1
+
+            self.bus.log("Slow work in thread %r after %.3f seconds: %s\n%s"
+                         % (thread_name, sample['Elapsed'], sample['Work'],
+                            sample['Stack'].rstrip()), level=30)
+        # Don't keep the frames (and everything they refer to) alive.
+        frames = frame = None
+
+
 class ThreadManager(SimplePlugin):
     """Manager for HTTP request threads.
 
@@ -164,7 +164,7 @@ class ServerAdapter(object):
             raise ValueError("No HTTP server has been created.")
 
         # Start the httpserver in a new thread.
-        if isinstance(self.bind_addr, tuple):
+        if isinstance(self.bind_addr, tuple) and not self._shares_port():
             wait_for_free_port(*self.bind_addr)
 
         import threading
@@ -202,6 +202,10 @@ class ServerAdapter(object):
             self.bus.exit()
             raise
 
+    def _shares_port(self):
+        """Return True if other processes may be listening on our port."""
+        return getattr(self.httpserver, 'reuse_port', False)
+
     def wait(self):
         """Wait until the HTTP server is ready to receive requests."""
         while not getattr(self.httpserver, "ready", False):
@@ -220,7 +224,7 @@ class ServerAdapter(object):
             # stop() MUST block until the server is *truly* stopped.
             self.httpserver.stop()
             # Wait for the socket to be truly freed.
-            if isinstance(self.bind_addr, tuple):
+            if isinstance(self.bind_addr, tuple) and not self._shares_port():
                 wait_for_free_port(*self.bind_addr)
             self.running = False
             self.bus.log("HTTP Server %s shut down" % self.httpserver)
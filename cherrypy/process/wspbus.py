@@ -177,15 +177,20 @@ class Bus(object):
             del self._priorities[(channel, callback)]
 
     def publish(self, channel, *args, **kwargs):
-        """Return output of all subscribers for the given channel."""
+        """Return output of all subscribers for the given channel.
+
+        Listeners which are unsubscribed by an earlier listener (that is,
+        while the channel is being published) are not called.
+        """
         if channel not in self.listeners:
             return []
 
         exc = ChannelFailures()
         output = []
 
+        listeners = self.listeners[channel]
         items = [(self._priorities[(channel, listener)], listener)
-                 for listener in self.listeners[channel]]
+                 for listener in listeners]
         try:
             items.sort(key=lambda item: item[0])
         except TypeError:
@@ -193,6 +198,8 @@ class Bus(object):
             # since it could sort dissimilar types just fine.
             items.sort()
         for priority, listener in items:
+            if listener not in listeners:
+                continue
             try:
                 output.append(listener(*args, **kwargs))
             except KeyboardInterrupt:
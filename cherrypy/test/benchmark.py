@@ -26,7 +26,9 @@ import os
 curdir = os.path.join(os.getcwd(), os.path.dirname(__file__))
 
 import re
+import socket
 import sys
+import threading
 import time
 import traceback
 
@@ -40,9 +42,9 @@ AB_PATH = ""
 APACHE_PATH = "apache"
 SCRIPT_NAME = "/cpbench/users/rdelon/apps/blog"
 
-__all__ = ['ABSession', 'Root', 'print_report',
-           'run_standard_benchmarks', 'safe_threads',
-           'size_report', 'startup', 'thread_report',
+__all__ = ['ABSession', 'Root', 'UploadSession', 'connection_report',
+           'print_report', 'run_standard_benchmarks', 'safe_threads',
+           'size_report', 'startup', 'thread_report', 'upload_report',
            ]
 
 size_cache = {}
@@ -77,6 +79,18 @@ class Root:
         return resp
     sizer.exposed = True
 
+    def upload(self):
+        # Read (and throw away) the request body a block at a time.
+        body = cherrypy.request.body
+        size = 0
+        while True:
+            data = body.read(65536)
+            if not data:
+                break
+            size += len(data)
+        return str(size)
+    upload.exposed = True
+
 
 cherrypy.config.update({
     'log.error.file': '',
@@ -199,10 +213,12 @@ Finished 1000 requests
                        ntob(r'^Transfer rate:\s*([0-9.]+)')),
                       ]
 
-    def __init__(self, path=SCRIPT_NAME + "/hello", requests=1000, concurrency=10):
+    def __init__(self, path=SCRIPT_NAME + "/hello", requests=1000, concurrency=10,
+                 keepalive=True):
         self.path = path
         self.requests = requests
         self.concurrency = concurrency
+        self.keepalive = keepalive
 
     def args(self):
         port = cherrypy.server.socket_port
@@ -210,8 +226,9 @@ Finished 1000 requests
         assert self.requests > 0
         # Don't use "localhost".
         # Cf http://mail.python.org/pipermail/python-win32/2008-March/007050.html
-        return ("-k -n %s -c %s http://127.0.0.1:%s%s" %
-                (self.requests, self.concurrency, port, self.path))
+        return ("%s-n %s -c %s http://127.0.0.1:%s%s" %
+                (self.keepalive and "-k " or "", self.requests,
+                 self.concurrency, port, self.path))
 
     def run(self):
         # Parse output of ab, setting attributes on self
@@ -230,6 +247,77 @@ Finished 1000 requests
                 setattr(self, attr, None)
 
 
+class UploadSession:
+    """A session of large chunked uploads, timed from the client side.
+
+    ab cannot send a chunked request body, so this speaks HTTP itself:
+    each of 'concurrency' client threads opens a connection and POSTs
+    'requests' bodies of 'size' bytes, in chunks of 'chunk_size' bytes.
+    """
+
+    def __init__(self, path=SCRIPT_NAME + "/upload", size=10 * 1024 * 1024,
+                 chunk_size=65536, requests=5, concurrency=4):
+        self.path = path
+        self.size = size
+        self.chunk_size = chunk_size
+        self.requests = requests
+        self.concurrency = concurrency
+
+    def _client(self, errors):
+        try:
+            port = cherrypy.server.socket_port
+            sock = socket.create_connection(("127.0.0.1", port))
+            rfile = sock.makefile("rb")
+            chunk = ntob("%x\r\n" % self.chunk_size) + (
+                ntob("X") * self.chunk_size) + ntob("\r\n")
+            tail = self.size % self.chunk_size
+            tail = ntob("%x\r\n" % tail) + ntob("X") * tail + ntob("\r\n")
+            for i in range(self.requests):
+                sock.sendall(ntob("POST %s HTTP/1.1\r\n"
+                                  "Host: 127.0.0.1\r\n"
+                                  "Content-Type: application/octet-stream\r\n"
+                                  "Transfer-Encoding: chunked\r\n\r\n"
+                                  % self.path))
+                for j in range(self.size // self.chunk_size):
+                    sock.sendall(chunk)
+                if self.size % self.chunk_size:
+                    sock.sendall(tail)
+                sock.sendall(ntob("0\r\n\r\n"))
+
+                status = rfile.readline()
+                length = 0
+                while True:
+                    line = rfile.readline()
+                    if line in (ntob("\r\n"), ntob("")):
+                        break
+                    name, value = line.split(ntob(":"), 1)
+                    if name.strip().lower() == ntob("content-length"):
+                        length = int(value)
+                body = rfile.read(length)
+                if (not status.split()[1:2] == [ntob("200")] or
+                        int(body) != self.size):
+                    errors.append((status, body))
+            rfile.close()
+            sock.close()
+        except Exception:
+            errors.append(_cperror.format_exc())
+
+    def run(self):
+        errors = []
+        threads = [threading.Thread(target=self._client, args=(errors,))
+                   for i in range(self.concurrency)]
+        start = time.time()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.elapsed = time.time() - start
+        self.failed_requests = len(errors)
+        total = self.size * self.requests * self.concurrency
+        self.megabytes_per_second = total / (1024.0 * 1024.0) / self.elapsed
+        self.requests_per_second = self.requests * self.concurrency / self.elapsed
+
+
 safe_threads = (25, 50, 100, 200, 400)
 if sys.platform in ("win32",):
     # For some reason, ab crashes with > 50 threads on my Win2k laptop.
@@ -271,6 +359,42 @@ def size_report(sizes=(10, 100, 1000, 10000, 100000, 100000000),
         sess.run()
         yield [sz] + [getattr(sess, attr) for attr in attrs]
 
+def connection_report(batches=(1, 16, 64), requests=5000, concurrency=100):
+    """Measure the connection rate (a new connection for every request)
+    at each of the given server.socket_accept_batch values."""
+    sess = ABSession(requests=requests, concurrency=concurrency,
+                     keepalive=False)
+    attrs, names, patterns = list(zip(*sess.parse_patterns))
+    yield ('batch',) + names
+    def restart(batch):
+        # The accept mode is fixed when the server starts; restart it.
+        cherrypy.server.stop()
+        cherrypy.server.httpserver = None
+        cherrypy.server.socket_accept_batch = batch
+        cherrypy.server.start()
+
+    old_batch = cherrypy.server.socket_accept_batch
+    try:
+        for batch in batches:
+            restart(batch)
+            sess.run()
+            yield [batch] + [getattr(sess, attr) for attr in attrs]
+    finally:
+        # Leave the server as we found it, for the reports which follow.
+        restart(old_batch)
+
+def upload_report(sizes=(1024 * 1024, 10 * 1024 * 1024, 100 * 1024 * 1024),
+                  chunk_size=65536, concurrency=4):
+    """Measure request body throughput for large chunked uploads."""
+    yield ('bytes', 'Failed', 'req/sec', 'MB/sec')
+    for sz in sizes:
+        sess = UploadSession(size=sz, chunk_size=chunk_size,
+                             requests=max(1, (100 * 1024 * 1024) // sz),
+                             concurrency=concurrency)
+        sess.run()
+        yield [sz, sess.failed_requests, "%.2f" % sess.requests_per_second,
+               "%.2f" % sess.megabytes_per_second]
+
 def print_report(rows):
     for row in rows:
         print("")
@@ -295,6 +419,16 @@ def run_standard_benchmarks():
            "%s server threads):" % cherrypy.server.thread_pool)
     print_report(size_report())
 
+    print("")
+    print("Connection Rate Report (5000 requests without keep-alive, "
+          "100 client threads, %s server threads):" % cherrypy.server.thread_pool)
+    print_report(connection_report())
+
+    print("")
+    print("Chunked Upload Report (64 KB chunks, 4 client threads, "
+          "%s server threads):" % cherrypy.server.thread_pool)
+    print_report(upload_report())
+
 
 #                         modpython and other WSGI                         #
 
@@ -0,0 +1,118 @@
+"""CherryPy Dispatcher Benchmark
+
+    Usage:
+        benchmark_dispatch.py [--lookups=N] [size ...]
+
+    Times how long each dispatcher takes to find the page handler (and
+    collect the config) for a request, in an app with 'size' routes of the
+    form /item<n>/<id>. The sizes default to 10, 1000 and 10000.
+
+    The dispatchers compared are the default Dispatcher (which walks
+    attributes of the root object), the TrieDispatcher and, if the Routes
+    package is installed, the RoutesDispatcher. No server is started.
+"""
+
+import getopt
+import sys
+import time
+
+import cherrypy
+from cherrypy import _cprequest
+from cherrypy.lib import httputil
+
+
+class Item(object):
+
+    def default(self, id):
+        return id
+    default.exposed = True
+
+    def show(self, id):
+        return id
+
+
+def object_tree(size):
+    root = type('Root', (object,), {})()
+    for n in range(size):
+        setattr(root, 'item%d' % n, Item())
+    return root, cherrypy.dispatch.Dispatcher()
+
+
+def trie(size):
+    d = cherrypy.dispatch.TrieDispatcher()
+    for n in range(size):
+        d.connect('item%d' % n, '/item%d/{id:int}' % n, Item(), 'show')
+    return None, d
+
+
+def routes(size):
+    d = cherrypy.dispatch.RoutesDispatcher()
+    for n in range(size):
+        d.connect('item%d' % n, '/item%d/:id' % n, Item(), action='show')
+    return None, d
+
+
+def time_lookups(make, size, lookups):
+    """Return the mean seconds per lookup with the given dispatcher."""
+    root, dispatcher = make(size)
+    app = cherrypy.Application(root, '', {'/': {'request.dispatch': dispatcher}})
+
+    request = _cprequest.Request(httputil.Host("127.0.0.1", 80),
+                                 httputil.Host("127.0.0.1", 1111))
+    request.app = app
+    request.method = "GET"
+    request.headers = httputil.HeaderMap()
+    cherrypy.serving.load(request, _cprequest.Response())
+    try:
+        paths = ['/item%d/%d' % (n, n) for n in
+                 (0, size // 3, size // 2, size - 1)]
+        start = time.time()
+        for i in range(lookups // len(paths)):
+            for path in paths:
+                request.params = {}
+                dispatcher(path)
+        elapsed = time.time() - start
+        if request.handler is None or isinstance(request.handler,
+                                                 cherrypy.HTTPError):
+            raise AssertionError("%s found no handler for %s"
+                                 % (make.__name__, path))
+        return elapsed / (len(paths) * (lookups // len(paths)))
+    finally:
+        cherrypy.serving.clear()
+
+
+def run(sizes, lookups):
+    makers = [object_tree, trie]
+    try:
+        import routes as _routes
+    except ImportError:
+        print("Routes is not installed; skipping the RoutesDispatcher.")
+    else:
+        makers.append(routes)
+
+    print("%8s %14s %14s %14s" % ("routes", "Dispatcher",
+                                  "TrieDispatcher", "Routes"))
+    for size in sizes:
+        row = []
+        for make in makers:
+            row.append("%11.1f us" % (time_lookups(make, size, lookups) * 1e6))
+        print("%8d %s" % (size, " ".join(row)))
+
+
+if __name__ == '__main__':
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "", ["lookups=", "help"])
+    except getopt.GetoptError:
+        print(__doc__)
+        sys.exit(2)
+
+    lookups = 10000
+    for o, a in opts:
+        if o == "--help":
+            print(__doc__)
+            sys.exit(0)
+        elif o == "--lookups":
+            lookups = int(a)
+
+    cherrypy.config.update({'log.screen': False})
+    run([int(x) for x in args] or [10, 1000, 10000], lookups)
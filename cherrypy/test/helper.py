@@ -198,6 +198,10 @@ def get_wsgi_u_supervisor(**options):
     cherrypy.server.wsgi_version = ('u', 0)
     return LocalWSGISupervisor(**options)
 
+def get_asyncio_supervisor(**options):
+    cherrypy.server.asyncio = True
+    return LocalWSGISupervisor(**options)
+
 
 class CPWebCase(webtest.WebCase):
 
@@ -206,6 +210,7 @@ class CPWebCase(webtest.WebCase):
 
     available_servers = {'wsgi': LocalWSGISupervisor,
                          'wsgi_u': get_wsgi_u_supervisor,
+                         'asyncio': get_asyncio_supervisor,
                          'native': NativeServerSupervisor,
                          'cpmodpy': get_cpmodpy_supervisor,
                          'modpygw': get_modpygw_supervisor,
@@ -0,0 +1,181 @@
+"""Tests for the asyncio HTTP server (Python 3.5+ only)."""
+
+import socket
+import sys
+import threading
+import time
+import unittest
+
+if sys.version_info >= (3, 5):
+    from http.client import HTTPConnection
+    from cherrypy.wsgiserver import aioserver
+else:
+    aioserver = None
+
+
+class AsyncioServerTests(unittest.TestCase):
+
+    # One worker thread, so that we can tell when a client holds it up.
+    numthreads = 1
+
+    def setUp(self):
+        if aioserver is None:
+            self.skipTest("The asyncio server needs Python 3.5 or later.")
+        self.entered = threading.Event()
+        self.released = threading.Event()
+        self.server = aioserver.AsyncioWSGIServer(
+            ('127.0.0.1', 0), self.app, numthreads=self.numthreads)
+        self.server.listen()
+        self.addr = self.server.socket.getsockname()
+        self.thread = threading.Thread(target=self.server.serve)
+        self.thread.start()
+        while not self.server.ready:
+            time.sleep(0.01)
+
+    def tearDown(self):
+        if hasattr(self, 'server'):
+            self.released.set()
+            self.server.stop()
+            self.thread.join()
+
+    def app(self, environ, start_response):
+        path = environ['PATH_INFO']
+        if path == '/echo':
+            body = environ['wsgi.input'].read(
+                int(environ.get('CONTENT_LENGTH') or 0))
+        elif path == '/stream':
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return (("chunk %d\n" % i).encode('ascii') for i in range(100))
+        elif path == '/slow':
+            self.entered.set()
+            self.released.wait(5)
+            body = b"Slow, world"
+        else:
+            body = b"Hello, world"
+        start_response('200 OK', [('Content-Type', 'text/plain'),
+                                  ('Content-Length', str(len(body)))])
+        return [body]
+
+    def connect(self):
+        conn = HTTPConnection(*self.addr, timeout=5)
+        self.addCleanup(conn.close)
+        return conn
+
+    def get(self, conn, path, method="GET", body=None):
+        conn.request(method, path, body)
+        response = conn.getresponse()
+        return response, response.read()
+
+    def test_keepalive(self):
+        conn = self.connect()
+        socks = set()
+        for trial in range(3):
+            response, body = self.get(conn, "/")
+            self.assertEqual(response.status, 200)
+            self.assertEqual(body, b"Hello, world")
+            socks.add(conn.sock)
+        # All three requests went over the same connection, which now
+        # waits on the event loop rather than in a worker thread.
+        self.assertEqual(len(socks), 1)
+        endtime = time.time() + 5
+        while not self.server.connections.idle and time.time() < endtime:
+            time.sleep(0.01)
+        self.assertEqual(self.server.connections.idle, 1)
+        self.assertEqual(self.server.requests.idle, 1)
+
+    def test_slow_headers(self):
+        # A client which sends its head slowly holds up no worker thread...
+        slow = socket.create_connection(self.addr)
+        self.addCleanup(slow.close)
+        slow.sendall(b"GET / HTTP/1.1\r\n")
+        time.sleep(0.1)
+        slow.sendall(b"Host: a\r\n")
+
+        start = time.time()
+        response, body = self.get(self.connect(), "/")
+        self.assertEqual(response.status, 200)
+        self.assertTrue(time.time() - start < 1)
+
+        # ...and is answered once the head is complete.
+        time.sleep(0.1)
+        slow.sendall(b"\r\n")
+        slow.settimeout(5)
+        data = b""
+        while not data.endswith(b"Hello, world"):
+            chunk = slow.recv(8192)
+            if not chunk:
+                break
+            data += chunk
+        self.assertTrue(data.startswith(b"HTTP/1.1 200 OK\r\n"))
+        self.assertTrue(data.endswith(b"Hello, world"))
+
+    def test_request_body(self):
+        conn = self.connect()
+        payload = bytes(bytearray(range(256))) * 1024
+        response, body = self.get(conn, "/echo", "POST", payload)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, payload)
+        # The connection can still be used.
+        response, body = self.get(conn, "/")
+        self.assertEqual(body, b"Hello, world")
+
+    def test_streaming(self):
+        conn = self.connect()
+        response, body = self.get(conn, "/stream")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Transfer-Encoding"), "chunked")
+        self.assertEqual(body, b"".join([("chunk %d\n" % i).encode('ascii')
+                                         for i in range(100)]))
+
+    def test_shed(self):
+        self.server.max_queue_size = 1
+        busy = self.connect()
+        busy.request("GET", "/slow")
+        self.assertTrue(self.entered.wait(5))
+        queued = self.connect()
+        queued.request("GET", "/slow")
+        while self.server.requests.qsize < 1:
+            time.sleep(0.01)
+
+        response, body = self.get(self.connect(), "/")
+        self.assertEqual(response.status, 503)
+        self.assertEqual(response.getheader("Connection"), "close")
+        self.assertTrue(b"too busy" in body)
+
+        self.released.set()
+        for conn in (busy, queued):
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.read(), b"Slow, world")
+
+    def test_stop(self):
+        conn = self.connect()
+        response, body = self.get(conn, "/")
+        conn.request("GET", "/slow")
+        self.assertTrue(self.entered.wait(5))
+
+        stopper = threading.Thread(target=self.server.stop)
+        stopper.start()
+        try:
+            while not self.server.draining:
+                time.sleep(0.01)
+            self.released.set()
+
+            # The request in progress is answered, then the connection
+            # is closed...
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.getheader("Connection"), "close")
+            self.assertEqual(response.read(), b"Slow, world")
+        finally:
+            stopper.join()
+
+        # ...and the loop has stopped, closing the listening socket.
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+        self.assertRaises(socket.error, socket.create_connection,
+                          self.addr, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
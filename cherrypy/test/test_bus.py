@@ -4,7 +4,7 @@ import unittest
 
 import cherrypy
 from cherrypy._cpcompat import get_daemon, set
-from cherrypy.process import wspbus
+from cherrypy.process import plugins, wspbus
 
 
 msg = "Listener %d on channel %s: %s."
@@ -69,6 +69,20 @@ class PublishSubscribeTests(unittest.TestCase):
 
         self.assertEqual(self.responses, expected)
 
+    def test_unsubscribe_while_publishing(self):
+        b = wspbus.Bus()
+
+        self.responses = []
+        late = self.get_listener('start', 2)
+        def early():
+            self.responses.append('early')
+            b.unsubscribe('start', late)
+        b.subscribe('start', early, priority=10)
+        b.subscribe('start', late, priority=20)
+
+        b.publish('start')
+        self.assertEqual(self.responses, ['early'])
+
 
 class BusMethodTests(unittest.TestCase):
 
@@ -259,5 +273,53 @@ class BusMethodTests(unittest.TestCase):
             self.fail("NameError was not raised as expected.")
 
 
+
+class WatchdogTests(unittest.TestCase):
+
+    def test_samples(self):
+        b = wspbus.Bus()
+        entries = []
+        b.subscribe('log', lambda msg, level: entries.append(msg))
+        w = plugins.Watchdog(b)
+        w.threshold = 0.1
+        w.max_samples = 2
+
+        started, finish = threading.Event(), threading.Event()
+        def stuck_in_here():
+            w.begin('stuck work')
+            started.set()
+            finish.wait()
+            w.end()
+        t = threading.Thread(target=stuck_in_here)
+        t.start()
+        try:
+            started.wait()
+            w.run()
+            # Not slow yet.
+            self.assertEqual(w.samples, [])
+
+            for i in range(3):
+                time.sleep(0.15)
+                w.run()
+        finally:
+            finish.set()
+            t.join()
+
+        self.assertEqual(w.stats['Samples Taken'], 3)
+        # Only the latest max_samples are kept.
+        self.assertEqual(len(w.samples), 2)
+        sample = w.samples[-1]
+        self.assertEqual(sample['Work'], 'stuck work')
+        self.assertEqual(sample['Thread'], t.getName())
+        self.assertTrue(sample['Elapsed'] >= 0.3)
+        self.assertTrue('stuck_in_here' in sample['Stack'])
+        self.assertTrue('stuck work' in entries[-1])
+
+        # Finished work is forgotten.
+        self.assertEqual(w.working, {})
+        w.run()
+        self.assertEqual(w.stats['Samples Taken'], 3)
+
+
 if __name__ == "__main__":
     unittest.main()
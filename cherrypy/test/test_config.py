@@ -254,3 +254,88 @@ class VariableSubstitutionTests(unittest.TestCase):
         self.assertEqual(cherrypy.config["my"]["my.dir"], "/some/dir/my/dir")
         self.assertEqual(cherrypy.config["my"]["my.dir2"], "/some/dir/my/dir/dir2")
 
+
+class ConfigViewTests(unittest.TestCase):
+
+    def test_layers(self):
+        from cherrypy._cpconfig import ConfigView
+        base = {'a': 1, 'b': 2}
+        top = {'b': 3}
+        view = ConfigView([base, top])
+        self.assertEqual(view['a'], 1)
+        self.assertEqual(view['b'], 3)
+        self.assertEqual(view.get('c', 4), 4)
+        self.assertRaises(KeyError, lambda: view['c'])
+        self.assertEqual(view.copy(), {'a': 1, 'b': 3})
+        self.assertEqual(sorted(view), ['a', 'b'])
+
+        # Changes to the layers show through...
+        base['c'] = 5
+        self.assertEqual(view['c'], 5)
+
+        # ...but writes to a child don't touch them, or its parent.
+        child = view.child()
+        child['a'] = 6
+        child.update({'d': 7})
+        self.assertEqual((child['a'], child['d']), (6, 7))
+        self.assertEqual(base, {'a': 1, 'b': 2, 'c': 5})
+        self.assertEqual(view.get('d'), None)
+
+    def test_mapping_api(self):
+        from cherrypy._cpconfig import ConfigView
+        base = {'a': 1, 'b': 2}
+        child = ConfigView([base]).child()
+        self.assertEqual(child.setdefault('a', 0), 1)
+        self.assertEqual(child.setdefault('c', 3), 3)
+        child.update([('d', 4)], e=5)
+        self.assertEqual(child, {'a': 1, 'b': 2, 'c': 3, 'd': 4, 'e': 5})
+        self.assertNotEqual(child, base)
+        self.assertEqual(sorted(child.items()), sorted(child.copy().items()))
+
+        # Removing keys never touches the shared layers.
+        self.assertEqual(child.pop('a'), 1)
+        self.assertEqual(child.pop('a', None), None)
+        self.assertRaises(KeyError, child.pop, 'a')
+        del child['b']
+        self.assertRaises(KeyError, child.__delitem__, 'b')
+        self.assertEqual(child, {'c': 3, 'd': 4, 'e': 5})
+        self.assertEqual(base, {'a': 1, 'b': 2})
+        child.clear()
+        self.assertEqual((len(child), base), (0, {'a': 1, 'b': 2}))
+
+    def test_find_config(self):
+        app = cherrypy.Application(None, config={
+            '/': {'a': 1, 'b': 2}, '/x/y': {'b': 3}})
+        self.assertEqual(app.find_config('/x/y/z', 'a'), 1)
+        self.assertEqual(app.find_config('/x/y/z', 'b'), 3)
+        self.assertEqual(app.find_config('/x', 'b'), 2)
+        self.assertEqual(app.find_config('/x', 'c', 'none'), 'none')
+
+        # Sections set directly (rather than merged) are found too.
+        app.config['/x'] = {'c': 4}
+        self.assertEqual(app.find_config('/x/y', 'c'), 4)
+
+    def test_shared_views(self):
+        app = cherrypy.Application(None, config={'/': {'a': 1}})
+        layers = [cherrypy.config, app.config['/']]
+        view = app.config_view(layers)
+        self.assertTrue(app.config_view(list(layers)) is view)
+        self.assertTrue(app.config_view(layers[:1]) is not view)
+        self.assertTrue(app.staticdir_layer('/s') is app.staticdir_layer('/s'))
+
+        # Merging new config may replace the app's sections.
+        app.merge({'/': {'a': 2}})
+        self.assertTrue(app.config_view(layers) is not view)
+
+    def test_namespaces_by_layer(self):
+        from cherrypy._cpconfig import ConfigView
+        from cherrypy.lib.reprconf import NamespaceSet
+        seen = {}
+        def handler(k, v):
+            seen[k] = v
+        namespaces = NamespaceSet({'x': handler})
+        view = ConfigView([{'x.a': 1, 'x.b': 2, 'y.c': 3}, {'x.b': 4}])
+        namespaces(view)
+        self.assertEqual(seen, {'a': 1, 'b': 4})
+        self.assertEqual(namespaces._split(view), {'x': {'a': 1, 'b': 4}})
+
@@ -98,6 +98,24 @@ def setup_server():
 
 from cherrypy.test import helper
 
+
+def wait_parked(addr, parked=True, timeout=5):
+    """Wait until the server's ConnectionManager has (or has not) parked the
+    connection from the given client address, and return whether it has."""
+    endtime = time.time() + timeout
+    while True:
+        found = False
+        for conn in list(cherrypy.server.httpserver.connections._conns.values()):
+            try:
+                if conn.socket.getpeername() == addr:
+                    found = True
+                    break
+            except socket.error:
+                pass
+        if found == parked or time.time() > endtime:
+            return found
+        time.sleep(0.01)
+
 class ConnectionCloseTests(helper.CPWebCase):
     setup_server = staticmethod(setup_server)
 
@@ -130,6 +148,32 @@ class ConnectionCloseTests(helper.CPWebCase):
         # Make another request on the same connection, which should error.
         self.assertRaises(NotConnected, self.getPage, "/")
 
+    def test_HTTP11_keepalive_max_requests(self):
+        if cherrypy.server.protocol_version != "HTTP/1.1":
+            return self.skip()
+
+        self.PROTOCOL = "HTTP/1.1"
+
+        self.persistent = True
+        httpserver = cherrypy.server.httpserver
+        old_max = getattr(httpserver, 'keepalive_max_requests', None)
+        if old_max is None:
+            return self.skip("keepalive_max_requests not supported ")
+        httpserver.keepalive_max_requests = 2
+        try:
+            self.getPage("/")
+            self.assertStatus('200 OK')
+            self.assertNoHeader("Connection")
+
+            # The second request is the last one allowed on this connection.
+            self.getPage("/page1")
+            self.assertStatus('200 OK')
+            self.assertHeader("Connection", "close")
+
+            self.assertRaises(NotConnected, self.getPage, "/")
+        finally:
+            httpserver.keepalive_max_requests = old_max
+
     def test_Streaming_no_len(self):
         self._streaming(set_cl=False)
 
@@ -432,6 +476,142 @@ class PipelineTests(helper.CPWebCase):
 
         conn.close()
 
+    def _park(self, conn=None):
+        """Make a request on a new persistent connection (or the given one),
+        wait for the server to park it, and return it (or None if the server
+        doesn't park)."""
+        httpserver = cherrypy.server.httpserver
+        if (cherrypy.server.protocol_version != "HTTP/1.1" or
+            not hasattr(getattr(httpserver, 'connections', None), '_conns')):
+            return None
+
+        self.PROTOCOL = "HTTP/1.1"
+        if conn is None:
+            self.persistent = True
+            conn = self.HTTP_CONN
+        conn.putrequest("GET", "/hello", skip_host=True)
+        conn.putheader("Host", self.HOST)
+        conn.endheaders()
+        response = conn.getresponse()
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.read(), ntob("Hello, world!"))
+        self.assertTrue(wait_parked(conn.sock.getsockname()))
+        return conn
+
+    def test_parked_connection(self):
+        conn = self._park()
+        if conn is None:
+            return self.skip()
+        try:
+            # The next request on a parked connection is answered on it.
+            for trial in range(3):
+                conn.putrequest("GET", "/hello", skip_host=True)
+                conn.putheader("Host", self.HOST)
+                conn.endheaders()
+                response = conn.getresponse()
+                self.assertEqual(response.status, 200)
+                self.assertEqual(response.read(), ntob("Hello, world!"))
+                self.assertTrue(wait_parked(conn.sock.getsockname()))
+        finally:
+            conn.close()
+            self.persistent = False
+
+    def test_parked_pipelining(self):
+        conn = self._park()
+        if conn is None:
+            return self.skip()
+        try:
+            # Wake a parked connection with several requests at once.
+            request = ntob("GET /hello HTTP/1.1\r\nHost: %s\r\n\r\n"
+                           % self.HOST, 'ascii')
+            conn.send(request * 3)
+            # Read the replies straight from the socket: a response_class
+            # per reply may buffer (and lose) the ones which follow it.
+            conn.sock.settimeout(5)
+            data = ntob("")
+            while data.count(ntob("Hello, world!")) < 3:
+                chunk = conn.sock.recv(8192)
+                if not chunk:
+                    break
+                data += chunk
+            self.assertEqual(data.count(ntob("HTTP/1.1 200 OK\r\n")), 3)
+            self.assertEqual(data.count(ntob("Hello, world!")), 3)
+            self.assertTrue(data.endswith(ntob("Hello, world!")))
+            self.assertTrue(wait_parked(conn.sock.getsockname()))
+        finally:
+            conn.close()
+            self.persistent = False
+
+    def test_parked_client_close(self):
+        conn = self._park()
+        if conn is None:
+            return self.skip()
+        # A client which closes while parked is closed and forgotten...
+        addr = conn.sock.getsockname()
+        conn.close()
+        self.persistent = False
+        self.assertFalse(wait_parked(addr, parked=False))
+
+        # ...and the server carries on.
+        self.getPage("/hello")
+        self.assertStatus(200)
+        self.assertBody("Hello, world!")
+
+    def test_parked_idle_expiry(self):
+        httpserver = cherrypy.server.httpserver
+        old_timeout = getattr(httpserver, 'keepalive_timeout', None)
+        httpserver.keepalive_timeout = 0.2
+        try:
+            conn = self._park()
+            if conn is None:
+                return self.skip()
+            try:
+                # A connection left idle past keepalive_timeout is closed.
+                self.assertFalse(wait_parked(conn.sock.getsockname(),
+                                             parked=False))
+                conn.sock.settimeout(5)
+                self.assertEqual(conn.sock.recv(8192), ntob(""))
+            finally:
+                conn.close()
+                self.persistent = False
+        finally:
+            httpserver.keepalive_timeout = old_timeout
+
+    def test_parked_eviction(self):
+        httpserver = cherrypy.server.httpserver
+        old_max = getattr(httpserver, 'keepalive_max_connections', None)
+        httpserver.keepalive_max_connections = 2
+        conns = []
+        try:
+            for i in range(3):
+                if self.scheme == "https":
+                    conn = HTTPSConnection(self.HOST, self.PORT)
+                else:
+                    conn = HTTPConnection(self.HOST, self.PORT)
+                conn.auto_open = False
+                conn.connect()
+                conns.append(conn)
+                if self._park(conn) is None:
+                    return self.skip()
+                if i == 0:
+                    evicted = httpserver.connections.evicted
+
+            # Parking a third connection closed the one idle longest...
+            self.assertEqual(httpserver.connections.evicted, evicted + 1)
+            oldest = conns[0]
+            self.assertFalse(wait_parked(oldest.sock.getsockname(),
+                                         parked=False))
+            oldest.sock.settimeout(5)
+            self.assertEqual(oldest.sock.recv(8192), ntob(""))
+
+            # ...and left the other two parked.
+            for conn in conns[1:]:
+                self.assertTrue(wait_parked(conn.sock.getsockname()))
+        finally:
+            for conn in conns:
+                conn.close()
+            httpserver.keepalive_max_connections = old_max
+
     def test_100_Continue(self):
         if cherrypy.server.protocol_version != "HTTP/1.1":
             return self.skip()
@@ -709,6 +889,36 @@ class ConnectionTests(helper.CPWebCase):
         self.assertEqual(remaining, 0)
         remote_data_conn.close()
 
+    def test_shed(self):
+        if self.scheme == "https":
+            # TLS connections are closed without a response.
+            return self.skip()
+
+        # Pretend to be overloaded, so that new connections are shed.
+        httpserver = cherrypy.server.httpserver
+        httpserver.overloaded = lambda: 'Shed (Queue Size)'
+        try:
+            self.persistent = True
+            conn = self.HTTP_CONN
+            # Send a request with a body, which the server never reads;
+            # the client must still get the 503.
+            conn.putrequest("POST", "/upload", skip_host=True)
+            conn.putheader("Host", self.HOST)
+            conn.putheader("Content-Length", "65536")
+            conn.endheaders()
+            conn.send(ntob("x" * 65536))
+            response = conn.response_class(conn.sock, method="POST")
+            response.begin()
+            self.status, self.headers, self.body = webtest.shb(response)
+            self.assertStatus(503)
+            self.assertHeader("Connection", "close")
+            self.assertHeader("Retry-After", str(httpserver.retry_after))
+            self.assertInBody("too busy")
+            conn.close()
+        finally:
+            del httpserver.overloaded
+            self.persistent = False
+
 
 class BadRequestTests(helper.CPWebCase):
     setup_server = staticmethod(setup_server)
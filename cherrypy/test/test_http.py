@@ -4,6 +4,7 @@ import errno
 import mimetypes
 import socket
 import sys
+import time
 
 import cherrypy
 from cherrypy._cpcompat import HTTPConnection, HTTPSConnection, ntob, py3k
@@ -210,3 +211,78 @@ class HTTPTests(helper.CPWebCase):
             if e.errno != errno.ECONNRESET:
                 raise
 
+
+    def _raw(self, *chunks):
+        """Send the given chunks on a new connection, pausing between them,
+        and return everything the server sends back until it closes."""
+        sock = socket.create_connection((self.interface(), self.PORT))
+        try:
+            for i, chunk in enumerate(chunks):
+                if i:
+                    time.sleep(0.1)
+                sock.sendall(ntob(chunk))
+            data = []
+            while True:
+                d = sock.recv(8192)
+                if not d:
+                    break
+                data.append(d)
+            return ntob('').join(data)
+        finally:
+            sock.close()
+
+    def test_request_head(self):
+        if self.scheme == 'https':
+            return self.skip()
+
+        host = "Host: %s\r\n" % self.HOST
+        # One leading CRLF is ignored.
+        data = self._raw("\r\nGET / HTTP/1.1\r\n" + host +
+                         "Connection: close\r\n\r\n")
+        self.assertTrue(data.startswith(ntob("HTTP/1.1 200 ")))
+        self.assertTrue(data.endswith(ntob("Hello world!")))
+
+        # A head which ends with bare LFs is read (not waited on) and
+        # refused.
+        data = self._raw("GET / HTTP/1.1\nHost: %s\n\n" % self.HOST)
+        self.assertTrue(data.startswith(ntob("HTTP/1.1 400 ")))
+        self.assertTrue(data.endswith(ntob("HTTP requires CRLF terminators")))
+
+        # A head which arrives in pieces, split inside the request line and
+        # inside the final CRLF CRLF.
+        data = self._raw("GE", "T / HTTP/1.1\r\n" + host +
+                         "Connection: close\r\n\r", "\n")
+        self.assertTrue(data.startswith(ntob("HTTP/1.1 200 ")))
+        self.assertTrue(data.endswith(ntob("Hello world!")))
+
+        # Pipelined requests, sent at once, are answered in turn.
+        data = self._raw("GET / HTTP/1.1\r\n" + host + "\r\n" +
+                         "GET / HTTP/1.1\r\n" + host +
+                         "Connection: close\r\n\r\n")
+        self.assertEqual(data.count(ntob("HTTP/1.1 200 ")), 2)
+        self.assertEqual(data.count(ntob("Hello world!")), 2)
+
+    def test_oversized_head(self):
+        if self.scheme == 'https':
+            return self.skip()
+
+        httpserver = cherrypy.server.httpserver
+        old_max = httpserver.max_request_header_size
+        httpserver.max_request_header_size = 1024
+        try:
+            host = "Host: %s\r\n" % self.HOST
+            # A Request-URI which is too long gets 414...
+            data = self._raw("GET /%s HTTP/1.1\r\n" % ("x" * 2000) + host +
+                             "\r\n")
+            self.assertTrue(data.startswith(ntob("HTTP/1.1 414 ")))
+
+            # ...while a short one, followed by headers which are too long,
+            # gets 413.
+            data = self._raw("GET / HTTP/1.1\r\n" + host +
+                             "X-Long: %s\r\n\r\n" % ("x" * 2000))
+            self.assertTrue(data.startswith(ntob("HTTP/1.1 413 ")))
+            self.assertTrue(data.endswith(ntob(
+                "The headers sent with the request exceed the maximum "
+                "allowed bytes.")))
+        finally:
+            httpserver.max_request_header_size = old_max
@@ -1,10 +1,13 @@
 """Basic tests for the CherryPy core: request handling."""
 
+import datetime
 import os
+import unittest
 localDir = os.path.dirname(__file__)
 
 import cherrypy
 from cherrypy._cpcompat import ntob, ntou, py3k
+from cherrypy.wsgiserver import clock
 
 access_log = os.path.join(localDir, "access.log")
 error_log = os.path.join(localDir, "error.log")
@@ -137,6 +140,34 @@ class AccessLogTests(helper.CPWebCase, logtest.LogCase):
         self.assertLog(-1, r'"Browzuh (1.0\r\n\t\t.3)"')
 
 
+class LogTimeTests(unittest.TestCase):
+
+    def setUp(self):
+        # Stand in for the time module which the cache reads the time from.
+        self.now = 1000000000.2
+        self.addCleanup(setattr, clock, 'time', clock.time)
+        clock.time = self
+
+    def time(self):
+        return self.now
+
+    def formatted(self, timeval):
+        now = datetime.datetime.fromtimestamp(timeval)
+        month = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')[now.month - 1]
+        return now.strftime('[%d/' + month + '/%Y:%H:%M:%S]')
+
+    def test_log_time(self):
+        expected = self.formatted(1000000000)
+        self.assertEqual(cherrypy.log.time(), expected)
+
+        # The cached time is returned until the next second.
+        self.now = 1000000000.9
+        self.assertEqual(cherrypy.log.time(), expected)
+        self.now = 1000000001.0
+        self.assertEqual(cherrypy.log.time(), self.formatted(1000000001))
+
+
 class ErrorLogTests(helper.CPWebCase, logtest.LogCase):
     setup_server = staticmethod(setup_server)
 
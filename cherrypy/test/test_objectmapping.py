@@ -132,6 +132,14 @@ class ObjectMappingTest(helper.CPWebCase):
         class Collection:
             default = ByMethod('a', 'bit')
 
+        class Dynamic(object):
+            exposed = True
+
+            def __getattr__(self, name):
+                if name == 'PUT':
+                    return lambda: "dynamic PUT"
+                raise AttributeError(name)
+
         Root.exposing = Exposing()
         Root.exposingnew = ExposingNewStyle()
         Root.dir1 = Dir1()
@@ -141,12 +149,14 @@ class ObjectMappingTest(helper.CPWebCase):
         Root.defnoindex = DefNoIndex()
         Root.bymethod = ByMethod('another')
         Root.collection = Collection()
+        Root.dynamic = Dynamic()
 
         d = cherrypy.dispatch.MethodDispatcher()
         for url in script_names:
             conf = {'/': {'user': (url or "/").split("/")[-2]},
                     '/bymethod': {'request.dispatch': d},
                     '/collection': {'request.dispatch': d},
+                    '/dynamic': {'request.dispatch': d},
                     }
             cherrypy.tree.mount(Root(), url, conf)
 
@@ -373,6 +383,30 @@ class ObjectMappingTest(helper.CPWebCase):
         self.getPage("/app")
         self.assertBody("milk")
 
+    def testMethodDispatchVerbTable(self):
+        class Thing:
+            def GET(self):
+                pass
+            GET._cp_config = {'response.stream': True}
+
+        d = cherrypy.dispatch.MethodDispatcher()
+        thing = Thing()
+        table = d.verb_table(thing)
+        self.assertEqual(table[0], "GET, HEAD")
+        self.assertEqual(table[1]['HEAD'], ('GET', {'response.stream': True}))
+        # The table is made once per class...
+        self.assertTrue(d.verb_table(Thing()) is table)
+        # ...unless the instance has verbs of its own.
+        thing.DELETE = lambda: None
+        self.assertEqual(d.verb_table(thing)[0], "DELETE, GET, HEAD")
+        self.assertTrue(d.verb_table(Thing()) is table)
+
+        # Verbs which only __getattr__ knows of are still found.
+        self.getPage("/dynamic", method="PUT")
+        self.assertBody("dynamic PUT")
+        self.getPage("/dynamic", method="DELETE")
+        self.assertErrorPage(405)
+
     def testTreeMounting(self):
         class Root(object):
             def hello(self):
@@ -402,3 +436,96 @@ class ObjectMappingTest(helper.CPWebCase):
         # However, this does not apply to tree.mount
         self.assertRaises(TypeError, cherrypy.tree.mount, a, None)
 
+    def testCompiledNamespaces(self):
+        app = cherrypy.tree.apps['/foo']
+        self.script_name = '/foo'
+        conf = app.root.dir1.myMethod._cp_config
+        app.compile_namespaces = True
+        self.addCleanup(delattr, app, 'compile_namespaces')
+
+        # Namespaces are compiled once for each shared view.
+        for i in range(2):
+            self.getPage('/dir1/myMethod')
+            self.assertBody("myMethod from dir1, path_info is:'/dir1/myMethod'")
+        view = [v for v in app._shared_views.values()
+                if [layer for layer in v.layers if layer is conf]][0]
+        compiled = view.compiled_namespaces
+        self.assertNotEqual(compiled, None)
+        self.getPage('/dir1/myMethod')
+        self.assertTrue(view.compiled_namespaces is compiled)
+
+        # Changes made in place to its _cp_config layers, or to the app's
+        # config sections, are seen once app.config_generation goes up...
+        for layer in (conf, app.config['/']):
+            layer['response.headers.X-Compiled'] = 'no'
+            try:
+                self.getPage('/dir1/myMethod')
+                self.assertNoHeader('X-Compiled')
+                app.config_generation += 1
+                self.getPage('/dir1/myMethod')
+                self.assertHeader('X-Compiled', 'no')
+            finally:
+                del layer['response.headers.X-Compiled']
+                app.config_generation += 1
+            self.getPage('/dir1/myMethod')
+            self.assertNoHeader('X-Compiled')
+
+        # ...and changes to the global config are seen at once.
+        compiled = view.compiled_namespaces
+        cherrypy.config.update({})
+        self.getPage('/dir1/myMethod')
+        self.assertTrue(view.compiled_namespaces is not compiled)
+
+
+class CachedObjectMappingTest(ObjectMappingTest):
+
+    def setup_server():
+        ObjectMappingTest.setup_server()
+        for app in cherrypy.tree.apps.values():
+            app.dispatch_cache_size = 100
+    setup_server = staticmethod(setup_server)
+
+    def testDispatchCache(self):
+        app = cherrypy.tree.apps['/foo']
+        app.dispatch_cache.clear()
+        self.script_name = '/foo'
+
+        for i in range(2):
+            self.getPage('/dir1/myMethod')
+            self.assertBody("myMethod from dir1, path_info is:'/dir1/myMethod'")
+        self.assertEqual(list(app.dispatch_cache.keys()), ['/dir1/myMethod'])
+
+        # Misses aren't remembered.
+        isolated = cherrypy.tree.apps['/isolated']
+        isolated.dispatch_cache.clear()
+        self.script_name = '/isolated'
+        self.getPage('/nonexistent')
+        self.assertStatus(404)
+        self.assertEqual(isolated.dispatch_cache, {})
+        self.script_name = '/foo'
+
+        # Changing the global config throws the cache away.
+        generation = cherrypy.config.generation
+        cherrypy.config.update({'foo.bar': 'baz'})
+        self.assertNotEqual(cherrypy.config.generation, generation)
+        self.getPage('/dir1/myMethod')
+        self.assertBody("myMethod from dir1, path_info is:'/dir1/myMethod'")
+        entry = app.dispatch_cache['/dir1/myMethod']
+        self.assertEqual(entry[1], cherrypy.config.generation)
+
+        # ...and so does merging into the app's config.
+        app.merge({'/dir1': {'foo.bar': 'baz'}})
+        self.assertEqual(app.dispatch_cache, {})
+
+        # ...as do deleting, popping or defaulting global config keys.
+        for change in (lambda c: c.__delitem__('foo.bar'),
+                       lambda c: c.setdefault('foo.bar', 'baz'),
+                       lambda c: c.pop('foo.bar')):
+            self.getPage('/dir1/myMethod')
+            generation = cherrypy.config.generation
+            change(cherrypy.config)
+            self.assertNotEqual(cherrypy.config.generation, generation)
+            self.getPage('/dir1/myMethod')
+            self.assertBody("myMethod from dir1, path_info is:'/dir1/myMethod'")
+            entry = app.dispatch_cache['/dir1/myMethod']
+            self.assertEqual(entry[1], cherrypy.config.generation)
@@ -1,7 +1,9 @@
 """Tests for refleaks."""
 
 from cherrypy._cpcompat import HTTPConnection, HTTPSConnection, ntob
+import sys
 import threading
+import time
 
 import cherrypy
 
@@ -57,3 +59,46 @@ class ReferenceTests(helper.CPWebCase):
 
         self.assertEqual(len(success), ITERATIONS)
 
+
+
+class PooledReferenceTests(ReferenceTests):
+
+    def setup_server():
+        ReferenceTests.setup_server()
+
+        class Pooled:
+            def index(self, *args, **kwargs):
+                request = cherrypy.request
+                leaked = getattr(request, 'thing', None) is not None
+                request.thing = data
+                return repr((request.recycled, leaked,
+                             list(request.params.keys())))
+            index.exposed = True
+
+        app = cherrypy.tree.mount(Pooled(), '/pooled')
+        app.pool_size = 1
+        cherrypy.tree.apps[''].pool_size = 1
+    setup_server = staticmethod(setup_server)
+
+    def test_recycled_requests(self):
+        before = sys.getrefcount(data)
+        recycled = 0
+        for i in range(30):
+            self.getPage('/pooled/?x%d=1' % i)
+            self.assertStatus(200)
+            was_recycled, leaked, params = eval(self.body)
+            # Nothing from earlier requests shows through...
+            self.assertFalse(leaked)
+            self.assertEqual(params, ['x%d' % i])
+            if was_recycled:
+                recycled += 1
+        # ...even though there are fewer worker threads than requests.
+        self.assertTrue(recycled > 0)
+
+        # The spare Requests don't keep anything alive (once the last one
+        # has been released, which may happen just after it's written).
+        for i in range(50):
+            if sys.getrefcount(data) == before:
+                break
+            time.sleep(0.02)
+        self.assertEqual(sys.getrefcount(data), before)
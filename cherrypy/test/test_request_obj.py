@@ -198,6 +198,16 @@ class RequestObjectTests(helper.CPWebCase):
 
                 return "double header test"
 
+            def cookies(self):
+                return ", ".join(sorted(cherrypy.request.cookie.keys()))
+
+            def cookies_twice(self):
+                try:
+                    cherrypy.request.cookie
+                except cherrypy.HTTPError:
+                    pass
+                return self.cookies()
+
             def ifmatch(self):
                 val = cherrypy.request.headers['If-Match']
                 assert isinstance(val, unicodestr)
@@ -637,6 +647,19 @@ class RequestObjectTests(helper.CPWebCase):
                      headers=[("Content-type", "application/json")])
         self.assertBody("application/json")
 
+    def test_cookies(self):
+        self.getPage("/headers/cookies", headers=[("Cookie", "b=2; a=1")])
+        self.assertBody("a, b")
+
+        # Cookies are only parsed if the handler asks for them.
+        self.getPage("/headers/cookies", headers=[("Cookie", "a:b=1")])
+        self.assertErrorPage(400, "Illegal cookie name a:b")
+        self.getPage("/headers/Cookie", headers=[("Cookie", "a:b=1")])
+        self.assertBody("a:b=1")
+        # ...and raise each time they're asked for.
+        self.getPage("/headers/cookies_twice", headers=[("Cookie", "a:b=1")])
+        self.assertErrorPage(400, "Illegal cookie name a:b")
+
     def test_basic_HTTPMethods(self):
         helper.webtest.methods_with_bodies = ("POST", "PUT", "PROPFIND")
 
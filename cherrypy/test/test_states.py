@@ -322,6 +322,85 @@ class PluginTests(helper.CPWebCase):
             self.fail("Daemonized parent process failed to exit cleanly.")
 
 
+class PreforkTests(helper.CPWebCase):
+
+    def _pids(self, done, timeout=10):
+        """Request /pid on new connections until done(pids) is true for
+        the set of process ids which have answered; return that set."""
+        pids = set()
+        endtime = time.time() + timeout
+        while not done(pids):
+            if time.time() > endtime:
+                self.fail("Timed out; only %r answered." % pids)
+            try:
+                self.getPage("/pid")
+            except socket.error:
+                # A worker went away while we were connecting.
+                time.sleep(0.1)
+                continue
+            if self.status == '200 OK':
+                pids.add(int(self.body))
+        return pids
+
+    def test_prefork(self):
+        if not hasattr(os, 'fork') or not hasattr(socket, 'SO_REUSEPORT'):
+            return self.skip("skipped (no fork or SO_REUSEPORT) ")
+
+        p = helper.CPProcess(ssl=(self.scheme.lower()=='https'))
+        p.write_conf(extra="""server.workers: 2
+engine.preforker.respawn_interval: 0
+test_case_name: "test_prefork"
+""")
+        p.start(imports='cherrypy.test._test_states_demo')
+        master = p.get_pid()
+        try:
+            # Only the workers answer; the master forked them from the
+            # 'main' channel of bus.block, inside which each worker
+            # restarted its own bus.
+            workers = self._pids(lambda pids: len(pids) >= 2)
+            self.assertEqual(len(workers), 2)
+            self.assertFalse(master in workers)
+
+            # A worker which dies is replaced.
+            dead = workers.pop()
+            os.kill(dead, signal.SIGKILL)
+            pids = self._pids(lambda pids: pids - workers - set([dead]))
+            self.assertFalse(master in pids)
+            workers |= pids
+            workers.discard(dead)
+
+            # SIGUSR1 to the master reaches the workers too.
+            if hasattr(signal, 'SIGUSR1'):
+                logsize = os.path.getsize(p.error_log)
+                os.kill(master, signal.SIGUSR1)
+                endtime = time.time() + 10
+                while True:
+                    f = open(p.error_log, 'rb')
+                    f.seek(logsize)
+                    count = f.read().count(ntob("Bus graceful"))
+                    f.close()
+                    # Once in the master, and once in each worker.
+                    if count >= 3 or time.time() > endtime:
+                        break
+                    time.sleep(0.1)
+                self.assertEqual(count, 3)
+        finally:
+            # SIGTERM to the master stops the workers, then the master.
+            os.kill(master, signal.SIGTERM)
+            p.join()
+
+        for pid in workers:
+            endtime = time.time() + 10
+            while True:
+                try:
+                    os.kill(pid, 0)
+                except OSError:
+                    break
+                if time.time() > endtime:
+                    self.fail("Worker %d is still running." % pid)
+                time.sleep(0.1)
+
+
 class SignalHandlingTests(helper.CPWebCase):
     def test_SIGHUP_tty(self):
         # When not daemonized, SIGHUP should shut down the server.
@@ -208,6 +208,36 @@ class StaticTest(helper.CPWebCase):
         self.assertHeader('Content-Length', 14)
         self.assertMatchesBody('Fee\nfie\nfo\nfum')
 
+    def test_ranges(self):
+        # A single range of a file may be sent by the server's
+        # wsgi.file_wrapper, just like the whole file; the bytes must match.
+        self.getPage("/static/dirback.jpg")
+        self.assertStatus(200)
+        whole = self.body
+        size = len(whole)
+
+        self.persistent = True
+        try:
+            for start, stop in [(0, 99), (100, 16383), (size - 10, size - 1)]:
+                self.getPage("/static/dirback.jpg", headers=[
+                    ("Range", "bytes=%d-%d" % (start, stop))])
+                self.assertStatus(206)
+                self.assertHeader("Content-Range",
+                                  "bytes %d-%d/%d" % (start, stop, size))
+                self.assertBody(whole[start:stop + 1])
+
+            self.getPage("/static/dirback.jpg",
+                         headers=[("Range", "bytes=-10")])
+            self.assertStatus(206)
+            self.assertBody(whole[-10:])
+
+            # Nothing more of the file was sent on the connection.
+            self.getPage("/static/dirback.jpg")
+            self.assertStatus(200)
+            self.assertBody(whole)
+        finally:
+            self.persistent = False
+
     def test_file_stream(self):
         if cherrypy.server.protocol_version != "HTTP/1.1":
             return self.skip()
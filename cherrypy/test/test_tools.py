@@ -15,6 +15,7 @@ from cherrypy import tools
 
 
 europoundUnicode = ntou('\x80\xa3')
+compiled_hooks = []
 
 
 #                             Client-side code                             #
@@ -102,6 +103,14 @@ class ToolTests(helper.CPWebCase):
                     r.body = [chr((ord(x) + scale) % 256) for x in r.body[0]]
         cherrypy.tools.rotator = cherrypy.Tool('before_finalize', Rotator())
 
+        # Subclasses of Tool may do more in _setup, so aren't compiled.
+        class CountingTool(cherrypy.Tool):
+            setups = 0
+            def _setup(self):
+                CountingTool.setups += 1
+                cherrypy.Tool._setup(self)
+        cherrypy.tools.counting = CountingTool('before_finalize', lambda: None)
+
         def stream_handler(next_handler, *args, **kwargs):
             cherrypy.response.output = o = BytesIO()
             try:
@@ -151,6 +160,18 @@ class ToolTests(helper.CPWebCase):
             decorated_euro = tools.gzip(compress_level=6)(decorated_euro)
             decorated_euro = tools.rotator(scale=3)(decorated_euro)
 
+            def compiled(self):
+                hooks = cherrypy.request.hooks['before_finalize']
+                compiled_hooks.append(list(hooks))
+                return "compiled"
+            compiled.exposed = True
+            compiled = tools.rotator(scale=0)(compiled)
+
+            def counted(self):
+                return str(cherrypy.tools.counting.setups)
+            counted.exposed = True
+            counted = tools.counting()(counted)
+
         root = Root()
 
         class TestType(type):
@@ -361,6 +382,26 @@ class ToolTests(helper.CPWebCase):
         else:
             self.assertInBody(''.join([chr((ord(x) + 3) % 256) for x in zbuf.getvalue()]))
 
+    def testCompiledHooks(self):
+        # The hooks a Tool attaches for the same config are made once.
+        del compiled_hooks[:]
+        self.getPage("/compiled")
+        self.assertStatus(200)
+        self.getPage("/compiled")
+        self.assertBody("compiled")
+        first, second = compiled_hooks
+        self.assertEqual(len(first), len(second))
+        for a, b in zip(first, second):
+            self.assertTrue(a is b)
+        keys = [(tool, dict(settings))
+                for tool, settings in cherrypy.tools._compiled]
+        self.assertTrue((tools.rotator, {'on': True, 'scale': 0}) in keys)
+
+        self.getPage("/counted")
+        setups = int(self.body)
+        self.getPage("/counted")
+        self.assertBody(str(setups + 1))
+
     def testBareHooks(self):
         content = "bit of a pain in me gulliver"
         self.getPage("/pipe",
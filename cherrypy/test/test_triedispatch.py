@@ -0,0 +1,103 @@
+import cherrypy
+from cherrypy.test import helper
+
+
+class TrieDispatchTest(helper.CPWebCase):
+
+    def setup_server():
+
+        class Blog:
+            _cp_config = {'tools.response_headers.on': True,
+                          'tools.response_headers.headers': [('X-Blog', 'yes')]}
+
+            def index(self):
+                return "blog index"
+
+            def archive(self, year, month=None):
+                return "archive %r %r" % (year, month)
+
+            def post(self, year, slug, lang='en'):
+                return "post %r %r %r" % (year, slug, lang)
+
+            def create(self, **kwargs):
+                return "created %s" % kwargs['title']
+
+        class Files:
+            def __call__(self, path):
+                return "file %s" % path
+
+        class Price:
+            def show(self, amount):
+                return repr(amount)
+
+        d = cherrypy.dispatch.TrieDispatcher()
+        blog = Blog()
+        # Routes for the same path are tried in the order connected.
+        d.connect('create', '/blog', blog, 'create',
+                  conditions=dict(method=['POST']))
+        d.connect('index', '/blog', blog, 'index')
+        d.connect('archive', '/blog/{year:int}', blog, 'archive')
+        d.connect('monthly', '/blog/{year:int}/{month:int}', blog, 'archive')
+        d.connect('post', '/blog/{year:int}/{slug}', blog, 'post', lang='fr')
+        d.connect('latest', '/blog/latest', blog, 'index')
+        d.connect('files', '/files/{path:path}', Files())
+        d.connect('price', '/price/{amount:float}', Price, 'show')
+
+        conf = {'/': {'request.dispatch': d},
+                '/blog/latest': {'tools.response_headers.headers':
+                                 [('X-Blog', 'latest')]}}
+        cherrypy.tree.mount(root=None, config=conf)
+    setup_server = staticmethod(setup_server)
+
+    def test_static_and_params(self):
+        self.getPage("/blog")
+        self.assertBody("blog index")
+        self.assertHeader("X-Blog", "yes")
+
+        # Params are converted, and defaults are passed on.
+        self.getPage("/blog/2013")
+        self.assertBody("archive 2013 None")
+        self.getPage("/blog/2013/7")
+        self.assertBody("archive 2013 7")
+        self.getPage("/blog/2013/hello")
+        self.assertBody("post 2013 'hello' 'fr'")
+        self.getPage("/price/1.5")
+        self.assertBody("1.5")
+
+        # Literal segments win over params; the section for the path
+        # overrides the controller's _cp_config.
+        self.getPage("/blog/latest")
+        self.assertBody("blog index")
+        self.assertHeader("X-Blog", "latest")
+
+        self.getPage("/files/a/b/c.txt")
+        self.assertBody("file a/b/c.txt")
+
+    def test_not_found(self):
+        self.getPage("/nope")
+        self.assertStatus(404)
+        self.getPage("/blog/notayear")
+        self.assertStatus(404)
+        self.getPage("/files")
+        self.assertStatus(404)
+
+    def test_methods(self):
+        self.getPage("/blog", method="POST", body="title=Hi")
+        self.assertBody("created Hi")
+
+        self.getPage("/blog", method="PUT")
+        self.assertBody("blog index")
+
+        d = cherrypy.tree.apps[''].config['/']['request.dispatch']
+        d.connect('only_get', '/get', lambda: "got",
+                  conditions=dict(method=['GET']))
+        self.getPage("/get")
+        self.assertBody("got")
+        self.getPage("/get", method="DELETE")
+        self.assertStatus(405)
+        self.assertHeader("Allow", "GET, HEAD")
+
+    def test_bad_routes(self):
+        d = cherrypy.dispatch.TrieDispatcher()
+        self.assertRaises(ValueError, d.connect, 'x', '/{a:nope}', None)
+        self.assertRaises(ValueError, d.connect, 'x', '/{a:path}/b', None)
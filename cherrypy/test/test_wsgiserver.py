@@ -0,0 +1,786 @@
+"""Unit tests for the parts of wsgiserver which can be used on their own."""
+
+import email.utils
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+
+from cherrypy._cpcompat import ntob, py3k
+from cherrypy.wsgiserver import clock
+if py3k:
+    from cherrypy.wsgiserver import wsgiserver3 as wsgiserver
+    makefile = wsgiserver.CP_makefile
+else:
+    from cherrypy.wsgiserver import wsgiserver2 as wsgiserver
+    makefile = wsgiserver.CP_fileobject
+
+try:
+    import ssl
+except ImportError:
+    ssl = None
+
+serverpem = os.path.join(os.getcwd(), os.path.dirname(__file__), 'test.pem')
+
+
+def socketpair():
+    """Return a connected pair of TCP sockets (socket.socketpair is not
+    available everywhere)."""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    client = socket.create_connection(listener.getsockname())
+    server, addr = listener.accept()
+    listener.close()
+    return server, client
+
+
+class HeadParsingTests(unittest.TestCase):
+
+    def test_find_head_end(self):
+        find = wsgiserver._find_head_end
+        head = ntob("GET / HTTP/1.1\r\nHost: a\r\n\r\n")
+        self.assertEqual(find(head + ntob("body")), len(head))
+        self.assertEqual(find(head[:-2]), -1)
+        # A bare LF ends a line too, so read_head stops where readline would.
+        self.assertEqual(find(ntob("GET / HTTP/1.1\n\nbody")), 16)
+        self.assertEqual(find(ntob("GET / HTTP/1.1\r\n\nbody")), 17)
+        # The search may start part way in, for data which arrives in pieces.
+        self.assertEqual(find(head, len(head) - 3), len(head))
+
+    def test_parse_headers(self):
+        parse = wsgiserver.parse_headers
+        hdict = parse(ntob("Host: a\r\nAccept: b\r\n  c\r\nAccept: d\r\n\r\n"))
+        self.assertEqual(hdict[ntob("Host")], ntob("a"))
+        self.assertEqual(hdict[ntob("Accept")], ntob("b, c, d"))
+        # Nothing after the blank line is parsed.
+        self.assertEqual(parse(ntob("\r\nHost: a\r\n")), {})
+
+        for block, msg in [
+                ("Host: a\n\n", "HTTP requires CRLF terminators"),
+                ("Host: a\r\nAccept: b", "HTTP requires CRLF terminators"),
+                ("Host: a\r\n", "Illegal end of headers."),
+                ("Host a\r\n\r\n", "Illegal header line."),
+                ]:
+            try:
+                parse(ntob(block))
+            except ValueError:
+                self.assertEqual(str(sys.exc_info()[1]), msg)
+            else:
+                self.fail("%r did not raise ValueError" % block)
+
+    def setUp(self):
+        self.socks = []
+
+    def tearDown(self):
+        for sock in self.socks:
+            sock.close()
+
+    def _makefile(self):
+        server, client = socketpair()
+        self.socks.extend([server, client])
+        return makefile(server, 'rb', 16), client
+
+    def test_read_head(self):
+        rfile, client = self._makefile()
+        head = ntob("GET / HTTP/1.1\r\nHost: a\r\n\r\n")
+        # Whatever follows the head stays buffered for the body.
+        client.sendall(head + ntob("body"))
+        self.assertEqual(rfile.read_head(), head)
+        self.assertEqual(rfile.read(4), ntob("body"))
+
+    def test_read_head_pipelined(self):
+        rfile, client = self._makefile()
+        first = ntob("GET /a HTTP/1.1\r\nHost: a\r\n\r\n")
+        second = ntob("GET /b HTTP/1.1\r\nHost: a\r\n\r\n")
+        client.sendall(first + second)
+        self.assertEqual(rfile.read_head(), first)
+        self.assertEqual(rfile.read_head(), second)
+
+    def test_read_head_split(self):
+        rfile, client = self._makefile()
+        # The blank line is split between two reads.
+        client.sendall(ntob("GET / HTTP/1.1\r\nHost: a\r\n\r"))
+        timer = threading.Timer(0.1, client.sendall, [ntob("\nbody")])
+        timer.start()
+        try:
+            self.assertEqual(rfile.read_head(),
+                             ntob("GET / HTTP/1.1\r\nHost: a\r\n\r\n"))
+        finally:
+            timer.join()
+        self.assertEqual(rfile.read(4), ntob("body"))
+
+    def test_read_head_maxlen_and_eof(self):
+        rfile, client = self._makefile()
+        client.sendall(ntob("GET /" + "x" * 100))
+        # More than maxlen without a blank line: give up with what we have.
+        data = rfile.read_head(10)
+        self.assertTrue(len(data) > 10)
+        self.assertEqual(data, ntob("GET /" + "x" * 100)[:len(data)])
+
+        # At EOF, whatever is left is returned.
+        rest = ntob("GET /" + "x" * 100)[len(data):]
+        client.sendall(ntob("\r\nHost: a"))
+        client.shutdown(socket.SHUT_WR)
+        self.assertEqual(rfile.read_head(), rest + ntob("\r\nHost: a"))
+        self.assertEqual(rfile.read_head(), ntob(""))
+
+
+class FakeConn(object):
+    """A stand-in HTTPConnection, writing to one end of a socketpair."""
+
+    def __init__(self, sock):
+        self.socket = sock
+        self.wfile = makefile(sock, 'wb')
+        self.sends_saved = 0
+
+
+class TrickleSocket(object):
+    """Wraps a socket, sending no more than 5 bytes per sendmsg call."""
+
+    def __init__(self, sock):
+        self.sock = sock
+
+    def sendmsg(self, buffers):
+        data = ntob("").join([bytes(b) for b in buffers])
+        return self.sock.send(data[:5])
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
+
+
+class SendTests(unittest.TestCase):
+
+    headers = ntob("HTTP/1.1 200 OK\r\nServer: test\r\n\r\n")
+
+    def setUp(self):
+        self.server = wsgiserver.HTTPServer(('127.0.0.1', 0), None)
+        self.socks = socketpair()
+
+    def tearDown(self):
+        for sock in self.socks:
+            sock.close()
+
+    def request(self, sock):
+        req = wsgiserver.HTTPRequest(self.server, FakeConn(sock))
+        req._pending_headers = self.headers
+        return req
+
+    def read(self, length):
+        client = self.socks[1]
+        client.settimeout(5)
+        data = ntob("")
+        while len(data) < length:
+            data += client.recv(8192)
+        return data
+
+    def test_sends_saved(self):
+        # An empty chunk saves no send...
+        req = self.request(self.socks[0])
+        req.write(ntob(""))
+        self.assertEqual(req.conn.sends_saved, 0)
+        req.write(ntob("Hello, world"))
+        self.assertEqual(req.conn.sends_saved, 0)
+        self.assertEqual(self.read(len(self.headers) + 12),
+                         self.headers + ntob("Hello, world"))
+
+        # ...but one sent along with the headers does.
+        req = self.request(self.socks[0])
+        req.write(ntob("Hello, world"))
+        self.assertEqual(req.conn.sends_saved, 1)
+        self.assertEqual(self.read(len(self.headers) + 12),
+                         self.headers + ntob("Hello, world"))
+
+    def test_partial_sendmsg(self):
+        if not hasattr(socket.socket, 'sendmsg'):
+            self.skipTest("This socket module has no sendmsg.")
+        req = self.request(TrickleSocket(self.socks[0]))
+        req.chunked_write = True
+        req.write(ntob("Hello, world"))
+        expected = self.headers + ntob("c\r\nHello, world\r\n")
+        self.assertEqual(self.read(len(expected)), expected)
+        self.assertEqual(req.conn.wfile.bytes_written, len(expected))
+        self.assertEqual(req.conn.sends_saved, 1)
+
+
+class FakeClock(object):
+    """Stands in for the time module in cherrypy.wsgiserver.clock."""
+
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def install(self, testcase):
+        testcase.addCleanup(setattr, clock, 'time', clock.time)
+        clock.time = self
+
+
+class ClockCacheTests(unittest.TestCase):
+
+    def test_http_date(self):
+        fake = FakeClock(1000000000.2)
+        fake.install(self)
+        expected = ntob(email.utils.formatdate(1000000000, usegmt=True))
+        self.assertEqual(wsgiserver.http_date(), expected)
+
+        # Later in the same second, the cached date is returned...
+        formatted = []
+        cache = wsgiserver.ClockCache(lambda t: formatted.append(t) or t)
+        self.assertEqual(cache(), 1000000000.2)
+        fake.now = 1000000000.9
+        self.assertEqual(wsgiserver.http_date(), expected)
+        self.assertEqual(cache(), 1000000000.2)
+        self.assertEqual(formatted, [1000000000.2])
+
+        # ...and the next second it is reformatted.
+        fake.now = 1000000001.0
+        self.assertEqual(wsgiserver.http_date(),
+                         ntob(email.utils.formatdate(1000000001, usegmt=True)))
+        self.assertEqual(cache(), 1000000001.0)
+
+
+class HistogramTests(unittest.TestCase):
+
+    def test_empty(self):
+        h = wsgiserver.Histogram()
+        self.assertEqual(h.percentile(50), None)
+        self.assertEqual(h.summary(), {'Count': 0, 'Mean': None, 'Max': 0,
+                                       'p50': None, 'p90': None, 'p99': None})
+
+    def test_percentile(self):
+        h = wsgiserver.Histogram(lowest=1, factor=2, buckets=8)
+        for i in range(1, 101):
+            h.add(i)
+        # Each percentile is the upper bound of the bucket which holds it.
+        self.assertEqual(h.percentile(1), 1)
+        self.assertEqual(h.percentile(10), 16)
+        self.assertEqual(h.percentile(50), 64)
+        # ...but no more than the largest value added.
+        self.assertEqual(h.percentile(90), 100)
+        self.assertEqual(h.percentile(100), 100)
+
+        # 65 to 100 fall in the last bucket (up to 128)...
+        self.assertEqual(h.counts[-1], 36)
+        # ...as do values beyond it.
+        h.add(1000)
+        self.assertEqual(h.counts[-1], 37)
+        self.assertEqual(h.percentile(100), 1000)
+
+    def test_summary(self):
+        h = wsgiserver.Histogram(lowest=1, factor=2, buckets=8)
+        for v in [1, 2, 3, 4, 10]:
+            h.add(v)
+        self.assertEqual(h.summary(), {'Count': 5, 'Mean': 4, 'Max': 10,
+                                       'p50': 4, 'p90': 10, 'p99': 10})
+
+    def test_update_and_clear(self):
+        a = wsgiserver.Histogram(lowest=1, factor=2, buckets=8)
+        b = wsgiserver.Histogram(lowest=1, factor=2, buckets=8)
+        a.add(2)
+        b.add(8)
+        b.add(20)
+        c = a.copy()
+        c.update(b)
+        self.assertEqual((c.count, c.total, c.max), (3, 30, 20))
+        self.assertEqual(c.percentile(50), 8)
+        self.assertEqual((a.count, a.total, a.max), (1, 2, 2))
+
+        c.clear()
+        self.assertEqual((c.count, c.total, c.max), (0, 0, 0))
+        self.assertEqual(c.percentile(50), None)
+
+
+class BlockingConn(object):
+    """A stand-in connection which keeps its worker busy until released."""
+
+    def __init__(self, released):
+        self.released = released
+
+    def communicate(self):
+        self.released.wait()
+
+    def close(self):
+        pass
+
+
+class AutoscaleTests(unittest.TestCase):
+
+    def setUp(self):
+        self.server = wsgiserver.HTTPServer(('127.0.0.1', 0), None)
+        self.pool = self.server.requests = wsgiserver.ThreadPool(
+            self.server, min=1, max=3)
+        self.released = threading.Event()
+
+    def tearDown(self):
+        self.released.set()
+        self.pool.stop(5)
+
+    def wait_for(self, func, timeout=5):
+        endtime = time.time() + timeout
+        while not func():
+            if time.time() > endtime:
+                self.fail("Timed out waiting for %r" % func)
+            time.sleep(0.01)
+
+    def test_grow_and_shrink(self):
+        pool = self.pool
+        pool.start()
+        self.assertEqual(len(pool._threads), 1)
+
+        for i in range(5):
+            pool.put(BlockingConn(self.released))
+        self.wait_for(lambda: pool.qsize == 4)
+
+        # Grow by the backlog, but not above max.
+        pool.autoscale()
+        self.assertEqual(len(pool._threads), 3)
+        self.assertEqual(pool.grown, 2)
+        self.wait_for(lambda: pool.qsize == 2)
+        pool.autoscale()
+        self.assertEqual(len(pool._threads), 3)
+        self.assertEqual(pool.grown, 2)
+
+        self.released.set()
+        self.wait_for(lambda: pool.qsize == 0 and pool.idle == 3)
+        for t in pool._threads:
+            t.histograms['Service Time'].add(1)
+
+        # Shrink only after a whole idle period, and not below min.
+        self.server.autoscale_idle_period = 0
+        pool.autoscale()
+        self.assertEqual(pool.shrunk, 0)
+        pool.autoscale()
+        self.assertEqual(pool.shrunk, 2)
+        self.wait_for(lambda: len([t for t in pool._threads
+                                   if t.isAlive()]) == 1)
+        pool.autoscale()
+        self.assertEqual(len(pool._threads), 1)
+        self.assertEqual(pool.shrunk, 2)
+        # The counts of the threads which were shut down are kept.
+        self.assertEqual(
+            self.server.histograms()['Service Time'].count, 3)
+
+    def test_unbounded(self):
+        pool = self.pool
+        pool.max = -1
+        self.server.autoscale_interval = 1
+        self.assertRaises(ValueError, pool.start)
+        # No worker was left running.
+        self.assertEqual(pool._threads, [])
+
+    def test_histograms_stat(self):
+        self.pool.start()
+        self.pool._threads[0].histograms['Service Time'].add(1)
+        stats = self.server.stats
+
+        # With stats disabled, the histograms are not even merged.
+        def histograms():
+            self.fail("Histograms merged with stats disabled")
+        self.server.histograms = histograms
+        self.assertEqual(stats['Histograms'](stats), {})
+
+        del self.server.histograms
+        stats['Enabled'] = True
+        summary = stats['Histograms'](stats)
+        self.assertEqual(summary['Service Time']['Count'], 1)
+
+
+def hello_app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain'),
+                              ('Content-Length', '12')])
+    return [ntob('Hello, world')]
+
+
+class SSLTests(unittest.TestCase):
+
+    adapter = 'builtin'
+
+    def setUp(self):
+        if ssl is None or not hasattr(ssl, 'SSLContext'):
+            self.skipTest("The ssl module has no SSLContext.")
+        try:
+            adapter = wsgiserver.get_ssl_adapter_class(self.adapter)(
+                serverpem, serverpem)
+        except ImportError:
+            self.skipTest("The %s SSL adapter is not available." % self.adapter)
+        self.server = wsgiserver.CherryPyWSGIServer(
+            ('127.0.0.1', 0), hello_app, numthreads=2)
+        self.server.ssl_adapter = adapter
+        self.server.listen()
+        self.addr = self.server.socket.getsockname()
+        self.thread = threading.Thread(target=self.server.serve)
+        self.thread.start()
+        while not self.server.ready:
+            time.sleep(0.01)
+
+    def tearDown(self):
+        if hasattr(self, 'server'):
+            self.server.stop()
+            self.thread.join()
+
+    def get(self, context, **kwargs):
+        """Request / over a new TLS connection, and return its session."""
+        sock = context.wrap_socket(socket.create_connection(self.addr),
+                                   **kwargs)
+        try:
+            sock.sendall(ntob("GET / HTTP/1.1\r\nHost: a\r\n"
+                              "Connection: close\r\n\r\n"))
+            # Read just the response: the server closes the connection
+            # without a TLS close_notify, which some OpenSSLs report.
+            sock.settimeout(5)
+            response = ntob("")
+            while not response.endswith(ntob("Hello, world")):
+                data = sock.recv(8192)
+                if not data:
+                    break
+                response += data
+            self.assertTrue(response.startswith(ntob("HTTP/1.1 200 OK")))
+            self.assertTrue(response.endswith(ntob("Hello, world")))
+            return getattr(sock, 'session', None)
+        finally:
+            sock.close()
+
+    def test_resumption(self):
+        context = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+        adapter = self.server.ssl_adapter
+        session = self.get(context)
+        self.assertEqual(adapter.handshakes, 1)
+        self.assertEqual(adapter.resumptions, 0)
+
+        if session is None:
+            # This ssl module can't offer a session to resume.
+            self.get(context)
+            self.assertEqual(adapter.handshakes, 2)
+            self.assertEqual(adapter.resumptions, 0)
+            return
+
+        self.get(context, session=session)
+        self.assertEqual(adapter.handshakes, 2)
+        self.assertEqual(adapter.resumptions, 1)
+        stats = self.server.stats
+        self.assertEqual(stats['SSL Handshakes'](stats), 2)
+        self.assertEqual(stats['SSL Resumptions'](stats), 1)
+
+    def test_silent_client(self):
+        if self.adapter != 'builtin':
+            # pyOpenSSL does the handshake on the first read, which is
+            # limited by server.timeout instead.
+            self.skipTest("The handshake is not done by wrap.")
+        # A client which never starts the TLS handshake holds up only the
+        # worker which picked it up, and only for ssl_handshake_timeout.
+        self.server.ssl_handshake_timeout = 2
+        silent = socket.create_connection(self.addr)
+        try:
+            time.sleep(0.2)
+            start = time.time()
+            self.get(ssl.SSLContext(ssl.PROTOCOL_SSLv23))
+            self.assertTrue(time.time() - start < 1)
+
+            silent.settimeout(5)
+            self.assertEqual(silent.recv(1), ntob(""))
+            self.assertTrue(time.time() - start < 3)
+        finally:
+            silent.close()
+
+
+if not py3k:
+    class pyOpenSSLTests(SSLTests):
+
+        adapter = 'pyopenssl'
+
+
+class ListenTests(unittest.TestCase):
+
+    def serve(self, **attrs):
+        self.server = wsgiserver.CherryPyWSGIServer(
+            ('127.0.0.1', 0), hello_app, numthreads=4, request_queue_size=64)
+        for k, v in attrs.items():
+            setattr(self.server, k, v)
+        self.server.listen()
+        self.addr = self.server.socket.getsockname()
+        self.thread = threading.Thread(target=self.server.serve)
+        self.thread.start()
+        while not self.server.ready:
+            time.sleep(0.01)
+
+    def tearDown(self):
+        if hasattr(self, 'server'):
+            self.server.stop()
+            self.thread.join()
+
+    def get(self, sock):
+        sock.sendall(ntob("GET / HTTP/1.1\r\nHost: a\r\n\r\n"))
+        sock.settimeout(5)
+        response = ntob("")
+        while not response.endswith(ntob("Hello, world")):
+            data = sock.recv(8192)
+            if not data:
+                break
+            response += data
+        return response
+
+    def test_accept_batch(self):
+        self.serve(accept_batch=8)
+        self.server.stats['Enabled'] = True
+        # Connect all the clients before any of them is accepted, so that
+        # they wait together in the listen backlog.
+        socks = [socket.create_connection(self.addr) for i in range(30)]
+        try:
+            for sock in socks:
+                response = self.get(sock)
+                self.assertTrue(response.startswith(ntob("HTTP/1.1 200 OK")))
+                self.assertTrue(response.endswith(ntob("Hello, world")))
+        finally:
+            for sock in socks:
+                sock.close()
+        self.assertEqual(self.server.stats['Accepts'], 30)
+
+    def test_defer_accept(self):
+        if not hasattr(socket, 'TCP_DEFER_ACCEPT'):
+            self.skipTest("This platform has no TCP_DEFER_ACCEPT.")
+        self.serve(defer_accept=1)
+        # A client which connects and then waits longer than defer_accept
+        # before it speaks is still answered.
+        sock = socket.create_connection(self.addr)
+        try:
+            time.sleep(2)
+            response = self.get(sock)
+        finally:
+            sock.close()
+        self.assertTrue(response.startswith(ntob("HTTP/1.1 200 OK")))
+        self.assertTrue(response.endswith(ntob("Hello, world")))
+
+
+class SlowAppTestCase(unittest.TestCase):
+    """Serve an app which holds up its worker until self.released is set."""
+
+    numthreads = 2
+    request_queue_size = 5
+
+    def setUp(self):
+        self.entered = threading.Event()
+        self.released = threading.Event()
+        self.server = wsgiserver.CherryPyWSGIServer(
+            ('127.0.0.1', 0), self.slow_app, numthreads=self.numthreads,
+            request_queue_size=self.request_queue_size)
+        self.server.listen()
+        self.addr = self.server.socket.getsockname()
+        self.thread = threading.Thread(target=self.server.serve)
+        self.thread.start()
+        while not self.server.ready:
+            time.sleep(0.01)
+
+    def tearDown(self):
+        self.released.set()
+        self.server.stop()
+        self.thread.join()
+
+    def slow_app(self, environ, start_response):
+        self.entered.set()
+        self.released.wait(5)
+        return hello_app(environ, start_response)
+
+
+class StopTests(SlowAppTestCase):
+
+    def test_drain(self):
+        sock = socket.create_connection(self.addr)
+        try:
+            # A keep-alive request, in progress when the server stops...
+            sock.sendall(ntob("GET / HTTP/1.1\r\nHost: a\r\n\r\n"))
+            self.entered.wait(5)
+            stopper = threading.Thread(target=self.server.stop)
+            stopper.start()
+            try:
+                while not self.server.draining:
+                    time.sleep(0.01)
+                self.released.set()
+
+                # ...is answered in full, and then the connection is closed.
+                sock.settimeout(5)
+                response = ntob("")
+                while True:
+                    data = sock.recv(8192)
+                    if not data:
+                        break
+                    response += data
+            finally:
+                stopper.join()
+        finally:
+            sock.close()
+        head, body = response.split(ntob("\r\n\r\n"), 1)
+        lines = head.split(ntob("\r\n"))
+        self.assertEqual(lines[0], ntob("HTTP/1.1 200 OK"))
+        self.assertTrue(ntob("Connection: close") in lines[1:])
+        self.assertEqual(body, ntob("Hello, world"))
+
+
+
+class ShedTests(SlowAppTestCase):
+
+    numthreads = 1
+    # Don't let the listen backlog (rather than shedding) hold clients up.
+    request_queue_size = 64
+
+    def test_flood(self):
+        server = self.server
+        server.max_queue_size = 1
+        # Long enough that lingering in the accepting thread would show.
+        server.shed_linger = 5
+
+        busy = socket.create_connection(self.addr)
+        queued = socket.create_connection(self.addr)
+        clients = []
+        try:
+            # Tie up the only worker, and fill the queue.
+            busy.sendall(ntob("GET / HTTP/1.1\r\nHost: a\r\n\r\n"))
+            self.entered.wait(5)
+            queued.sendall(ntob("GET / HTTP/1.1\r\nHost: a\r\n\r\n"))
+            while server.requests.qsize < 1:
+                time.sleep(0.01)
+
+            # Every new client gets its 503 at once, though none of them
+            # closes its end of the connection.
+            start = time.time()
+            for i in range(20):
+                sock = socket.create_connection(self.addr)
+                clients.append(sock)
+                sock.sendall(ntob("GET / HTTP/1.1\r\nHost: a\r\n\r\n"))
+            for sock in clients:
+                sock.settimeout(5)
+                response = ntob("")
+                while not response.endswith(ntob("try again later.")):
+                    data = sock.recv(8192)
+                    if not data:
+                        break
+                    response += data
+                self.assertTrue(
+                    response.startswith(ntob("HTTP/1.1 503 Service Unavailable")))
+                self.assertTrue(ntob("Connection: close") in response)
+            self.assertTrue(time.time() - start < 2)
+
+            # Once the clients close, so does the server.
+            for sock in clients:
+                sock.close()
+            lingering = server.connections._lingering
+            endtime = time.time() + 2
+            while lingering and time.time() < endtime:
+                time.sleep(0.01)
+            self.assertEqual(lingering, {})
+        finally:
+            for sock in clients + [busy, queued]:
+                sock.close()
+
+
+if py3k:
+    class BufferedReaderTests(unittest.TestCase):
+
+        def setUp(self):
+            self.socks = []
+
+        def tearDown(self):
+            for sock in self.socks:
+                sock.close()
+
+        def _reader(self, data, bufsize=16):
+            """Return a CP_BufferedReader for a socket which has been sent
+            the given data, and then EOF."""
+            server, client = socketpair()
+            self.socks.extend([server, client])
+            client.sendall(data)
+            client.shutdown(socket.SHUT_WR)
+            return wsgiserver.CP_BufferedReader(server, bufsize)
+
+        def test_readline(self):
+            lines = [b"short\n", b"x" * 40 + b"\n", b"y" * 15 + b"\n",
+                     b"no newline at EOF"]
+            rfile = self._reader(b"".join(lines))
+            # Lines longer than the buffer are read across several refills.
+            for line in lines:
+                self.assertEqual(rfile.readline(), line)
+            self.assertEqual(rfile.readline(), b"")
+
+        def test_readline_size(self):
+            rfile = self._reader(b"a" * 40 + b"\nb\n")
+            self.assertEqual(rfile.readline(30), b"a" * 30)
+            self.assertEqual(rfile.readline(30), b"a" * 10 + b"\n")
+            self.assertEqual(list(rfile), [b"b\n"])
+
+        def test_read(self):
+            data = bytes(bytearray(range(256))) * 4
+            rfile = self._reader(data)
+            self.assertEqual(rfile.read(10), data[:10])
+            self.assertEqual(rfile.read(100), data[10:110])
+            self.assertEqual(rfile.read(), data[110:])
+            self.assertEqual(rfile.read(), b"")
+            self.assertEqual(rfile.read(10), b"")
+            self.assertEqual(rfile.bytes_read, len(data))
+
+        def test_readinto(self):
+            data = bytes(bytearray(range(256))) * 4
+            rfile = self._reader(data)
+            self.assertEqual(rfile.readline(), data[:11])
+
+            # Partly from the buffer, then refilling it...
+            b = bytearray(20)
+            self.assertEqual(rfile.readinto(b), 20)
+            self.assertEqual(bytes(b), data[11:31])
+            # ...and straight into the caller's buffer, if it's bigger.
+            b = bytearray(500)
+            self.assertEqual(rfile.readinto(b), 500)
+            self.assertEqual(bytes(b), data[31:531])
+
+            # Fewer bytes only at EOF.
+            b = bytearray(1000)
+            self.assertEqual(rfile.readinto(b), len(data) - 531)
+            self.assertEqual(bytes(b[:len(data) - 531]), data[531:])
+            self.assertEqual(rfile.readinto(b), 0)
+
+        def test_chunked(self):
+            body = (b"5\r\nhello\r\n"
+                    b"17;ext=1\r\n, world\nthis line spans\r\n"
+                    b"7\r\n chunks\r\n"
+                    b"0\r\nX-Trailer: 1\r\n\r\n")
+            expected = b"hello, world\nthis line spans chunks"
+
+            rfile = wsgiserver.ChunkedRFile(self._reader(body), 0)
+            self.assertEqual(rfile.read(), expected)
+            self.assertEqual(rfile.read(), b"")
+            self.assertEqual(list(rfile.read_trailer_lines()),
+                             [b"X-Trailer: 1\r\n"])
+
+            rfile = wsgiserver.ChunkedRFile(self._reader(body), 0)
+            self.assertEqual(rfile.readline(), b"hello, world\n")
+            self.assertEqual(rfile.readline(), b"this line spans chunks")
+            self.assertEqual(rfile.readline(), b"")
+
+            rfile = wsgiserver.ChunkedRFile(self._reader(body), 0)
+            b = bytearray(8)
+            self.assertEqual(rfile.readinto(b), 8)
+            self.assertEqual(bytes(b), expected[:8])
+            b = bytearray(100)
+            self.assertEqual(rfile.readinto(b), len(expected) - 8)
+            self.assertEqual(bytes(b[:len(expected) - 8]), expected[8:])
+            self.assertEqual(rfile.readinto(b), 0)
+
+        def test_chunked_errors(self):
+            rfile = wsgiserver.ChunkedRFile(self._reader(b"zz\r\n"), 0)
+            self.assertRaises(ValueError, rfile.read)
+            rfile = wsgiserver.ChunkedRFile(
+                self._reader(b"3\r\nabcX\r\n0\r\n\r\n"), 0)
+            self.assertRaises(ValueError, rfile.read)
+            rfile = wsgiserver.ChunkedRFile(
+                self._reader(b"10\r\n" + b"x" * 16 + b"\r\n0\r\n\r\n"), 8)
+            self.assertRaises(IOError, rfile.read)
+
+            # A body cut off in the middle of a chunk ends there.
+            rfile = wsgiserver.ChunkedRFile(self._reader(b"10\r\nabc"), 0)
+            self.assertEqual(rfile.read(), b"abc")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,614 @@
+"""An HTTP server which waits on its clients with asyncio (Python 3.5+).
+
+The HTTPServer in wsgiserver3 blocks a worker thread on each connection
+for as long as it is reading a request; a client which is slow to send its
+request line and headers (or one which just sits on a keep-alive
+connection) costs a thread the whole time.
+
+AsyncioHTTPServer accepts connections and receives data on a single
+asyncio event loop instead. Each request's start-line and headers are
+collected and parsed on the loop; only once a request is ready to be
+answered is its connection put on the ThreadPool (server.requests), where
+a worker thread calls the Gateway (WSGIGateway, NativeGateway, etc) just
+as it would for HTTPServer, then hands the connection back to the loop.
+So the number of worker threads bounds the number of requests being
+answered at once, while idle and slow clients cost no threads at all.
+
+To use it, substitute AsyncioWSGIServer for CherryPyWSGIServer; or, for a
+different Gateway, subclass both AsyncioHTTPServer and your server class::
+
+    class MyServer(AsyncioHTTPServer, MyHTTPServer):
+        pass
+
+Within CherryPy, set ``server.asyncio = True`` in config.
+
+Worker threads still read request bodies and write responses as if they
+were talking to a blocking socket, through file objects which pass the
+data to and from the loop; server.timeout applies to each wait.
+"""
+
+__all__ = ['AsyncioHTTPServer', 'AsyncioWSGIServer', 'AsyncioHTTPConnection',
+           'AsyncioConnectionManager']
+
+import asyncio
+import collections
+import concurrent.futures
+import errno
+import socket
+import threading
+import time
+
+try:
+    import ssl
+except ImportError:
+    ssl = None
+
+from cherrypy.wsgiserver.wsgiserver3 import (
+    CP_BufferedReader, CherryPyWSGIServer, DEFAULT_BUFFER_SIZE,
+    HTTPConnection, HTTPServer, _find_head_end, logging)
+
+
+class AsyncioReader(CP_BufferedReader):
+    """A CP_BufferedReader which is fed data by the event loop.
+
+    The loop hands received data to feed(); the reader (on the loop while
+    a request is being parsed, or in a worker thread while its body is
+    read) takes it from there, waiting up to timeout seconds when none has
+    arrived yet. The loop stops reading from the transport while more than
+    high_water bytes are waiting to be read.
+    """
+
+    high_water = 65536
+    """Reading from the transport pauses while this many bytes are waiting."""
+
+    def __init__(self, protocol, bufsize=DEFAULT_BUFFER_SIZE, timeout=None):
+        CP_BufferedReader.__init__(self, None, bufsize)
+        self.protocol = protocol
+        self.timeout = timeout
+        self._chunks = collections.deque()
+        self._waiting = 0
+        self._eof = False
+        self._cond = threading.Condition()
+
+    def feed(self, data):
+        """Add the given data (from the event loop). Return the number of
+        bytes now waiting to be read."""
+        with self._cond:
+            self._chunks.append(data)
+            self._waiting += len(data)
+            self._cond.notify()
+            return self._waiting
+
+    def feed_eof(self):
+        """Note that the client will send no more data."""
+        with self._cond:
+            self._eof = True
+            self._cond.notify_all()
+
+    def _recv_into(self, view):
+        with self._cond:
+            if not self._cond.wait_for(
+                    lambda: self._chunks or self._eof or self.closed,
+                    self.timeout):
+                raise socket.timeout("timed out")
+            if not self._chunks:
+                return 0
+            data = self._chunks[0]
+            n = min(len(view), len(data))
+            view[:n] = memoryview(data)[:n]
+            if n < len(data):
+                self._chunks[0] = memoryview(data)[n:]
+            else:
+                self._chunks.popleft()
+            self._waiting -= n
+            resume = self._waiting <= self.high_water // 2
+        if resume:
+            self.protocol.resume_reading()
+        self.bytes_read += n
+        return n
+
+    def absorb(self):
+        """Move everything fed so far into the buffer, without waiting."""
+        while self._chunks:
+            self._fill()
+
+    def has_data(self):
+        return self._end > self._start or bool(self._chunks)
+
+    def has_line(self):
+        self.absorb()
+        return CP_BufferedReader.has_line(self)
+
+    def has_head(self, maxlen=0):
+        """Return True if read_head(maxlen) would return without waiting:
+        a blank line has arrived, or more than maxlen bytes, or EOF."""
+        self.absorb()
+        if self._eof:
+            return True
+        if maxlen and self._end - self._start > maxlen:
+            return True
+        return _find_head_end(self._buf, self._start, self._end) >= 0
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class AsyncioWriter(object):
+    """A write-only file object which sends through the protocol's transport.
+
+    Writes made on the event loop (for example, error responses sent while
+    parsing) go straight to the transport. Writes from a worker thread are
+    passed to the loop, and return once the transport has taken the data
+    and isn't over its high-water mark, or raise socket.timeout after
+    timeout seconds.
+    """
+
+    def __init__(self, protocol, timeout=None):
+        self.protocol = protocol
+        self.timeout = timeout
+        self.bytes_written = 0
+        self.closed = False
+
+    def write(self, data):
+        if not data:
+            return
+        protocol = self.protocol
+        if protocol.lost:
+            raise socket.error(errno.EPIPE, "Broken pipe")
+        if protocol.on_loop():
+            protocol.transport.write(data)
+        else:
+            future = asyncio.run_coroutine_threadsafe(
+                protocol.send(bytes(data)), protocol.loop)
+            try:
+                future.result(self.timeout)
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                raise socket.timeout("timed out")
+        self.bytes_written += len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class AsyncioProtocol(asyncio.Protocol):
+    """Moves the data of one connection between the event loop and its
+    AsyncioHTTPConnection."""
+
+    def __init__(self, server):
+        self.server = server
+        self.loop = server._loop
+        self.transport = None
+        self.conn = None
+        self.lost = False
+        self.reading_paused = False
+        self._drained = None
+
+    def on_loop(self):
+        """Return True if called from the event loop's thread."""
+        return threading.current_thread() is self.server._loop_thread
+
+    def connection_made(self, transport):
+        server = self.server
+        self.transport = transport
+        if server.stats['Enabled']:
+            server.stats['Accepts'] += 1
+
+        conn = server.ConnectionClass(server, self)
+        if not isinstance(server.bind_addr, str):
+            # Until we do DNS lookups, omit REMOTE_HOST
+            addr = transport.get_extra_info('peername')
+            if not addr:
+                if len(transport.get_extra_info('sockname')) == 2:
+                    addr = ('0.0.0.0', 0)
+                else:
+                    addr = ('::', 0)
+            conn.remote_addr = addr[0]
+            conn.remote_port = addr[1]
+
+        cipher = transport.get_extra_info('cipher')
+        if cipher:
+            conn.ssl_env = {
+                "wsgi.url_scheme": "https",
+                "HTTPS": "on",
+                'SSL_PROTOCOL': cipher[1],
+                'SSL_CIPHER': cipher[0],
+                }
+        else:
+            conn.ssl_env = {}
+
+        self.conn = conn
+        server.connections.watch(conn)
+
+    def data_received(self, data):
+        waiting = self.conn.rfile.feed(data)
+        if waiting > self.conn.rfile.high_water and not self.reading_paused:
+            self.reading_paused = True
+            self.transport.pause_reading()
+        self.server.connections.check(self.conn)
+
+    def eof_received(self):
+        self.conn.rfile.feed_eof()
+        self.server.connections.check(self.conn)
+        # Keep the transport open, so the response can still be written.
+        # (SSL transports can't be half-closed; asyncio complains if asked.)
+        return not self.conn.ssl_env
+
+    def connection_lost(self, exc):
+        self.lost = True
+        if self.conn is not None:
+            self.conn.rfile.feed_eof()
+            self.server.connections.forget(self.conn)
+        self._wake_writers()
+
+    def pause_writing(self):
+        if self._drained is None:
+            self._drained = self.loop.create_future()
+
+    def resume_writing(self):
+        self._wake_writers()
+
+    def _wake_writers(self):
+        if self._drained is not None:
+            if not self._drained.done():
+                self._drained.set_result(None)
+            self._drained = None
+
+    async def send(self, data):
+        """Write data to the transport, then wait until it can take more."""
+        if self.lost:
+            raise socket.error(errno.EPIPE, "Broken pipe")
+        self.transport.write(data)
+        if self._drained is not None:
+            await self._drained
+        if self.lost:
+            raise socket.error(errno.EPIPE, "Broken pipe")
+
+    def resume_reading(self):
+        """Start reading from the transport again, if it was paused.
+        May be called from any thread."""
+        if self.reading_paused:
+            self.call(self._resume_reading)
+
+    def _resume_reading(self):
+        if self.reading_paused and not self.lost:
+            self.reading_paused = False
+            self.transport.resume_reading()
+
+    def call(self, func, *args):
+        """Call func(*args) on the event loop (now, if we're on it)."""
+        if self.on_loop():
+            func(*args)
+        else:
+            try:
+                self.loop.call_soon_threadsafe(func, *args)
+            except RuntimeError:
+                # The loop has been closed.
+                pass
+
+    def close(self):
+        """Close the transport (once anything already written has gone)."""
+        self.call(self._close)
+
+    def _close(self):
+        self.server.connections.forget(self.conn)
+        if self.transport is not None:
+            self.transport.close()
+
+
+class AsyncioHTTPConnection(HTTPConnection):
+    """An HTTP connection whose data comes and goes via the event loop.
+
+    Its rfile and wfile talk to an AsyncioProtocol rather than a socket,
+    so the socket attribute is None.
+    """
+
+    socket = None
+
+    def __init__(self, server, protocol):
+        self.server = server
+        self.protocol = protocol
+        self.rfile = AsyncioReader(protocol, self.rbufsize, server.timeout)
+        self.wfile = AsyncioWriter(protocol, server.timeout)
+        self.requests_seen = 0
+        self.sends_saved = 0
+
+    def has_pending_data(self):
+        # Let the event loop parse any pipelined request: never keep the
+        # worker thread.
+        return False
+
+    def close(self):
+        """Close the connection (from the event loop, when it gets to it)."""
+        self.rfile.close()
+        self.wfile.close()
+        self.protocol.close()
+
+
+class AsyncioConnectionManager(object):
+    """Holds connections on the event loop between requests.
+
+    This takes the place of ConnectionManager for AsyncioHTTPServer. New
+    connections, and keep-alive connections which worker threads put()
+    back after a response, are watched here until a whole request head
+    (start-line and headers) has arrived; the server then parses it and
+    queues the connection for a worker. Connections which wait longer than
+    server.timeout are closed (with "408 Request Timeout" if they've sent
+    part of a request, or are new); idle keep-alive connections may instead
+    wait for server.keepalive_timeout, and the longest-idle ones are closed
+    whenever more than server.keepalive_max_connections are waiting.
+    """
+
+    poll_interval = 0.5
+    """How often, in seconds, to look for connections which have waited
+    too long."""
+
+    def __init__(self, server, loop):
+        self.server = server
+        self.loop = loop
+        self.ready = False
+        # Oldest first, so the longest-idle connections can be found quickly.
+        self._conns = collections.OrderedDict()
+        self._timer = None
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._conns)
+
+    def _get_idle(self):
+        """Number of connections waiting for a request. Read-only."""
+        return len(self._conns)
+    idle = property(_get_idle, doc=_get_idle.__doc__)
+
+    def start(self):
+        """Start looking for expired connections (on the event loop)."""
+        self.ready = True
+        self._timer = self.loop.call_later(self.poll_interval, self._expire)
+
+    def put(self, conn):
+        """Hand the given connection back to the event loop, to wait for
+        its next request. May be called from any thread."""
+        conn.protocol.call(self.watch, conn)
+
+    def watch(self, conn):
+        """Wait (on the event loop) for a request on the given connection."""
+        if not self.ready or conn.protocol.lost:
+            conn.close()
+            return
+        self._conns[conn] = time.time()
+        self.check(conn)
+        limit = self.server.keepalive_max_connections
+        if limit > 0 and len(self._conns) > limit:
+            self._evict(len(self._conns) - limit)
+
+    def _idle(self, conn):
+        """Return True if the given connection is between requests."""
+        return conn.last_used is not None and not conn.rfile.has_data()
+
+    def _evict(self, count):
+        """Close up to count of the longest-idle keep-alive connections."""
+        victims = []
+        for conn in self._conns:
+            if len(victims) >= count:
+                break
+            if self._idle(conn):
+                victims.append(conn)
+        for conn in victims:
+            del self._conns[conn]
+            conn.close()
+        self.evicted += len(victims)
+
+    def forget(self, conn):
+        self._conns.pop(conn, None)
+
+    def check(self, conn):
+        """Dispatch the given connection if its request head has arrived."""
+        if conn not in self._conns:
+            return
+        if not conn.rfile.has_head(self.server.max_request_header_size):
+            return
+        del self._conns[conn]
+        if not conn.rfile.has_data():
+            # The client closed the connection between requests.
+            conn.close()
+            return
+        self.server.dispatch(conn)
+
+    def _expire(self):
+        if not self.ready:
+            return
+        now = time.time()
+        deadline = now - self.server.timeout
+        idle_deadline = now - (self.server.keepalive_timeout or
+                               self.server.timeout)
+        for conn, since in list(self._conns.items()):
+            if since < (self._idle(conn) and idle_deadline or deadline):
+                del self._conns[conn]
+                if conn.last_used is None or conn.rfile.has_line():
+                    req = conn.RequestHandlerClass(self.server, conn)
+                    try:
+                        req.simple_response("408 Request Timeout")
+                    except socket.error:
+                        pass
+                conn.close()
+        self._timer = self.loop.call_later(self.poll_interval, self._expire)
+
+    def stop(self):
+        """Stop watching, and close all waiting connections (on the loop)."""
+        self.ready = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        conns = list(self._conns)
+        self._conns.clear()
+        for conn in conns:
+            conn.close()
+
+
+class AsyncioHTTPServer(HTTPServer):
+    """An HTTPServer which waits on its clients with an asyncio event loop.
+
+    Use this as a mixin, ahead of an HTTPServer subclass; see the module
+    docstring. The loop runs in the thread which calls start(). SSL is
+    supported with the builtin SSL adapter only.
+    """
+
+    ConnectionClass = AsyncioHTTPConnection
+    """The class to use for handling HTTP connections."""
+
+    _loop = None
+    _loop_thread = None
+    _listener = None
+
+    def serve(self):
+        """Answer connections on the listening socket until stopped.
+
+        This runs a new event loop in the calling thread, which accepts
+        connections in place of HTTPServer.tick.
+        """
+        ssl_context = self.get_ssl_context()
+
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        self._loop_thread = threading.current_thread()
+        try:
+            self._listener = loop.run_until_complete(loop.create_server(
+                lambda: AsyncioProtocol(self), sock=self.socket,
+                ssl=ssl_context, backlog=self.request_queue_size))
+
+            # Create worker threads
+            self.requests.start()
+
+            self.connections = AsyncioConnectionManager(self, loop)
+            self.connections.start()
+
+            self.ready = True
+            self._start_time = time.time()
+            loop.run_forever()
+        finally:
+            self.ready = False
+            if self._listener is not None:
+                self._listener.close()
+                self._listener = None
+            if self.connections is not None:
+                self.connections.stop()
+            # Let the transports we just closed finish closing.
+            loop.run_until_complete(asyncio.sleep(0))
+            loop.close()
+            self._loop = None
+            self._loop_thread = None
+            self.socket = None
+
+        if self.interrupt:
+            while self.interrupt is True:
+                # Wait for self.stop() to complete. See _set_interrupt.
+                time.sleep(0.1)
+            if self.interrupt:
+                raise self.interrupt
+
+    def get_ssl_context(self):
+        """Return the ssl.SSLContext of ssl_adapter (or None, for HTTP).
+
+        The builtin SSL adapter creates one shared context up front.
+        """
+        adapter = self.ssl_adapter
+        if adapter is None:
+            return None
+        context = getattr(adapter, 'context', None)
+        if ssl is None or not isinstance(context, ssl.SSLContext):
+            raise ValueError("AsyncioHTTPServer only supports the builtin "
+                             "SSL adapter.")
+        return context
+
+    def dispatch(self, conn):
+        """Parse the request which has arrived on the given connection
+        (on the event loop), and queue the connection for a worker."""
+        req = conn.RequestHandlerClass(self, conn)
+        try:
+            req.parse_request()
+        except Exception:
+            self.error_log("Error parsing request", level=logging.ERROR,
+                           traceback=True)
+            conn.close()
+            return
+        if self.stats['Enabled']:
+            conn.requests_seen += 1
+        if not req.ready:
+            # Something went wrong in the parsing (and the server has
+            # probably already made a simple_response).
+            conn.close()
+            return
+        conn.pending_request = req
+
+        if conn.last_used is None:
+            # Shed load on new connections only, as HTTPServer does.
+            overload = self.overloaded()
+            if overload:
+                if self.stats['Enabled']:
+                    self.stats[overload] += 1
+                conn.pending_request = None
+                self.shed(conn)
+                return
+
+        self.requests.put(conn)
+
+    def shed(self, conn):
+        """Answer the given connection with 503 and close it.
+
+        This runs on the event loop, which has already read everything the
+        client sent, and sends the response without blocking.
+        """
+        req = conn.RequestHandlerClass(self, conn)
+        try:
+            req.simple_response("503 Service Unavailable",
+                                "The server is too busy to handle this "
+                                "request; please try again later.")
+        except socket.error:
+            pass
+        finally:
+            conn.close()
+
+    def stop(self):
+        """Gracefully shutdown a server that is serving forever."""
+        self.ready = False
+        self.draining = True
+        if self._start_time is not None:
+            self._run_time += (time.time() - self._start_time)
+        self._start_time = None
+
+        loop = self._loop
+        if loop is not None:
+            # Stop accepting, and drop idle connections; but keep the loop
+            # running while the workers finish, since they write through it.
+            self._call_soon(self._stop_listening)
+        self.requests.stop(self.shutdown_timeout)
+        self.draining = False
+        if loop is not None:
+            self._call_soon(loop.stop)
+
+    def _call_soon(self, func):
+        loop = self._loop
+        try:
+            if threading.current_thread() is self._loop_thread:
+                loop.call_soon(func)
+            else:
+                loop.call_soon_threadsafe(func)
+        except (AttributeError, RuntimeError):
+            # The loop has stopped already.
+            pass
+
+    def _stop_listening(self):
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        if self.connections is not None:
+            self.connections.stop()
+
+
+class AsyncioWSGIServer(AsyncioHTTPServer, CherryPyWSGIServer):
+    """A CherryPyWSGIServer which waits on its clients with asyncio."""
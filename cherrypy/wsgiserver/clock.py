@@ -0,0 +1,32 @@
+"""Cache the formatted current time, which only changes once a second.
+
+This module is shared by wsgiserver2, wsgiserver3 and the CherryPy
+framework (see cherrypy.lib.httputil), and works on Python 2 and 3.
+"""
+
+import time
+
+
+class ClockCache(object):
+    """A callable which returns formatter(time.time()), reformatted at most
+    once per second.
+
+    Formatting the current time for every request (for the Date response
+    header, or a log line) is a surprisingly large share of the work done
+    for small responses; but the result only changes once a second.
+    """
+
+    def __init__(self, formatter):
+        self.formatter = formatter
+        self._cached = (None, None)
+
+    def __call__(self):
+        now = time.time()
+        second = int(now)
+        cached_second, value = self._cached
+        if second != cached_second:
+            value = self.formatter(now)
+            # Replace the (second, value) pair as a whole, so concurrent
+            # callers always see a consistent pair.
+            self._cached = (second, value)
+        return value
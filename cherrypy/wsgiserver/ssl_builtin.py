@@ -4,6 +4,12 @@ The ssl module must be importable for SSL functionality.
 
 To use this module, set ``CherryPyWSGIServer.ssl_adapter`` to an instance of
 ``BuiltinSSLAdapter``.
+
+Where the ssl module provides SSLContext (Python 2.7.9+ and 3.2+), the
+adapter builds one context when it is created, and wraps every
+connection with it. OpenSSL's server-side session cache and the key for
+session tickets belong to the context; sharing it lets clients which
+reconnect resume their session instead of doing a full handshake.
 """
 
 try:
@@ -20,6 +26,7 @@ except ImportError:
         DEFAULT_BUFFER_SIZE = -1
 
 import sys
+import threading
 
 from cherrypy import wsgiserver
 
@@ -33,23 +40,70 @@ class BuiltinSSLAdapter(wsgiserver.SSLAdapter):
     private_key = None
     """The filename of the server's private key file."""
 
+    context = None
+    """The ssl.SSLContext shared by all connections (created by get_context,
+    where the ssl module provides SSLContext)."""
+
     def __init__(self, certificate, private_key, certificate_chain=None):
         if ssl is None:
             raise ImportError("You must install the ssl module to use HTTPS.")
         self.certificate = certificate
         self.private_key = private_key
         self.certificate_chain = certificate_chain
+        self._stats_lock = threading.Lock()
+        if hasattr(ssl, 'SSLContext'):
+            self.context = self.get_context()
+
+    _handshakes = 0
+
+    def _get_handshakes(self):
+        stats = getattr(self.context, 'session_stats', None)
+        if stats is None:
+            return self._handshakes
+        return stats()['accept_good']
+    handshakes = property(_get_handshakes,
+        doc="The number of TLS handshakes completed so far.")
+
+    def _get_resumptions(self):
+        stats = getattr(self.context, 'session_stats', None)
+        if stats is None:
+            return 0
+        return stats()['hits']
+    resumptions = property(_get_resumptions,
+        doc="""The number of those handshakes which resumed an earlier session
+        (from the session cache, or a session ticket).""")
 
     def bind(self, sock):
         """Wrap and return the given socket."""
         return sock
 
+    def get_context(self):
+        """Return an ssl.SSLContext from self attributes."""
+        c = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+        c.load_cert_chain(self.certificate, self.private_key)
+        if self.certificate_chain:
+            c.load_verify_locations(self.certificate_chain)
+        # Session tickets are on unless OP_NO_TICKET is set; make sure.
+        if hasattr(ssl, 'OP_NO_TICKET'):
+            c.options &= ~ssl.OP_NO_TICKET
+        return c
+
     def wrap(self, sock):
         """Wrap and return the given socket, plus WSGI environ entries."""
         try:
-            s = ssl.wrap_socket(sock, do_handshake_on_connect=True,
-                    server_side=True, certfile=self.certificate,
-                    keyfile=self.private_key, ssl_version=ssl.PROTOCOL_SSLv23)
+            if self.context is not None:
+                s = self.context.wrap_socket(sock, do_handshake_on_connect=True,
+                                             server_side=True)
+            else:
+                s = ssl.wrap_socket(sock, do_handshake_on_connect=True,
+                        server_side=True, certfile=self.certificate,
+                        keyfile=self.private_key, ssl_version=ssl.PROTOCOL_SSLv23)
+                # Worker threads do the handshakes, so count under a lock.
+                self._stats_lock.acquire()
+                try:
+                    self._handshakes += 1
+                finally:
+                    self._stats_lock.release()
         except ssl.SSLError:
             e = sys.exc_info()[1]
             if e.errno == ssl.SSL_ERROR_EOF:
@@ -27,7 +27,10 @@ Method Two (shortcut)
 
 Both are None by default. If ssl_adapter.context is None, but .private_key
 and .certificate are both given and valid, they will be read, and the
-context will be automatically created from them.
+context will be automatically created from them. That context keeps a
+server-side session cache, and issues session tickets, so that clients
+which reconnect can resume their session instead of doing a full
+handshake; it also counts handshakes and resumptions for the server stats.
 """
 
 import socket
@@ -168,6 +171,10 @@ class pyOpenSSLAdapter(wsgiserver.SSLAdapter):
     This is needed for cheaper "chained root" SSL certificates, and should be
     left as None if not required."""
 
+    session_timeout = 300
+    """How long, in seconds, a cached session (or session ticket) may be
+    resumed, when the context is created by get_context."""
+
     def __init__(self, certificate, private_key, certificate_chain=None):
         if SSL is None:
             raise ImportError("You must install pyOpenSSL to use HTTPS.")
@@ -177,6 +184,7 @@ class pyOpenSSLAdapter(wsgiserver.SSLAdapter):
         self.private_key = private_key
         self.certificate_chain = certificate_chain
         self._environ = None
+        self._stats_lock = threading.Lock()
 
     def bind(self, sock):
         """Wrap and return the given socket."""
@@ -198,8 +206,29 @@ class pyOpenSSLAdapter(wsgiserver.SSLAdapter):
         if self.certificate_chain:
             c.load_verify_locations(self.certificate_chain)
         c.use_certificate_file(self.certificate)
+
+        # Keep sessions for resumption. A session id context is required
+        # for the server-side cache to be used; tickets are on by default.
+        if hasattr(c, 'set_session_cache_mode'):
+            c.set_session_cache_mode(SSL.SESS_CACHE_SERVER)
+            c.set_session_id("CherryPy".encode('ascii'))
+        c.set_timeout(self.session_timeout)
+        c.set_info_callback(self._info_callback)
         return c
 
+    def _info_callback(self, conn, where, ret):
+        if where & SSL.SSL_CB_HANDSHAKE_DONE:
+            session_reused = getattr(conn, 'session_reused', None)
+            reused = session_reused is not None and session_reused()
+            # Worker threads do the handshakes, so count under a lock.
+            self._stats_lock.acquire()
+            try:
+                self.handshakes += 1
+                if reused:
+                    self.resumptions += 1
+            finally:
+                self._stats_lock.release()
+
     def get_environ(self):
         """Return WSGI environ entries to be merged into each request."""
         ssl_environ = {
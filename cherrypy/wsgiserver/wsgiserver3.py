@@ -66,17 +66,31 @@ number of requests and their responses, so we run a nested loop::
                             response.close()
                 if req.close_connection:
                     return
+                if not conn.has_pending_data():
+                    return True
+        if communicate() returned True:
+            server.connections.put(conn)
+        else:
+            conn.close()
+
+A keep-alive connection with no further request waiting is not held by its
+worker; the server's ConnectionManager watches all such idle sockets at once
+and puts each connection back onto server.requests when it becomes readable.
 """
 
 __all__ = ['HTTPRequest', 'HTTPConnection', 'HTTPServer',
            'SizeCheckWrapper', 'KnownLengthRFile', 'ChunkedRFile',
+           'ClockCache', 'Histogram',
            'CP_makefile',
            'MaxSizeExceeded', 'NoSSLError', 'FatalSSLAlert',
-           'WorkerThread', 'ThreadPool', 'SSLAdapter',
+           'WorkerThread', 'ThreadPool', 'ConnectionManager', 'SSLAdapter',
            'CherryPyWSGIServer',
            'Gateway', 'WSGIGateway', 'WSGIGateway_10', 'WSGIGateway_u0',
+           'FileWrapper',
            'WSGIPathInfoDispatcher', 'get_ssl_adapter_class']
 
+import heapq
+import math
 import os
 try:
     import queue
@@ -84,6 +98,7 @@ except:
     import Queue as queue
 import re
 import email.utils
+import select
 import socket
 import sys
 if 'win' in sys.platform and not hasattr(socket, 'IPPROTO_IPV6'):
@@ -98,6 +113,17 @@ import threading
 import time
 from traceback import format_exc
 
+from cherrypy.wsgiserver.clock import ClockCache
+
+try:
+    from os import sendfile as _sendfile
+except ImportError:
+    try:
+        # The pysendfile package provides the same call for older versions.
+        from sendfile import sendfile as _sendfile
+    except ImportError:
+        _sendfile = None
+
 if sys.version_info >= (3, 0):
     bytestr = bytes
     unicodestr = str
@@ -118,6 +144,7 @@ else:
         return n
 
 LF = ntob('\n')
+CR = ntob('\r')
 CRLF = ntob('\r\n')
 TAB = ntob('\t')
 SPACE = ntob(' ')
@@ -225,6 +252,162 @@ def read_headers(rfile, hdict=None):
     return hdict
 
 
+def parse_headers(block, hdict=None):
+    """Parse the given block of header lines into the given header dict.
+
+    The block should hold everything after the request line, up to and
+    including the blank line which ends the headers (see read_head). The
+    rules, and the ValueErrors raised, are the same as for read_headers;
+    but the whole block is split into lines at once, rather than read
+    line by line.
+    """
+    if hdict is None:
+        hdict = {}
+
+    lines = block.split(LF)
+    # Anything after the last LF is a line cut short by the end of the data.
+    rest = lines.pop()
+    for line in lines:
+        if line == CR:
+            # Normal end of headers
+            return hdict
+        if line[-1:] != CR:
+            raise ValueError("HTTP requires CRLF terminators")
+
+        if line[:1] in (SPACE, TAB):
+            # It's a continuation line.
+            v = line.strip()
+        else:
+            try:
+                k, v = line.split(COLON, 1)
+            except ValueError:
+                raise ValueError("Illegal header line.")
+            # TODO: what about TE and WWW-Authenticate?
+            k = k.strip().title()
+            v = v.strip()
+            hname = k
+
+        if k in comma_separated_headers:
+            existing = hdict.get(hname)
+            if existing:
+                v = b", ".join((existing, v))
+        hdict[hname] = v
+
+    if rest:
+        raise ValueError("HTTP requires CRLF terminators")
+    # No more data--illegal end of headers
+    raise ValueError("Illegal end of headers.")
+
+
+def _find_head_end(data, start=0, end=None):
+    """Return the index just past the first blank line in data[start:end],
+    or -1.
+
+    A bare LF is accepted as a line ending here, so that read_head stops at
+    the same point readline would; such requests are then rejected with a
+    proper error by the parser.
+    """
+    i = data.find(LF + CRLF, start, end)
+    j = data.find(LF + LF, start, end)
+    if j >= 0 and (i < 0 or j < i):
+        return j + 2
+    if i >= 0:
+        return i + 3
+    return -1
+
+
+http_date = ClockCache(lambda t: email.utils.formatdate(t, usegmt=True).encode('ISO-8859-1'))
+"""Return the current time as an RFC 1123 date for the Date header."""
+
+
+class Histogram(object):
+    """Counts of positive values, in a fixed number of logarithmic buckets.
+
+    Bucket 0 counts values up to `lowest`; each bucket after that covers
+    values up to `factor` times the bound of the one before it, and the last
+    bucket also counts everything larger. So memory use is fixed, however
+    many values are added, and percentiles are accurate to within one bucket
+    (about 19% with the default factor).
+
+    Histograms are not thread-safe. Each WorkerThread keeps its own, and
+    HTTPServer.histograms merges them when the stats are read.
+    """
+
+    def __init__(self, lowest=1e-6, factor=2 ** 0.25, buckets=128):
+        self.lowest = lowest
+        self.factor = factor
+        self._scale = 1 / math.log(factor)
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        """Count the given value."""
+        i = 0
+        if value > self.lowest:
+            i = int(math.ceil(math.log(float(value) / self.lowest) * self._scale))
+            if i >= len(self.counts):
+                i = len(self.counts) - 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def update(self, other):
+        """Add the counts of another Histogram (with the same buckets)."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def clear(self):
+        """Forget all values added."""
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def copy(self):
+        h = Histogram(self.lowest, self.factor, len(self.counts))
+        h.update(self)
+        return h
+
+    def _get_mean(self):
+        """The mean of all values added, or None if there are none. Read-only."""
+        if not self.count:
+            return None
+        return self.total / float(self.count)
+    mean = property(_get_mean, doc=_get_mean.__doc__)
+
+    def percentile(self, p):
+        """Return the p'th percentile (0 to 100) of the values added, or None.
+
+        This is the upper bound of the bucket which holds it (but no more
+        than the largest value added, which is also the bound of the last,
+        open-ended bucket).
+        """
+        if not self.count:
+            return None
+        rank = p * self.count / 100.0
+        seen = 0
+        last = len(self.counts) - 1
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                if i == last:
+                    return self.max
+                return min(self.lowest * self.factor ** i, self.max)
+        return self.max
+
+    def summary(self):
+        """Return a dict of count, mean, max and the usual percentiles."""
+        return {'Count': self.count, 'Mean': self.mean, 'Max': self.max,
+                'p50': self.percentile(50), 'p90': self.percentile(90),
+                'p99': self.percentile(99)}
+
+
 class MaxSizeExceeded(Exception):
     pass
 
@@ -265,6 +448,26 @@ class SizeCheckWrapper(object):
             if len(data) < 256 or data[-1:].decode() == "\n":
                 return EMPTY.join(res)
 
+    def read_head(self):
+        """Read the request line and headers in one go (see read_head on
+        CP_fileobject). Unlike the other methods, this doesn't raise
+        MaxSizeExceeded; the caller checks the result against maxlen,
+        in order to tell a long Request-URI from long headers."""
+        read_head = getattr(self.rfile, 'read_head', None)
+        if read_head is not None:
+            data = read_head(self.maxlen)
+        else:
+            data = EMPTY
+            while not (self.maxlen and len(data) > self.maxlen):
+                line = self.rfile.readline(256)
+                if not line:
+                    break
+                data += line
+                if _find_head_end(data, max(len(data) - len(line) - 2, 0)) >= 0:
+                    break
+        self.bytes_read += len(data)
+        return data
+
     def readlines(self, sizehint=0):
         # Shamelessly stolen from StringIO
         total = 0
@@ -328,6 +531,16 @@ class KnownLengthRFile(object):
         self.remaining -= len(data)
         return data
 
+    def readinto(self, b):
+        """Read up to len(b) bytes into the writable buffer b, and return
+        the number of bytes read (0 when exhausted)."""
+        view = memoryview(b)
+        if len(view) > self.remaining:
+            view = view[:self.remaining]
+        n = self.rfile.readinto(view)
+        self.remaining -= n
+        return n
+
     def readlines(self, sizehint=0):
         # Shamelessly stolen from StringIO
         total = 0
@@ -348,8 +561,9 @@ class KnownLengthRFile(object):
         return self
 
     def __next__(self):
-        data = next(self.rfile)
-        self.remaining -= len(data)
+        data = self.readline()
+        if not data:
+            raise StopIteration
         return data
 
 
@@ -359,19 +573,24 @@ class ChunkedRFile(object):
     This class is intended to provide a conforming wsgi.input value for
     request entities that have been encoded with the 'chunked' transfer
     encoding.
+
+    Chunk data is not collected into a buffer of its own: reads are passed
+    through to rfile, never asking for more than is left of the current
+    chunk, so the framing is stripped without copying the data around.
     """
 
     def __init__(self, rfile, maxlen, bufsize=8192):
         self.rfile = rfile
         self.maxlen = maxlen
         self.bytes_read = 0
-        self.buffer = EMPTY
         self.bufsize = bufsize
         self.closed = False
+        self.chunk_remaining = 0
 
     def _fetch(self):
+        """Read the next chunk-size line, and return the size (0 at EOF)."""
         if self.closed:
-            return
+            return 0
 
         line = self.rfile.readline()
         self.bytes_read += len(line)
@@ -389,70 +608,83 @@ class ChunkedRFile(object):
 
         if chunk_size <= 0:
             self.closed = True
-            return
+            return 0
 
 ##            if line: chunk_extension = line[0]
 
         if self.maxlen and self.bytes_read + chunk_size > self.maxlen:
             raise IOError("Request Entity Too Large")
 
-        chunk = self.rfile.read(chunk_size)
-        self.bytes_read += len(chunk)
-        self.buffer += chunk
+        self.chunk_remaining = chunk_size
+        return chunk_size
 
-        crlf = self.rfile.read(2)
-        if crlf != CRLF:
-            raise ValueError(
-                 "Bad chunked transfer coding (expected '\\r\\n', "
-                 "got " + repr(crlf) + ")")
+    def _consumed(self, n):
+        """Account for n bytes of chunk data having been read."""
+        if n <= 0:
+            # The connection dropped in the middle of a chunk.
+            self.chunk_remaining = 0
+            self.closed = True
+            return
+        self.bytes_read += n
+        self.chunk_remaining -= n
+        if not self.chunk_remaining:
+            crlf = self.rfile.read(2)
+            if crlf != CRLF:
+                raise ValueError(
+                     "Bad chunked transfer coding (expected '\\r\\n', "
+                     "got " + repr(crlf) + ")")
 
     def read(self, size=None):
-        data = EMPTY
-        while True:
-            if size and len(data) >= size:
-                return data
-
-            if not self.buffer:
-                self._fetch()
-                if not self.buffer:
-                    # EOF
-                    return data
-
-            if size:
-                remaining = size - len(data)
-                data += self.buffer[:remaining]
-                self.buffer = self.buffer[remaining:]
-            else:
-                data += self.buffer
+        if size is not None and size < 0:
+            size = None
+        data = []
+        got = 0
+        while size is None or got < size:
+            if not self.chunk_remaining and not self._fetch():
+                # EOF
+                break
+            n = self.chunk_remaining
+            if size is not None:
+                n = min(n, size - got)
+            chunk = self.rfile.read(n)
+            self._consumed(len(chunk))
+            data.append(chunk)
+            got += len(chunk)
+        return EMPTY.join(data)
+
+    def readinto(self, b):
+        """Read up to len(b) bytes into the writable buffer b, and return
+        the number of bytes read (0 when exhausted)."""
+        view = memoryview(b)
+        got = 0
+        while got < len(view):
+            if not self.chunk_remaining and not self._fetch():
+                break
+            n = min(self.chunk_remaining, len(view) - got)
+            n = self.rfile.readinto(view[got:got + n])
+            self._consumed(n)
+            got += n
+        return got
 
     def readline(self, size=None):
-        data = EMPTY
-        while True:
-            if size and len(data) >= size:
-                return data
-
-            if not self.buffer:
-                self._fetch()
-                if not self.buffer:
-                    # EOF
-                    return data
-
-            newline_pos = self.buffer.find(LF)
-            if size:
-                if newline_pos == -1:
-                    remaining = size - len(data)
-                    data += self.buffer[:remaining]
-                    self.buffer = self.buffer[remaining:]
-                else:
-                    remaining = min(size - len(data), newline_pos)
-                    data += self.buffer[:remaining]
-                    self.buffer = self.buffer[remaining:]
-            else:
-                if newline_pos == -1:
-                    data += self.buffer
-                else:
-                    data += self.buffer[:newline_pos]
-                    self.buffer = self.buffer[newline_pos:]
+        if size is not None and size < 0:
+            size = None
+        data = []
+        got = 0
+        while size is None or got < size:
+            if not self.chunk_remaining and not self._fetch():
+                # EOF
+                break
+            n = self.chunk_remaining
+            if size is not None:
+                n = min(n, size - got)
+            line = self.rfile.readline(n)
+            self._consumed(len(line))
+            data.append(line)
+            got += len(line)
+            if line.endswith(LF):
+                break
+        return EMPTY.join(data)
 
     def readlines(self, sizehint=0):
         # Shamelessly stolen from StringIO
@@ -494,15 +726,13 @@ class ChunkedRFile(object):
         self.rfile.close()
 
     def __iter__(self):
-        # Shamelessly stolen from StringIO
-        total = 0
-        line = self.readline(sizehint)
-        while line:
-            yield line
-            total += len(line)
-            if 0 < sizehint <= total:
-                break
-            line = self.readline(sizehint)
+        return self
+
+    def __next__(self):
+        data = self.readline()
+        if not data:
+            raise StopIteration
+        return data
 
 
 class HTTPRequest(object):
@@ -554,6 +784,7 @@ class HTTPRequest(object):
         self.status = ""
         self.outheaders = []
         self.sent_headers = False
+        self._pending_headers = None
         self.close_connection = self.__class__.close_connection
         self.chunked_read = False
         self.chunked_write = self.__class__.chunked_write
@@ -562,54 +793,62 @@ class HTTPRequest(object):
         """Parse the next HTTP request start-line and message-headers."""
         self.rfile = SizeCheckWrapper(self.conn.rfile,
                                       self.server.max_request_header_size)
-        try:
-            success = self.read_request_line()
-        except MaxSizeExceeded:
-            self.simple_response("414 Request-URI Too Long",
-                "The Request-URI sent with the request exceeds the maximum "
-                "allowed bytes.")
-            return
-        else:
-            if not success:
-                return
-
-        try:
-            success = self.read_request_headers()
-        except MaxSizeExceeded:
-            self.simple_response("413 Request Entity Too Large",
-                "The headers sent with the request exceed the maximum "
-                "allowed bytes.")
-            return
-        else:
-            if not success:
-                return
-
-        self.ready = True
-
-    def read_request_line(self):
+        # Read the request line and all headers in one go; they're
+        # split up below.
         # HTTP/1.1 connections are persistent by default. If a client
         # requests a page, then idles (leaves the connection open),
-        # then rfile.readline() will raise socket.error("timed out").
+        # then reading will raise socket.error("timed out").
         # Note that it does this based on the value given to settimeout(),
         # and doesn't need the client to request or acknowledge the close
         # (although your TCP stack might suffer for it: cf Apache's history
         # with FIN_WAIT_2).
-        request_line = self.rfile.readline()
+        try:
+            head = self.rfile.read_head()
+        except socket.error:
+            # If the client had sent at least one line, communicate()
+            # should answer 408.
+            has_line = getattr(self.conn.rfile, 'has_line', None)
+            self.started_request = bool(has_line and has_line())
+            raise
 
         # Set started_request to True so communicate() knows to send 408
         # from here on out.
         self.started_request = True
-        if not request_line:
-            return False
+        if not head:
+            return
 
-        if request_line == CRLF:
+        start = 0
+        if head[:2] == CRLF:
             # RFC 2616 sec 4.1: "...if the server is reading the protocol
             # stream at the beginning of a message and receives a CRLF
             # first, it should ignore the CRLF."
             # But only ignore one leading line! else we enable a DoS.
-            request_line = self.rfile.readline()
-            if not request_line:
-                return False
+            start = 2
+        eol = head.find(LF, start) + 1 or len(head)
+
+        maxlen = self.rfile.maxlen
+        if maxlen and eol > maxlen:
+            self.simple_response("414 Request-URI Too Long",
+                "The Request-URI sent with the request exceeds the maximum "
+                "allowed bytes.")
+            return
+        if not self.read_request_line(head[start:eol]):
+            return
+
+        if maxlen and len(head) > maxlen:
+            self.simple_response("413 Request Entity Too Large",
+                "The headers sent with the request exceed the maximum "
+                "allowed bytes.")
+            return
+        if not self.read_request_headers(head[eol:]):
+            return
+
+        self.ready = True
+
+    def read_request_line(self, request_line):
+        """Parse the given request line. Return success."""
+        if not request_line:
+            return False
 
         if not request_line.endswith(CRLF):
             self.simple_response("400 Bad Request", "HTTP requires CRLF terminators")
@@ -683,12 +922,13 @@ class HTTPRequest(object):
         self.response_protocol = "HTTP/%s.%s" % min(rp, sp)
         return True
 
-    def read_request_headers(self):
-        """Read self.rfile into self.inheaders. Return success."""
+    def read_request_headers(self, block):
+        """Parse the given block of headers into self.inheaders.
+        Return success."""
 
         # then all the http headers
         try:
-            read_headers(self.rfile, self.inheaders)
+            parse_headers(block, self.inheaders)
         except ValueError:
             ex = sys.exc_info()[1]
             self.simple_response("400 Bad Request", ex.args[0])
@@ -831,7 +1071,10 @@ class HTTPRequest(object):
             self.sent_headers = True
             self.send_headers()
         if self.chunked_write:
-            self.conn.wfile.write(b"0\r\n\r\n")
+            self._send([b"0\r\n\r\n"])
+        elif self._pending_headers is not None:
+            # No body was written; send the headers on their own.
+            self._send([])
 
     def simple_response(self, status, msg=""):
         """Write a simple response back to the client."""
@@ -853,6 +1096,12 @@ class HTTPRequest(object):
                 # HTTP/1.0 had no 413/414 status nor Connection header.
                 # Emit 400 instead and trust the message body is enough.
                 status = "400 Bad Request"
+        elif status[:3] == "503":
+            # Service Unavailable; tell the client when to try again.
+            self.close_connection = True
+            buf.append(bytes("Retry-After: %s\r\n" % self.server.retry_after,
+                             "ISO-8859-1"))
+            buf.append(b"Connection: close\r\n")
 
         buf.append(CRLF)
         if msg:
@@ -870,19 +1119,123 @@ class HTTPRequest(object):
     def write(self, chunk):
         """Write unbuffered data to the client."""
         if self.chunked_write and chunk:
-            buf = [bytes(hex(len(chunk)), 'ASCII')[2:], CRLF, chunk, CRLF]
-            self.conn.wfile.write(EMPTY.join(buf))
+            self._send([bytes(hex(len(chunk)), 'ASCII')[2:], CRLF, chunk, CRLF])
+        else:
+            self._send([chunk])
+
+    def _send(self, parts):
+        """Send the given byte strings to the client, in one call if possible.
+
+        Any header block held back by send_headers goes out first, in the
+        same call. Where the socket supports it (plain HTTP), the parts are
+        handed to sendmsg as they are, rather than joined into a new string.
+        """
+        if self._pending_headers is not None:
+            if [part for part in parts if part]:
+                # Something besides the headers goes out in this send.
+                self.conn.sends_saved += 1
+            parts = [self._pending_headers] + parts
+            self._pending_headers = None
+
+        sock = self.conn.socket
+        if (len(parts) > 1 and self.server.ssl_adapter is None
+            and hasattr(sock, 'sendmsg')):
+            wfile = self.conn.wfile
+            wfile.flush()
+            while parts:
+                sent = sock.sendmsg(parts)
+                wfile.bytes_written += sent
+                while parts and sent >= len(parts[0]):
+                    sent -= len(parts.pop(0))
+                if parts and sent:
+                    parts[0] = memoryview(parts[0])[sent:]
         else:
-            self.conn.wfile.write(chunk)
+            self.conn.wfile.write(EMPTY.join(parts))
+
+    def sendfile(self, fileobj, count=None):
+        """Write count bytes (default: the rest) of fileobj to the client.
+
+        If fileobj is a real file, the connection is plain HTTP and the
+        response isn't chunked, the data is copied by the kernel (sendfile)
+        without passing through Python; otherwise, it's read and written
+        in blocks. Returns the number of bytes written.
+        """
+        infd = None
+        if (_sendfile is not None and not self.chunked_write
+            and self.server.ssl_adapter is None
+            and self.conn.socket is not None):
+            try:
+                infd = fileobj.fileno()
+                offset = fileobj.tell()
+            except (AttributeError, ValueError, IOError, OSError):
+                infd = None
+
+        sent = 0
+        if infd is None:
+            while count is None or sent < count:
+                if count is None:
+                    chunk = fileobj.read(65536)
+                else:
+                    chunk = fileobj.read(min(65536, count - sent))
+                if not chunk:
+                    break
+                self.write(chunk)
+                sent += len(chunk)
+            return sent
+
+        if self._pending_headers is not None:
+            self._send([])
+        wfile = self.conn.wfile
+        wfile.flush()
+        sock = self.conn.socket
+        try:
+            while count is None or sent < count:
+                if count is None:
+                    blocksize = 0x7ffff000
+                else:
+                    blocksize = count - sent
+                try:
+                    n = _sendfile(sock.fileno(), infd, offset + sent, blocksize)
+                except (IOError, OSError):
+                    e = sys.exc_info()[1]
+                    if e.args[0] in socket_error_eintr:
+                        continue
+                    if e.args[0] in socket_errors_nonblocking:
+                        # The socket has a timeout, which makes it
+                        # non-blocking underneath. Wait for it to drain.
+                        if not select.select([], [sock], [], sock.gettimeout())[1]:
+                            raise socket.timeout("timed out")
+                        continue
+                    raise socket.error(*e.args)
+                if not n:
+                    # End of file.
+                    break
+                sent += n
+        finally:
+            fileobj.seek(offset + sent)
+            if hasattr(wfile, 'bytes_written'):
+                wfile.bytes_written += sent
+        return sent
 
     def send_headers(self):
         """Assert, process, and send the HTTP response message-headers.
 
         You must set self.status, and self.outheaders before calling this.
+        The headers are actually transmitted along with the first write()
+        of the body (or when the response is finished, if there's no body).
         """
         hkeys = [key.lower() for key, value in self.outheaders]
         status = int(self.status[:3])
 
+        if self.server.draining:
+            # The server is stopping; this is the last response we'll send
+            # on this connection, so tell the client not to send another.
+            self.close_connection = True
+        elif (self.server.keepalive_max_requests > 0 and
+              self.conn.request_count >= self.server.keepalive_max_requests):
+            # That's enough requests for one connection.
+            self.close_connection = True
+
         if status == 413:
             # Request Entity Too Large. Close conn to avoid garbage.
             self.close_connection = True
@@ -931,7 +1284,7 @@ class HTTPRequest(object):
 
         if b"date" not in hkeys:
             self.outheaders.append(
-                (b"Date", email.utils.formatdate(usegmt=True).encode('ISO-8859-1')))
+                (b"Date", http_date()))
 
         if b"server" not in hkeys:
             self.outheaders.append(
@@ -941,7 +1294,9 @@ class HTTPRequest(object):
         for k, v in self.outheaders:
             buf.append(k + COLON + SPACE + v + CRLF)
         buf.append(CRLF)
-        self.conn.wfile.write(EMPTY.join(buf))
+        # Hold the header block back, so it can go out in the same send
+        # as the first chunk of the body (see _send).
+        self._pending_headers = EMPTY.join(buf)
 
 
 class NoSSLError(Exception):
@@ -957,6 +1312,8 @@ class FatalSSLAlert(Exception):
 class CP_BufferedWriter(io.BufferedWriter):
     """Faux file object attached to a socket object."""
 
+    bytes_written = 0
+
     def write(self, b):
         self._checkClosed()
         if isinstance(b, str):
@@ -965,6 +1322,7 @@ class CP_BufferedWriter(io.BufferedWriter):
         with self._write_lock:
             self._write_buf.extend(b)
             self._flush_unlocked()
+            self.bytes_written += len(b)
             return len(b)
 
     def _flush_unlocked(self):
@@ -979,9 +1337,185 @@ class CP_BufferedWriter(io.BufferedWriter):
             del self._write_buf[:n]
 
 
+class CP_BufferedReader(object):
+    """Faux file object attached to a socket object.
+
+    Data is received with sock.recv_into straight into a single bytearray,
+    and handed out from there: a read copies each byte once, into its
+    result (or, via readinto, into the caller's own buffer). The request
+    line and headers, and request bodies (through KnownLengthRFile and
+    ChunkedRFile), are all read through this one buffer.
+    """
+
+    def __init__(self, sock, bufsize=DEFAULT_BUFFER_SIZE):
+        if bufsize <= 0:
+            bufsize = DEFAULT_BUFFER_SIZE
+        self._sock = sock
+        self._buf = bytearray(bufsize)
+        # Unread data is self._buf[self._start:self._end].
+        self._start = 0
+        self._end = 0
+        self.bytes_read = 0
+        self.closed = False
+
+    def _recv_into(self, view):
+        while True:
+            try:
+                n = self._sock.recv_into(view)
+            except socket.error as e:
+                if (e.args[0] in socket_error_eintr or
+                        e.args[0] in socket_errors_nonblocking):
+                    continue
+                raise
+            self.bytes_read += n
+            return n
+
+    def _fill(self):
+        """Receive more data into the buffer, and return how much (0 at EOF).
+
+        Unread data is kept; it is moved to the front of the buffer to make
+        room if need be, and the buffer grows if it is full of unread data.
+        """
+        buf = self._buf
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif self._end == len(buf):
+            if self._start:
+                n = self._end - self._start
+                buf[:n] = buf[self._start:self._end]
+                self._start, self._end = 0, n
+            else:
+                buf.extend(bytes(len(buf)))
+        n = self._recv_into(memoryview(buf)[self._end:])
+        self._end += n
+        return n
+
+    def _take(self, n):
+        """Consume and return the next n buffered bytes."""
+        start = self._start
+        self._start = start + n
+        return memoryview(self._buf)[start:start + n].tobytes()
+
+    def readable(self):
+        return True
+
+    def has_data(self):
+        """Return True if data has been read from the socket but not consumed."""
+        return self._end > self._start
+
+    def has_line(self):
+        """Return True if a whole line has been read but not consumed."""
+        return self._buf.find(LF, self._start, self._end) >= 0
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = [self._take(self._end - self._start)]
+            while self._fill():
+                data.append(self._take(self._end - self._start))
+            return EMPTY.join(data)
+
+        if self._end - self._start >= size:
+            return self._take(size)
+        data = bytearray(size)
+        n = self.readinto(data)
+        del data[n:]
+        return bytes(data)
+
+    def readinto(self, b):
+        """Read up to len(b) bytes into the writable buffer b, and return
+        the number of bytes read (fewer only at EOF)."""
+        view = memoryview(b).cast('B')
+        want = len(view)
+        got = min(want, self._end - self._start)
+        if got:
+            view[:got] = memoryview(self._buf)[self._start:self._start + got]
+            self._start += got
+        while got < want:
+            if want - got >= len(self._buf):
+                # Nothing is buffered; receive straight into the caller's
+                # buffer rather than going through ours.
+                n = self._recv_into(view[got:])
+                if not n:
+                    break
+            else:
+                if not self._fill():
+                    break
+                n = min(want - got, self._end - self._start)
+                view[got:got + n] = memoryview(self._buf)[
+                    self._start:self._start + n]
+                self._start += n
+            got += n
+        return got
+
+    def readline(self, size=-1):
+        if size is not None and size < 0:
+            size = None
+        scanned = 0
+        while True:
+            stop = self._end
+            if size is not None:
+                stop = min(stop, self._start + size)
+            i = self._buf.find(LF, self._start + scanned, stop)
+            if i >= 0:
+                return self._take(i + 1 - self._start)
+            scanned = stop - self._start
+            if size is not None and scanned >= size:
+                return self._take(size)
+            if not self._fill():
+                # EOF
+                return self._take(self._end - self._start)
+
+    def readlines(self, sizehint=0):
+        total = 0
+        lines = []
+        line = self.readline()
+        while line:
+            lines.append(line)
+            total += len(line)
+            if 0 < sizehint <= total:
+                break
+            line = self.readline()
+        return lines
+
+    def read_head(self, maxlen=0):
+        """Read and return everything up to and including the first blank
+        line (that is, the request line and headers), or up to EOF.
+
+        Whatever follows stays buffered. If maxlen is positive, this gives
+        up (returning what it has) once more than maxlen bytes have been
+        read without finding the blank line.
+        """
+        scanned = 0
+        while True:
+            end = _find_head_end(self._buf, self._start + scanned, self._end)
+            if end >= 0:
+                break
+            if maxlen and self._end - self._start > maxlen:
+                end = self._end
+                break
+            # A blank line may straddle what we have and what comes next.
+            scanned = max(self._end - self._start - 2, 0)
+            if not self._fill():
+                end = self._end
+                break
+        return self._take(end - self._start)
+
+    def close(self):
+        self.closed = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+
 def CP_makefile(sock, mode='r', bufsize=DEFAULT_BUFFER_SIZE):
     if 'r' in mode:
-        return io.BufferedReader(socket.SocketIO(sock, mode), bufsize)
+        return CP_BufferedReader(sock, bufsize)
     else:
         return CP_BufferedWriter(socket.SocketIO(sock, mode), bufsize)
 
@@ -1000,28 +1534,67 @@ class HTTPConnection(object):
     wbufsize = DEFAULT_BUFFER_SIZE
     RequestHandlerClass = HTTPRequest
 
+    last_used = None
+    """The time at which the last response on this connection completed,
+    or None if no request has been answered yet."""
+
+    queued_at = None
+    """The time at which this connection was last put on the request queue."""
+
+    pending_request = None
+    """A RequestHandlerClass instance which has already been parsed, to be
+    responded to next (see AsyncioHTTPServer, which parses requests on its
+    event loop)."""
+
+    ssl_pending = False
+    """True if server.ssl_adapter has yet to wrap this connection's socket
+    (and do the TLS handshake); see handshake."""
+
+    request_count = 0
+    """The number of requests answered on this connection so far (see
+    HTTPServer.keepalive_max_requests)."""
+
+    histograms = None
+    """A dict of Histogram objects in which to record the service time and
+    size of each response, or None (see WorkerThread.histograms)."""
+
     def __init__(self, server, sock, makefile=CP_makefile):
         self.server = server
         self.socket = sock
         self.rfile = makefile(sock, "rb", self.rbufsize)
         self.wfile = makefile(sock, "wb", self.wbufsize)
         self.requests_seen = 0
+        self.sends_saved = 0
 
     def communicate(self):
-        """Read each request and respond appropriately."""
-        request_seen = False
+        """Read each request and respond appropriately.
+
+        Returns True if the connection should be kept open but has no
+        further request waiting, in which case the caller may park it
+        (see ConnectionManager) until the client sends more data.
+        Any other return value means the connection should be closed.
+        """
+        request_seen = self.last_used is not None
+        req = None
         try:
+            if self.ssl_pending and not self.handshake():
+                return
             while True:
                 # (re)set req to None so that if something goes wrong in
                 # the RequestHandlerClass constructor, the error doesn't
                 # get written to the previous request.
                 req = None
-                req = self.RequestHandlerClass(self.server, self)
+                if self.pending_request is not None:
+                    req, self.pending_request = self.pending_request, None
+                else:
+                    if request_seen and not self.wait_for_request():
+                        return
+                    req = self.RequestHandlerClass(self.server, self)
 
-                # This order of operations should guarantee correct pipelining.
-                req.parse_request()
-                if self.server.stats['Enabled']:
-                    self.requests_seen += 1
+                    # This order of operations should guarantee correct pipelining.
+                    req.parse_request()
+                    if self.server.stats['Enabled']:
+                        self.requests_seen += 1
                 if not req.ready:
                     # Something went wrong in the parsing (and the server has
                     # probably already made a simple_response). Return and
@@ -1029,9 +1602,22 @@ class HTTPConnection(object):
                     return
 
                 request_seen = True
+                self.request_count += 1
+                histograms = self.histograms
+                if histograms is not None:
+                    started = time.time()
+                    written = self.wfile.bytes_written
                 req.respond()
+                if histograms is not None:
+                    histograms['Service Time'].add(time.time() - started)
+                    histograms['Response Size'].add(
+                        self.wfile.bytes_written - written)
                 if req.close_connection:
-                    return
+                    return False
+                self.last_used = time.time()
+                if (self.server.connections is not None
+                    and not self.has_pending_data()):
+                    return True
         except socket.error:
             e = sys.exc_info()[1]
             errnum = e.args[0]
@@ -1083,6 +1669,86 @@ class HTTPConnection(object):
                     # Close the connection.
                     return
 
+    def handshake(self):
+        """Wrap our socket with server.ssl_adapter, doing the TLS handshake.
+
+        This is called from the worker thread rather than when the
+        connection is accepted, and is limited by server.ssl_handshake_timeout.
+        Return True if the connection is ready for requests, or False if it
+        should be closed.
+        """
+        self.ssl_pending = False
+        server = self.server
+        if hasattr(self.socket, 'settimeout'):
+            self.socket.settimeout(server.ssl_handshake_timeout or server.timeout)
+        try:
+            s, ssl_env = server.ssl_adapter.wrap(self.socket)
+        except NoSSLError:
+            msg = ("The client sent a plain HTTP request, but "
+                   "this server only speaks HTTPS on this port.")
+            buf = ["%s 400 Bad Request\r\n" % server.protocol,
+                   "Content-Length: %s\r\n" % len(msg),
+                   "Content-Type: text/plain\r\n\r\n",
+                   msg]
+            try:
+                self.wfile.write("".join(buf).encode('ISO-8859-1'))
+            except socket.error:
+                x = sys.exc_info()[1]
+                if x.args[0] not in socket_errors_to_ignore:
+                    raise
+            return False
+        except socket.timeout:
+            return False
+        except socket.error:
+            e = sys.exc_info()[1]
+            # Some versions of the ssl module raise SSLError on timeout.
+            if str(e.args[0]).endswith('timed out'):
+                return False
+            raise
+        if not s:
+            return False
+
+        # Re-apply our timeout since we may have a new socket object
+        if hasattr(s, 'settimeout'):
+            s.settimeout(server.timeout)
+        makefile = server.ssl_adapter.makefile
+        self.socket = s
+        self.rfile = makefile(s, "rb", self.rbufsize)
+        self.wfile = makefile(s, "wb", self.wbufsize)
+        self.ssl_env = ssl_env
+        return True
+
+    def wait_for_request(self):
+        """Wait for the client to start another request on this connection.
+
+        Return False if it hasn't done so within server.keepalive_timeout.
+        If that isn't set, don't wait here at all: reading the request will
+        wait for up to server.timeout instead.
+        """
+        timeout = self.server.keepalive_timeout
+        if not timeout or self.has_pending_data():
+            return True
+        try:
+            return bool(select.select([self.socket], [], [], timeout)[0])
+        except (select.error, socket.error, ValueError):
+            # Too many descriptors for select (or similar); don't wait here.
+            return True
+
+    def has_pending_data(self):
+        """Return True if another request may already be buffered.
+
+        Data which has been read from the socket into our own buffers
+        (or into an SSL library's buffers) will not wake a poller, so
+        such connections must not be parked.
+        """
+        has_data = getattr(self.rfile, 'has_data', None)
+        if has_data is None or has_data():
+            return True
+        pending = getattr(self.socket, 'pending', None)
+        if pending is not None and pending():
+            return True
+        return False
+
     linger = False
 
     def close(self):
@@ -1139,23 +1805,37 @@ class WorkerThread(threading.Thread):
     """A simple flag for the calling server to know when this thread
     has begun polling the Queue."""
 
+    histograms = None
+    """A dict of Histogram objects, recording (while stats are enabled) the
+    time each connection waited on the Queue ('Queue Wait'), and the service
+    time and size of each response ('Service Time', 'Response Size')."""
+
 
     def __init__(self, server):
         self.ready = False
         self.server = server
 
         self.requests_seen = 0
+        self.sends_saved = 0
         self.bytes_read = 0
         self.bytes_written = 0
         self.start_time = None
         self.work_time = 0
+        self.histograms = {
+            'Queue Wait': Histogram(),
+            'Service Time': Histogram(),
+            'Response Size': Histogram(lowest=1, buckets=160),
+            }
         self.stats = {
             'Requests': lambda s: self.requests_seen + ((self.start_time is None) and trueyzero or self.conn.requests_seen),
+            'Sends Saved': lambda s: self.sends_saved + ((self.start_time is None) and trueyzero or self.conn.sends_saved),
             'Bytes Read': lambda s: self.bytes_read + ((self.start_time is None) and trueyzero or self.conn.rfile.bytes_read),
             'Bytes Written': lambda s: self.bytes_written + ((self.start_time is None) and trueyzero or self.conn.wfile.bytes_written),
             'Work Time': lambda s: self.work_time + ((self.start_time is None) and trueyzero or time.time() - self.start_time),
             'Read Throughput': lambda s: s['Bytes Read'](s) / (s['Work Time'](s) or 1e-6),
             'Write Throughput': lambda s: s['Bytes Written'](s) / (s['Work Time'](s) or 1e-6),
+            'Service Time p50': lambda s: self.histograms['Service Time'].percentile(50),
+            'Service Time p99': lambda s: self.histograms['Service Time'].percentile(99),
         }
         threading.Thread.__init__(self)
 
@@ -1166,22 +1846,40 @@ class WorkerThread(threading.Thread):
             while True:
                 conn = self.server.requests.get()
                 if conn is _SHUTDOWNREQUEST:
+                    self.server.retire_histograms(self.histograms)
                     return
 
                 self.conn = conn
                 if self.server.stats['Enabled']:
                     self.start_time = time.time()
+                    if conn.queued_at is not None:
+                        self.histograms['Queue Wait'].add(
+                            self.start_time - conn.queued_at)
+                    conn.histograms = self.histograms
+                keep_conn = False
                 try:
-                    conn.communicate()
+                    keep_conn = conn.communicate()
                 finally:
-                    conn.close()
                     if self.server.stats['Enabled']:
                         self.requests_seen += self.conn.requests_seen
+                        self.sends_saved += self.conn.sends_saved
                         self.bytes_read += self.conn.rfile.bytes_read
                         self.bytes_written += self.conn.wfile.bytes_written
                         self.work_time += time.time() - self.start_time
                         self.start_time = None
+                        # The connection may come back to us (or another
+                        # worker) later; don't count its traffic twice.
+                        conn.requests_seen = 0
+                        conn.sends_saved = 0
+                        conn.rfile.bytes_read = 0
+                        conn.wfile.bytes_written = 0
+                    conn.histograms = None
                     self.conn = None
+                    connections = self.server.connections
+                    if keep_conn is True and connections is not None:
+                        connections.put(conn)
+                    else:
+                        conn.close()
         except (KeyboardInterrupt, SystemExit):
             exc = sys.exc_info()[1]
             self.server.interrupt = exc
@@ -1192,6 +1890,9 @@ class ThreadPool(object):
 
     ThreadPool objects must provide min, get(), put(obj), start()
     and stop(timeout) attributes.
+
+    If the server's autoscale_interval is positive, the pool also resizes
+    itself between min and max (see autoscale).
     """
 
     def __init__(self, server, min=10, max=-1):
@@ -1202,8 +1903,22 @@ class ThreadPool(object):
         self._queue = queue.Queue()
         self.get = self._queue.get
 
+        self.grown = 0
+        self.shrunk = 0
+        self.last_resize = None
+        self._autoscaler = None
+        self._autoscale_stop = threading.Event()
+        self._idle_since = None
+        self._idle_low = 0
+
     def start(self):
         """Start the pool of threads."""
+        interval = getattr(self.server, 'autoscale_interval', 0)
+        autoscale = interval and interval > 0
+        if autoscale and self.max <= 0:
+            raise ValueError("An autoscaling thread pool needs a "
+                             "positive max (got %r)." % (self.max,))
+
         for i in range(self.min):
             self._threads.append(WorkerThread(self.server))
         for worker in self._threads:
@@ -1213,15 +1928,102 @@ class ThreadPool(object):
             while not worker.ready:
                 time.sleep(.1)
 
+        if autoscale:
+            self._autoscale_stop.clear()
+            self._autoscaler = threading.Thread(target=self._run_autoscaler,
+                                                args=(interval,))
+            self._autoscaler.setName("CP Server Autoscaler " +
+                                     self._autoscaler.getName())
+            self._autoscaler.setDaemon(True)
+            self._autoscaler.start()
+
+    def _run_autoscaler(self, interval):
+        while True:
+            self._autoscale_stop.wait(interval)
+            if self._autoscale_stop.isSet():
+                return
+            try:
+                self.autoscale()
+            except Exception:
+                self.server.error_log("Error autoscaling the thread pool",
+                                      level=logging.ERROR, traceback=True)
+
+    def autoscale(self):
+        """Grow or shrink the pool once, based on queue depth and idle threads.
+
+        Connections waiting in the queue beyond the number of idle threads
+        grow the pool by that many threads (not above self.max). Threads
+        which have stayed idle for server.autoscale_idle_period seconds are
+        shut down (not below self.min). Decisions are counted in the
+        grown, shrunk and last_resize attributes.
+
+        The pool must have a positive max (start checks this before it
+        starts any thread); without one a flood of queued connections
+        would spawn a thread for each of them.
+        """
+        # Forget any threads which have already been shut down.
+        self._threads = [t for t in self._threads if t.isAlive()]
+
+        backlog = self.qsize
+        idle = self.idle
+        if backlog > 0:
+            self._idle_since = None
+            if backlog > idle:
+                before = len(self._threads)
+                self.grow(backlog - idle)
+                n = len(self._threads) - before
+                if n > 0:
+                    self.grown += n
+                    self.last_resize = ("grew by %d (queue %d, idle %d)"
+                                        % (n, backlog, idle))
+            return
+
+        if idle <= 0 or len(self._threads) <= self.min:
+            self._idle_since = None
+            return
+
+        # Only shut down threads which were idle for the whole period.
+        now = time.time()
+        if self._idle_since is None:
+            self._idle_since = now
+            self._idle_low = idle
+            return
+        self._idle_low = min(self._idle_low, idle)
+        if now - self._idle_since < getattr(self.server,
+                                            'autoscale_idle_period', 30):
+            return
+
+        n = min(self._idle_low, len(self._threads) - self.min)
+        self._idle_since = None
+        if n > 0:
+            self.shrink(n)
+            self.shrunk += n
+            self.last_resize = ("shrank by %d (queue %d, idle %d)"
+                                % (n, backlog, idle))
+
     def _get_idle(self):
         """Number of worker threads which are idle. Read-only."""
         return len([t for t in self._threads if t.conn is None])
     idle = property(_get_idle, doc=_get_idle.__doc__)
 
     def put(self, obj):
+        if obj is not _SHUTDOWNREQUEST:
+            obj.queued_at = time.time()
         self._queue.put(obj)
-        if obj is _SHUTDOWNREQUEST:
-            return
+
+    def _get_queue_wait(self):
+        """How long, in seconds, the oldest queued connection has been
+        waiting for a worker thread (0 if none). Read-only."""
+        q = self._queue
+        q.mutex.acquire()
+        try:
+            for obj in q.queue:
+                if obj is not _SHUTDOWNREQUEST:
+                    return time.time() - obj.queued_at
+        finally:
+            q.mutex.release()
+        return 0
+    queue_wait = property(_get_queue_wait, doc=_get_queue_wait.__doc__)
 
     def grow(self, amount):
         """Spawn new worker threads (not above self.max)."""
@@ -1266,6 +2068,12 @@ class ThreadPool(object):
             self._queue.put(_SHUTDOWNREQUEST)
 
     def stop(self, timeout=5):
+        if self._autoscaler is not None:
+            self._autoscale_stop.set()
+            if self._autoscaler is not threading.currentThread():
+                self._autoscaler.join()
+            self._autoscaler = None
+
         # Must shut down threads here so the code that calls
         # this method can know when all threads are stopped.
         for worker in self._threads:
@@ -1290,11 +2098,17 @@ class ThreadPool(object):
                             # Forcibly shut down the socket.
                             c = worker.conn
                             if c and not c.rfile.closed:
-                                try:
-                                    c.socket.shutdown(socket.SHUT_RD)
-                                except TypeError:
-                                    # pyOpenSSL sockets don't take an arg
-                                    c.socket.shutdown()
+                                if c.socket is None:
+                                    # No socket of its own (see
+                                    # AsyncioHTTPServer); closing the
+                                    # reader wakes the worker instead.
+                                    c.rfile.close()
+                                else:
+                                    try:
+                                        c.socket.shutdown(socket.SHUT_RD)
+                                    except TypeError:
+                                        # pyOpenSSL sockets don't take an arg
+                                        c.socket.shutdown()
                             worker.join()
                 except (AssertionError,
                         # Ignore repeated Ctrl-C.
@@ -1307,6 +2121,347 @@ class ThreadPool(object):
     qsize = property(_get_qsize)
 
 
+class ConnectionManager(object):
+    """Watches idle keep-alive connections on behalf of an HTTPServer.
+
+    Between requests, a persistent connection merely waits for the client
+    to speak again. Rather than pin a WorkerThread to that wait, the worker
+    hands the connection to this manager, which watches every parked socket
+    with a single poller (epoll where available, otherwise select) in its
+    own thread. As soon as a parked socket becomes readable, its connection
+    is put back onto server.requests. Connections which stay idle for
+    longer than server.keepalive_timeout (or server.timeout) are closed, as
+    are the longest-idle ones whenever more than
+    server.keepalive_max_connections are parked.
+
+    The same poller drains and closes connections refused by load shedding
+    (see linger), so that the accepting thread never waits on them.
+    """
+
+    poll_interval = 0.5
+    """The maximum time, in seconds, to block in a single poll. Idle
+    connections are checked for expiry at most this often."""
+
+    def __init__(self, server):
+        self.server = server
+        self.ready = False
+        self._lock = threading.Lock()
+        self._conns = {}
+        # A heap of (last_used, seq, fd, conn), oldest first. Entries for
+        # connections which have since been unparked are skipped lazily.
+        self._idle = []
+        self._seq = 0
+        self.evicted = 0
+        # {fd: (deadline, conn)} for connections to drain and close.
+        self._lingering = {}
+        self._thread = None
+        self._epoll = None
+        self._wakeup = None
+        self._woken = False
+
+    def __len__(self):
+        return len(self._conns)
+
+    def _get_idle(self):
+        """Number of connections which are parked. Read-only."""
+        return len(self._conns)
+    idle = property(_get_idle, doc=_get_idle.__doc__)
+
+    def start(self):
+        """Start watching parked connections in a new thread."""
+        if hasattr(select, 'epoll'):
+            self._epoll = select.epoll()
+        if os.name == 'posix':
+            # A self-pipe lets put() and stop() interrupt a blocking poll.
+            self._wakeup = os.pipe()
+            if self._epoll is not None:
+                self._epoll.register(self._wakeup[0], select.EPOLLIN)
+        self.ready = True
+        self._thread = threading.Thread(target=self._run)
+        self._thread.setName("CP Server Connection Manager " +
+                             self._thread.getName())
+        self._thread.setDaemon(True)
+        self._thread.start()
+
+    def put(self, conn):
+        """Park the given connection until its socket is readable."""
+        parked = False
+        evicted = []
+        self._lock.acquire()
+        try:
+            if self.ready:
+                try:
+                    fd = conn.socket.fileno()
+                    if self._epoll is not None:
+                        self._epoll.register(fd, select.EPOLLIN)
+                except (socket.error, IOError, OSError, ValueError):
+                    pass
+                else:
+                    self._conns[fd] = conn
+                    self._seq += 1
+                    heapq.heappush(self._idle,
+                                   (conn.last_used, self._seq, fd, conn))
+                    parked = True
+                    if self._epoll is None:
+                        # epoll notices new registrations by itself;
+                        # select needs to be told to start over.
+                        self._wake()
+
+                    limit = self.server.keepalive_max_connections
+                    if limit > 0:
+                        while len(self._conns) > limit:
+                            evicted.append(self._pop_oldest())
+                        self.evicted += len(evicted)
+                    if len(self._idle) > 2 * len(self._conns) + 64:
+                        # Too many stale entries; rebuild the heap.
+                        self._idle = [e for e in self._idle if self._parked(e)]
+                        heapq.heapify(self._idle)
+        finally:
+            self._lock.release()
+
+        if not parked:
+            conn.close()
+        for conn in evicted:
+            conn.close()
+
+    def linger(self, conn, timeout):
+        """Close the given connection once the client closes its end (or
+        after timeout seconds), throwing away whatever it sends.
+
+        The connection's socket must be non-blocking, with its write side
+        already shut down (see HTTPServer.shed).
+        """
+        self._lock.acquire()
+        try:
+            if self.ready:
+                try:
+                    fd = conn.socket.fileno()
+                    if self._epoll is not None:
+                        self._epoll.register(fd, select.EPOLLIN)
+                except (socket.error, IOError, OSError, ValueError):
+                    pass
+                else:
+                    self._lingering[fd] = (time.time() + timeout, conn)
+                    # Wake the poller, so that it watches for our deadline.
+                    self._wake()
+                    return
+        finally:
+            self._lock.release()
+        conn.close()
+
+    def _drain(self, conn):
+        """Read and throw away what a lingering client has sent. Return True
+        if it has closed its end (or the socket failed)."""
+        try:
+            while True:
+                if not conn.socket.recv(4096):
+                    return True
+        except socket.error:
+            return sys.exc_info()[1].args[0] not in socket_errors_nonblocking
+
+    def _parked(self, entry):
+        last_used, seq, fd, conn = entry
+        return self._conns.get(fd) is conn and conn.last_used == last_used
+
+    def _oldest(self):
+        """Return the connection which has been parked longest, or None.
+        Call this with the lock held."""
+        idle = self._idle
+        while idle:
+            if self._parked(idle[0]):
+                return idle[0][3]
+            heapq.heappop(idle)
+        return None
+
+    def _pop_oldest(self):
+        """Unpark and return the connection which has been parked longest.
+        Call this with the lock held."""
+        # Drop any stale entries from the top of the heap first.
+        self._oldest()
+        last_used, seq, fd, conn = heapq.heappop(self._idle)
+        del self._conns[fd]
+        self._unregister(fd)
+        return conn
+
+    def _wake(self):
+        if self._wakeup is not None and not self._woken:
+            self._woken = True
+            try:
+                os.write(self._wakeup[1], ntob('x'))
+            except OSError:
+                pass
+
+    def _unregister(self, fd):
+        if self._epoll is not None:
+            try:
+                self._epoll.unregister(fd)
+            except (IOError, OSError, ValueError):
+                pass
+
+    def _poll(self, timeout):
+        """Return the file descriptors which became readable."""
+        if self._epoll is not None:
+            fds = [fd for fd, event in self._epoll.poll(timeout)]
+        else:
+            self._lock.acquire()
+            try:
+                fds = list(self._conns.keys()) + list(self._lingering.keys())
+            finally:
+                self._lock.release()
+            if self._wakeup is None:
+                # We can't interrupt select (e.g. on Windows), so poll
+                # briefly to notice newly parked connections soon.
+                timeout = min(timeout, 0.01)
+                if not fds:
+                    time.sleep(timeout)
+                    return []
+            else:
+                fds.append(self._wakeup[0])
+            fds = select.select(fds, [], [], timeout)[0]
+
+        if self._wakeup is not None and self._wakeup[0] in fds:
+            self._woken = False
+            os.read(self._wakeup[0], 4096)
+            fds.remove(self._wakeup[0])
+        return fds
+
+    def _run(self):
+        next_expiry = time.time() + self.poll_interval
+        while self.ready:
+            timeout = self.poll_interval
+            self._lock.acquire()
+            try:
+                if self._lingering:
+                    deadline = min([d for d, c in self._lingering.values()])
+                    timeout = max(min(timeout, deadline - time.time()), 0)
+            finally:
+                self._lock.release()
+            try:
+                fds = self._poll(timeout)
+            except (select.error, IOError, OSError):
+                if sys.exc_info()[1].args[0] in socket_error_eintr:
+                    continue
+                if not self.ready:
+                    return
+                self.server.error_log("Error polling idle connections",
+                                      level=logging.ERROR, traceback=True)
+                self._close_all()
+                continue
+
+            readable = []
+            expired = []
+            lingering = []
+            self._lock.acquire()
+            try:
+                for fd in fds:
+                    conn = self._conns.pop(fd, None)
+                    if conn is not None:
+                        self._unregister(fd)
+                        readable.append(conn)
+                    elif fd in self._lingering:
+                        lingering.append(fd)
+
+                now = time.time()
+                for fd, (deadline, conn) in list(self._lingering.items()):
+                    if deadline <= now:
+                        del self._lingering[fd]
+                        self._unregister(fd)
+                        expired.append(conn)
+                        if fd in lingering:
+                            lingering.remove(fd)
+
+                if now >= next_expiry:
+                    next_expiry = now + self.poll_interval
+                    deadline = now - (self.server.keepalive_timeout or
+                                      self.server.timeout)
+                    while True:
+                        conn = self._oldest()
+                        if conn is None or conn.last_used >= deadline:
+                            break
+                        expired.append(self._pop_oldest())
+            finally:
+                self._lock.release()
+
+            for fd in lingering:
+                deadline, conn = self._lingering[fd]
+                if self._drain(conn):
+                    self._lock.acquire()
+                    try:
+                        del self._lingering[fd]
+                        self._unregister(fd)
+                    finally:
+                        self._lock.release()
+                    expired.append(conn)
+
+            for conn in readable:
+                self.server.requests.put(conn)
+            for conn in expired:
+                conn.close()
+
+    def _close_all(self):
+        self._lock.acquire()
+        try:
+            conns = list(self._conns.items())
+            conns.extend([(fd, c) for fd, (d, c) in self._lingering.items()])
+            self._conns.clear()
+            self._lingering.clear()
+            self._idle = []
+            for fd, conn in conns:
+                self._unregister(fd)
+        finally:
+            self._lock.release()
+        for fd, conn in conns:
+            try:
+                conn.close()
+            except (socket.error, IOError, OSError):
+                pass
+
+    def stop(self):
+        """Stop watching, and close all parked connections.
+
+        Parked connections whose client has already sent another request
+        are put back on server.requests instead, to be answered (and then
+        closed) before the worker threads shut down.
+        """
+        self._lock.acquire()
+        try:
+            self.ready = False
+        finally:
+            self._lock.release()
+
+        if self._thread is not None:
+            self._wake()
+            if self._thread is not threading.currentThread():
+                self._thread.join()
+            self._thread = None
+
+        try:
+            fds = self._poll(0)
+        except (select.error, IOError, OSError, ValueError):
+            fds = []
+        self._lock.acquire()
+        try:
+            readable = []
+            for fd in fds:
+                conn = self._conns.pop(fd, None)
+                if conn is not None:
+                    self._unregister(fd)
+                    readable.append(conn)
+        finally:
+            self._lock.release()
+        for conn in readable:
+            self.server.requests.put(conn)
+
+        self._close_all()
+        if self._epoll is not None:
+            self._epoll.close()
+            self._epoll = None
+        if self._wakeup is not None:
+            for fd in self._wakeup:
+                os.close(fd)
+            self._wakeup = None
+
+
 
 try:
     import fcntl
@@ -1339,6 +2494,13 @@ class SSLAdapter(object):
         * ``makefile(sock, mode='r', bufsize=DEFAULT_BUFFER_SIZE) -> socket file object``
     """
 
+    handshakes = 0
+    """The number of TLS handshakes completed so far."""
+
+    resumptions = 0
+    """The number of those handshakes which resumed an earlier session (from
+    the session cache, or a session ticket), instead of doing a full one."""
+
     def __init__(self, certificate, private_key, certificate_chain=None):
         self.certificate = certificate
         self.private_key = private_key
@@ -1404,14 +2566,88 @@ class HTTPServer(object):
     nodelay = True
     """If True (the default since 3.1), sets the TCP_NODELAY socket option."""
 
+    reuse_port = False
+    """If True, sets the SO_REUSEPORT socket option (where available), so
+    that several processes can listen on the same port at once."""
+
+    accept_batch = 1
+    """The maximum number of connections to accept each time the listening
+    socket wakes up (default 1). Values above 1 make the listening socket
+    non-blocking, so bursts of connections are accepted in one go. Set this
+    before calling start()."""
+
+    defer_accept = 0
+    """If positive, sets TCP_DEFER_ACCEPT (Linux only) to this many seconds,
+    so the kernel doesn't complete accept() until the client has sent data.
+    The default of 0 leaves the option unset."""
+
     ConnectionClass = HTTPConnection
     """The class to use for handling HTTP connections."""
 
+    park_idle_connections = True
+    """If True (the default), idle keep-alive connections are handed to a
+    ConnectionManager between requests instead of occupying a worker thread."""
+
+    connections = None
+    """The ConnectionManager holding idle keep-alive connections, or None."""
+
+    keepalive_timeout = None
+    """The time, in seconds, for which a keep-alive connection may sit idle
+    between requests. If None (or 0), the timeout attribute applies, as it
+    does while each request is read."""
+
+    keepalive_max_requests = 0
+    """The maximum number of requests to answer on one connection. The last
+    response is sent with "Connection: close". The default of 0 means no
+    limit."""
+
+    keepalive_max_connections = 0
+    """The maximum number of idle keep-alive connections to keep parked (see
+    park_idle_connections). Beyond it, the connections which have been idle
+    longest are closed. The default of 0 means no limit."""
+
+    autoscale_interval = 0
+    """How often, in seconds, to resize the worker pool based on queue depth
+    and idle threads (default 0, which disables autoscaling)."""
+
+    autoscale_idle_period = 30
+    """How long, in seconds, surplus worker threads must stay idle before
+    the autoscaler shuts them down, shrinking the pool toward minthreads."""
+
+    max_queue_size = 0
+    """The maximum number of accepted connections which may wait for a
+    worker thread, or 0 for no limit. Beyond it, new connections are
+    answered with "503 Service Unavailable" and closed."""
+
+    max_queue_wait = 0
+    """The maximum time, in seconds, which the oldest accepted connection
+    may wait for a worker thread, or 0 for no limit. Beyond it, new
+    connections are answered with "503 Service Unavailable" and closed."""
+
+    retry_after = 1
+    """The Retry-After value, in seconds, sent with 503 responses."""
+
+    shed_linger = 0.1
+    """The maximum time, in seconds, for which a connection refused by load
+    shedding is kept open after its 503 is sent, discarding whatever the
+    client sends, until the client closes it. See shed. Without a
+    ConnectionManager (see park_idle_connections), it is closed at once."""
+
     ssl_adapter = None
     """An instance of SSLAdapter (or a subclass).
 
     You must have the corresponding SSL driver library installed."""
 
+    draining = False
+    """True while stop() waits for the requests in progress to finish (for
+    up to shutdown_timeout). Their responses are sent with "Connection:
+    close", so that clients don't send any more requests on them."""
+
+    ssl_handshake_timeout = 10
+    """The timeout in seconds for the TLS handshake on each new connection
+    (done by the worker thread which first picks the connection up). If 0
+    or None, the timeout attribute applies instead."""
+
     def __init__(self, bind_addr, gateway, minthreads=10, maxthreads=-1,
                  server_name=None):
         self.bind_addr = bind_addr
@@ -1427,6 +2663,8 @@ class HTTPServer(object):
     def clear_stats(self):
         self._start_time = None
         self._run_time = 0
+        self._retired_histograms = {}
+        self._retired_histograms_lock = threading.Lock()
         self.stats = {
             'Enabled': False,
             'Bind Address': lambda s: repr(self.bind_addr),
@@ -1436,9 +2674,21 @@ class HTTPServer(object):
             'Queue': lambda s: getattr(self.requests, "qsize", None),
             'Threads': lambda s: len(getattr(self.requests, "_threads", [])),
             'Threads Idle': lambda s: getattr(self.requests, "idle", None),
+            'Connections Idle': lambda s: getattr(self.connections, "idle", None),
+            'Connections Evicted': lambda s: getattr(self.connections, "evicted", None),
+            'Threads Grown': lambda s: getattr(self.requests, "grown", None),
+            'Threads Shrunk': lambda s: getattr(self.requests, "shrunk", None),
+            'Last Resize': lambda s: getattr(self.requests, "last_resize", None),
             'Socket Errors': 0,
+            'SSL Handshakes': lambda s: getattr(self.ssl_adapter, "handshakes", None),
+            'SSL Resumptions': lambda s: getattr(self.ssl_adapter, "resumptions", None),
+            'Shed (Queue Size)': 0,
+            'Shed (Queue Wait)': 0,
+            'Queue Wait': lambda s: getattr(self.requests, "queue_wait", None),
             'Requests': lambda s: (not s['Enabled']) and -1 or sum([w['Requests'](w) for w
                                        in s['Worker Threads'].values()], 0),
+            'Sends Saved': lambda s: (not s['Enabled']) and -1 or sum([w['Sends Saved'](w) for w
+                                         in s['Worker Threads'].values()], 0),
             'Bytes Read': lambda s: (not s['Enabled']) and -1 or sum([w['Bytes Read'](w) for w
                                          in s['Worker Threads'].values()], 0),
             'Bytes Written': lambda s: (not s['Enabled']) and -1 or sum([w['Bytes Written'](w) for w
@@ -1452,9 +2702,44 @@ class HTTPServer(object):
                 [w['Bytes Written'](w) / (w['Work Time'](w) or 1e-6)
                  for w in s['Worker Threads'].values()], 0),
             'Worker Threads': {},
+            'Histograms': lambda s: s['Enabled'] and dict(
+                [(k, h.summary()) for k, h in self.histograms().items()]
+                ) or {},
             }
         logging.statistics["CherryPy HTTPServer %d" % id(self)] = self.stats
 
+    def histograms(self):
+        """Return a dict of Histograms (see WorkerThread.histograms),
+        merging those of all current worker threads and of any which
+        have already been shut down."""
+        self._retired_histograms_lock.acquire()
+        try:
+            merged = dict([(name, h.copy()) for name, h
+                           in self._retired_histograms.items()])
+            for worker in list(getattr(self.requests, '_threads', [])):
+                for name, h in worker.histograms.items():
+                    if name in merged:
+                        merged[name].update(h)
+                    else:
+                        merged[name] = h.copy()
+        finally:
+            self._retired_histograms_lock.release()
+        return merged
+
+    def retire_histograms(self, histograms):
+        """Move the counts of a worker thread which is shutting down (for
+        example when the thread pool shrinks) into those of the server."""
+        self._retired_histograms_lock.acquire()
+        try:
+            for name, h in histograms.items():
+                if name in self._retired_histograms:
+                    self._retired_histograms[name].update(h)
+                else:
+                    self._retired_histograms[name] = h.copy()
+                h.clear()
+        finally:
+            self._retired_histograms_lock.release()
+
     def runtime(self):
         if self._start_time is None:
             return self._run_time
@@ -1506,6 +2791,42 @@ class HTTPServer(object):
         if self.software is None:
             self.software = "%s Server" % self.version
 
+        self.listen()
+        self.serve()
+
+    def serve(self):
+        """Answer connections on the listening socket until stopped.
+
+        This starts the worker threads, then accepts connections in the
+        calling thread (see tick) for as long as the server is ready.
+        """
+        # Create worker threads
+        self.requests.start()
+
+        # Watch idle keep-alive connections without tying up workers
+        if self.park_idle_connections:
+            self.connections = ConnectionManager(self)
+            self.connections.start()
+
+        self.ready = True
+        self._start_time = time.time()
+        while self.ready:
+            try:
+                self.tick()
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except:
+                self.error_log("Error in HTTPServer.tick", level=logging.ERROR,
+                               traceback=True)
+            if self.interrupt:
+                while self.interrupt is True:
+                    # Wait for self.stop() to complete. See _set_interrupt.
+                    time.sleep(0.1)
+                if self.interrupt:
+                    raise self.interrupt
+
+    def listen(self):
+        """Create the listening socket (see bind_addr), and listen on it."""
         # Select the appropriate socket
         if isinstance(self.bind_addr, basestring):
             # AF_UNIX socket
@@ -1549,30 +2870,15 @@ class HTTPServer(object):
         if not self.socket:
             raise socket.error(msg)
 
-        # Timeout so KeyboardInterrupt can be caught on Win32
-        self.socket.settimeout(1)
+        if self.accept_batch > 1:
+            # tick() waits in select (with a timeout), then drains the
+            # backlog without blocking.
+            self.socket.settimeout(0)
+        else:
+            # Timeout so KeyboardInterrupt can be caught on Win32
+            self.socket.settimeout(1)
         self.socket.listen(self.request_queue_size)
 
-        # Create worker threads
-        self.requests.start()
-
-        self.ready = True
-        self._start_time = time.time()
-        while self.ready:
-            try:
-                self.tick()
-            except (KeyboardInterrupt, SystemExit):
-                raise
-            except:
-                self.error_log("Error in HTTPServer.tick", level=logging.ERROR,
-                               traceback=True)
-            if self.interrupt:
-                while self.interrupt is True:
-                    # Wait for self.stop() to complete. See _set_interrupt.
-                    time.sleep(0.1)
-                if self.interrupt:
-                    raise self.interrupt
-
     def error_log(self, msg="", level=20, traceback=False):
         # Override this in subclasses as desired
         sys.stderr.write(msg + '\n')
@@ -1587,8 +2893,14 @@ class HTTPServer(object):
         self.socket = socket.socket(family, type, proto)
         prevent_socket_inheritance(self.socket)
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reuse_port and hasattr(socket, 'SO_REUSEPORT'):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         if self.nodelay and not isinstance(self.bind_addr, str):
             self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if (self.defer_accept > 0 and hasattr(socket, 'TCP_DEFER_ACCEPT')
+            and not isinstance(self.bind_addr, str)):
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_DEFER_ACCEPT,
+                                   self.defer_accept)
 
         if self.ssl_adapter is not None:
             self.socket = self.ssl_adapter.bind(self.socket)
@@ -1607,48 +2919,51 @@ class HTTPServer(object):
         self.socket.bind(self.bind_addr)
 
     def tick(self):
-        """Accept a new connection and put it on the Queue."""
+        """Accept new connections and put them on the Queue.
+
+        Normally, this accepts a single connection (waiting up to a second
+        for one). If accept_batch is greater than 1, it waits for the
+        listening socket to become readable instead, and then accepts up to
+        that many connections without blocking, draining the backlog in one
+        wakeup.
+        """
+        if self.accept_batch <= 1:
+            self.accept()
+            return
+
+        try:
+            if not select.select([self.socket], [], [], 1)[0]:
+                return
+        except (select.error, socket.error, ValueError):
+            # Interrupted, or our socket was closed by stop().
+            return
+        for i in range(self.accept_batch):
+            if not self.accept():
+                break
+
+    def accept(self):
+        """Accept one connection and put it on the Queue.
+
+        Return True if a connection was accepted (even if it was then
+        refused, for example by load shedding), or False if there was none.
+        """
         try:
             s, addr = self.socket.accept()
             if self.stats['Enabled']:
                 self.stats['Accepts'] += 1
             if not self.ready:
-                return
+                return True
 
             prevent_socket_inheritance(s)
             if hasattr(s, 'settimeout'):
                 s.settimeout(self.timeout)
 
-            makefile = CP_makefile
-            ssl_env = {}
-            # if ssl cert and key are set, we try to be a secure HTTP server
-            if self.ssl_adapter is not None:
-                try:
-                    s, ssl_env = self.ssl_adapter.wrap(s)
-                except NoSSLError:
-                    msg = ("The client sent a plain HTTP request, but "
-                           "this server only speaks HTTPS on this port.")
-                    buf = ["%s 400 Bad Request\r\n" % self.protocol,
-                           "Content-Length: %s\r\n" % len(msg),
-                           "Content-Type: text/plain\r\n\r\n",
-                           msg]
-
-                    wfile = makefile(s, "wb", DEFAULT_BUFFER_SIZE)
-                    try:
-                        wfile.write("".join(buf).encode('ISO-8859-1'))
-                    except socket.error:
-                        x = sys.exc_info()[1]
-                        if x.args[0] not in socket_errors_to_ignore:
-                            raise
-                    return
-                if not s:
-                    return
-                makefile = self.ssl_adapter.makefile
-                # Re-apply our timeout since we may have a new socket object
-                if hasattr(s, 'settimeout'):
-                    s.settimeout(self.timeout)
-
-            conn = self.ConnectionClass(self, s, makefile)
+            conn = self.ConnectionClass(self, s, CP_makefile)
+            # If ssl cert and key are set, we try to be a secure HTTP server.
+            # The handshake is left to the worker thread which picks the
+            # connection up (see HTTPConnection.handshake), so that one slow
+            # client can't hold up accepting the rest.
+            conn.ssl_pending = self.ssl_adapter is not None
 
             if not isinstance(self.bind_addr, basestring):
                 # optional values
@@ -1664,16 +2979,25 @@ class HTTPServer(object):
                 conn.remote_addr = addr[0]
                 conn.remote_port = addr[1]
 
-            conn.ssl_env = ssl_env
+            overload = self.overloaded()
+            if overload:
+                if self.stats['Enabled']:
+                    self.stats[overload] += 1
+                self.shed(conn)
+                return True
 
             self.requests.put(conn)
+            return True
         except socket.timeout:
             # The only reason for the timeout in start() is so we can
             # notice keyboard interrupts on Win32, which don't interrupt
             # accept() by default
-            return
+            return False
         except socket.error:
             x = sys.exc_info()[1]
+            if self.accept_batch > 1 and x.args[0] in socket_errors_nonblocking:
+                # The backlog is empty; that's how batches normally end.
+                return False
             if self.stats['Enabled']:
                 self.stats['Socket Errors'] += 1
             if x.args[0] in socket_error_eintr:
@@ -1682,16 +3006,67 @@ class HTTPServer(object):
                 # the call, and I *think* I'm reading it right that Python
                 # will then go ahead and poll for and handle the signal
                 # elsewhere. See http://www.cherrypy.org/ticket/707.
-                return
+                return False
             if x.args[0] in socket_errors_nonblocking:
                 # Just try again. See http://www.cherrypy.org/ticket/479.
-                return
+                return False
             if x.args[0] in socket_errors_to_ignore:
                 # Our socket was closed.
                 # See http://www.cherrypy.org/ticket/686.
-                return
+                return False
             raise
 
+    def overloaded(self):
+        """Return the stats key for the request queue limit which is
+        exceeded (see max_queue_size and max_queue_wait), or None."""
+        if self.max_queue_size > 0:
+            qsize = getattr(self.requests, 'qsize', None)
+            if qsize is not None and qsize >= self.max_queue_size:
+                return 'Shed (Queue Size)'
+        if self.max_queue_wait > 0:
+            wait = getattr(self.requests, 'queue_wait', None)
+            if wait is not None and wait > self.max_queue_wait:
+                return 'Shed (Queue Wait)'
+        return None
+
+    def shed(self, conn):
+        """Answer the given connection with 503 and close it, without
+        waiting for (or reading the request in) a worker thread.
+
+        This runs in the accepting thread, so it must not block. The 503 is
+        only sent if the socket takes it at once; then the write side is
+        shut down, and the connection is handed to the ConnectionManager
+        (see ConnectionManager.linger), which throws away whatever the
+        client sends until it closes the connection (or shed_linger runs
+        out). Closing with unread data would reset the connection, and the
+        client might never see the 503.
+        """
+        if conn.ssl_pending:
+            # We can't answer without doing the TLS handshake, which is
+            # just the sort of work we're trying to shed.
+            conn.close()
+            return
+        msg = (b"The server is too busy to handle this request; "
+               b"please try again later.")
+        response = b"".join([
+            bytes(self.protocol, "ascii"), b" 503 Service Unavailable\r\n",
+            bytes("Content-Length: %s\r\n" % len(msg), "ISO-8859-1"),
+            b"Content-Type: text/plain\r\n",
+            bytes("Retry-After: %s\r\n" % self.retry_after, "ISO-8859-1"),
+            b"Connection: close\r\n\r\n", msg])
+        sock = conn.socket
+        try:
+            sock.setblocking(False)
+            sock.send(response)
+            sock.shutdown(socket.SHUT_WR)
+        except socket.error:
+            conn.close()
+            return
+        if self.connections is not None:
+            self.connections.linger(conn, self.shed_linger)
+        else:
+            conn.close()
+
     def _get_interrupt(self):
         return self._interrupt
     def _set_interrupt(self, interrupt):
@@ -1703,8 +3078,14 @@ class HTTPServer(object):
                              "interrupt the server.")
 
     def stop(self):
-        """Gracefully shutdown a server that is serving forever."""
+        """Gracefully shutdown a server that is serving forever.
+
+        This stops accepting connections, then lets the requests in progress
+        (and those already accepted) finish, waiting up to shutdown_timeout
+        for them; see draining.
+        """
         self.ready = False
+        self.draining = True
         if self._start_time is not None:
             self._run_time += (time.time() - self._start_time)
         self._start_time = None
@@ -1744,7 +3125,10 @@ class HTTPServer(object):
                 sock.close()
             self.socket = None
 
+        if self.connections is not None:
+            self.connections.stop()
         self.requests.stop(self.shutdown_timeout)
+        self.draining = False
 
 
 class Gateway(object):
@@ -1821,6 +3205,29 @@ class CherryPyWSGIServer(HTTPServer):
     numthreads = property(_get_numthreads, _set_numthreads)
 
 
+class FileWrapper(object):
+    """The wsgi.file_wrapper (see PEP 333) for this server.
+
+    Iterating over a FileWrapper yields blocks read from the file, but
+    WSGIGateway recognizes these and uses HTTPRequest.sendfile instead.
+    """
+
+    def __init__(self, filelike, blksize=8192):
+        self.filelike = filelike
+        self.blksize = blksize
+        if hasattr(filelike, 'close'):
+            self.close = filelike.close
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        data = self.filelike.read(self.blksize)
+        if data:
+            return data
+        raise StopIteration()
+
+
 class WSGIGateway(Gateway):
     """A base class to interface HTTPServer with WSGI."""
 
@@ -1838,6 +3245,9 @@ class WSGIGateway(Gateway):
         """Process the current request."""
         response = self.req.server.wsgi_app(self.env, self.start_response)
         try:
+            if isinstance(response, FileWrapper):
+                self.write_file(response.filelike)
+                return
             for chunk in response:
                 # "The start_response callable must not actually transmit
                 # the response headers. Instead, it must store them for the
@@ -1890,6 +3300,17 @@ class WSGIGateway(Gateway):
 
         return self.write
 
+    def write_file(self, filelike):
+        """Write the given file (from a FileWrapper) to the client."""
+        if not self.started_response:
+            raise AssertionError("WSGI write called before start_response.")
+
+        if not self.req.sent_headers:
+            self.req.sent_headers = True
+            self.req.send_headers()
+
+        self.req.sendfile(filelike, self.remaining_bytes_out)
+
     def write(self, chunk):
         """WSGI callable to write unbuffered data to the client.
 
@@ -1948,6 +3369,7 @@ class WSGIGateway_10(WSGIGateway):
             'SERVER_PROTOCOL': req.request_protocol.decode('ISO-8859-1'),
             'SERVER_SOFTWARE': req.server.software,
             'wsgi.errors': sys.stderr,
+            'wsgi.file_wrapper': FileWrapper,
             'wsgi.input': req.rfile,
             'wsgi.multiprocess': False,
             'wsgi.multithread': True,